@@ -1,5 +1,3 @@
-import bpy
-
 bl_info = {
     "name": "Unreal to Source Exporter (UTS)",
     "author": "Akulla",
@@ -11,8 +9,11 @@ bl_info = {
 
 ADDON_PACKAGE = __package__
 
+# bpy is imported lazily, so worker processes can import the bpy-free core modules (core.obb, ...)
+
 
 def register():
+    import bpy
     from .preferences import UTS_Prefs
     from .operators import operator_classes
     from .ui import ui_classes
@@ -25,6 +26,7 @@ def register():
 
 
 def unregister():
+    import bpy
     from .preferences import UTS_Prefs
     from .operators import operator_classes
     from .ui import ui_classes
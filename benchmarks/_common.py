@@ -0,0 +1,28 @@
+"""Shared helpers for the benchmark scripts. Run them from anywhere with plain Python."""
+import importlib
+import os
+import sys
+
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_addon_module(name):
+    """Import a bpy-free module of the add-on (e.g. 'core.vtf') without Blender."""
+    parent, package = os.path.split(ADDON_DIR)
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+    return importlib.import_module(f"{package}.{name}")
+
+
+def enable_addon():
+    """Enable the add-on of this checkout in the running Blender. Returns its preferences."""
+    import addon_utils
+    import bpy
+
+    parent, package = os.path.split(ADDON_DIR)
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+    if addon_utils.enable(package, default_set=True) is None:
+        raise RuntimeError(f"Could not enable the add-on '{package}' from {parent}")
+    return bpy.context.preferences.addons[package].preferences
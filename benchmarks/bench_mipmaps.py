@@ -0,0 +1,74 @@
+"""Compare VTF encoding time without mipmaps, with srctools' default mipmaps and with core.vtf's mip filters.
+
+    python benchmarks/bench_mipmaps.py [--sizes 512 1024 2048] [--repeat 3]
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+from PIL import Image
+from srctools import VTF
+from srctools.vtf import ImageFormats as VTFFormats
+from srctools.vtf import VTFFlags
+
+from _common import import_addon_module
+
+
+def synthetic_image(size, alpha):
+    """Gradients plus noise, so DXT compression and filtering both have something to do."""
+    rng = np.random.default_rng(size)
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    rgba = np.empty((size, size, 4), dtype=np.uint8)
+    rgba[:, :, 0] = x * 255
+    rgba[:, :, 1] = y * 255
+    rgba[:, :, 2] = rng.integers(0, 256, (size, size))
+    rgba[:, :, 3] = np.where((x * 8).astype(int) % 2, 255, 0) if alpha else 255
+    return Image.fromarray(rgba, 'RGBA')
+
+
+def plain_vtf(img, fmt):
+    """Baseline: plain srctools with the top level only, so no mip chain is built at all."""
+    texture = VTF(img.width, img.height, fmt=fmt, version=(7, 4), flags=VTFFlags.NO_MIP | VTFFlags.EIGHTBITALPHA)
+    texture.mipmap_count = 1
+    texture.get().copy_from(img.tobytes())
+    return texture
+
+
+def bench(build, img, fmt, repeat, **kwargs):
+    best_mips, best_total = float('inf'), float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        texture = build(img, fmt, **kwargs)
+        built = time.perf_counter()
+        texture.save(io.BytesIO())
+        best_mips = min(best_mips, built - start)
+        best_total = min(best_total, time.perf_counter() - start)
+    return best_mips, best_total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[512, 1024, 2048])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    vtf = import_addon_module('core.vtf')
+
+    # 'srctools' leaves the bilinear mip chain and thumbnail to VTF.save()
+    cases = ([('no mips', plain_vtf, None), ('srctools', vtf.image_to_vtf, None)]
+             + [(f.lower(), vtf.image_to_vtf, f) for f in vtf.MIP_FILTERS])
+    print(f"{'size':>6} {'format':<8} {'mips':<9} {'build (s)':>10} {'total (s)':>10}")
+    for size in args.sizes:
+        for fmt, alpha, extra in ((VTFFormats.DXT1, False, {}),
+                                  (VTFFormats.DXT5, True, {}),
+                                  (VTFFormats.RGB888, False, {'srgb': False, 'normal_map': True})):
+            img = synthetic_image(size, alpha)
+            for label, builder, mip_filter in cases:
+                kwargs = dict(extra, mip_filter=mip_filter) if mip_filter else {}
+                build, total = bench(builder, img, fmt, args.repeat, **kwargs)
+                print(f"{size:>6} {fmt.name:<8} {label:<9} {build:>10.3f} {total:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
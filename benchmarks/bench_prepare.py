@@ -0,0 +1,69 @@
+"""Compare origin centering and renaming through bpy.ops with the core.scene data-API pass.
+
+Runs inside Blender:
+
+    blender -b --factory-startup --python benchmarks/bench_prepare.py -- [--objects 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import bmesh
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import import_addon_module  # noqa: E402
+
+
+def build_scene(objects):
+    """Fill an empty scene with off-center cubes, a tenth of them sharing their mesh."""
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+    bm = bmesh.new()
+    bmesh.ops.create_cube(bm, size=1.0)
+    bmesh.ops.translate(bm, vec=(0.5, 0.25, 0.0), verts=bm.verts)
+    template = bpy.data.meshes.new("bench_cube")
+    bm.to_mesh(template)
+    bm.free()
+
+    scene = bpy.context.scene
+    for i in range(objects):
+        mesh = template if i % 10 == 0 else template.copy()
+        obj = bpy.data.objects.new(f"SM_Bench_{i:05d}_Replaced", mesh)
+        obj.location = (i % 100 * 3.0, i // 100 * 3.0, 0.0)
+        scene.collection.objects.link(obj)
+
+
+def prepare_ops():
+    bpy.ops.object.select_all(action='SELECT')
+    bpy.ops.object.origin_set(type='ORIGIN_GEOMETRY', center='BOUNDS')
+    for obj in list(bpy.data.objects):
+        obj.rename(obj.name.split(".")[0].replace("_Replaced", ""))
+    bpy.ops.object.select_all(action='DESELECT')
+
+
+def prepare_data_api():
+    scene = import_addon_module('core.scene')
+    timer = scene.StepTimer()
+    scene.prepare_objects(bpy.data.objects, lambda obj: True, timer, rename=True, center=True)
+    for line in timer.report():
+        print("[bench]   " + line.replace("\t", "  "))
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--objects', type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    for label, prepare in (('ops', prepare_ops), ('data', prepare_data_api)):
+        build_scene(args.objects)
+        start = time.perf_counter()
+        prepare()
+        elapsed = time.perf_counter() - start
+        print(f"[bench] {label:<5} {args.objects} objects  {elapsed:8.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Compare SMD export through Blender Source Tools with the native core.smd writer.
+
+'1-pass' also writes two vertex-clustered LODs per object (core.lod.export_model_smds), which
+the other exporters would need two more full exports for.
+
+Runs inside Blender:
+
+    blender -b --factory-startup --python benchmarks/bench_smd.py -- [--objects 200] [--subdivisions 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import addon_utils
+import bmesh
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import import_addon_module  # noqa: E402
+
+
+def build_scene(objects, subdivisions):
+    """Fill an empty scene with UV spheres, each with its own copy of the mesh and two materials."""
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+    bm = bmesh.new()
+    bmesh.ops.create_icosphere(bm, subdivisions=subdivisions, radius=1.0, calc_uvs=True)
+    template = bpy.data.meshes.new("bench_sphere")
+    bm.to_mesh(template)
+    bm.free()
+
+    materials = [bpy.data.materials.new(f"bench_mat_{i}") for i in range(2)]
+    template.materials.append(materials[0])
+    template.materials.append(materials[1])
+    half = len(template.polygons) // 2
+    template.polygons.foreach_set("material_index", [0] * half + [1] * (len(template.polygons) - half))
+
+    scene = bpy.context.scene
+    for i in range(objects):
+        obj = bpy.data.objects.new(f"bench_{i:04d}", template.copy())
+        obj.location = (i % 20 * 3.0, i // 20 * 3.0, 0.0)
+        scene.collection.objects.link(obj)
+
+    return sum(len(obj.data.polygons) for obj in scene.objects)
+
+
+def export_bst(out_dir):
+    import io_scene_valvesource.utils
+
+    scene = bpy.context.scene
+    scene.vs.export_path = out_dir
+    scene.vs.export_format = "SMD"
+    for obj in scene.objects:
+        obj.select_set(True)
+    io_scene_valvesource.utils.State.update_scene(scene)
+    bpy.ops.export_scene.smd(export_scene=True)
+
+
+def export_native(out_dir):
+    smd = import_addon_module('core.smd')
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    for obj in bpy.context.scene.objects:
+        smd.write_object_smd(os.path.join(out_dir, obj.name + ".smd"), obj, depsgraph)
+
+
+def export_single_pass(out_dir):
+    lod = import_addon_module('core.lod')
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    for obj in bpy.context.scene.objects:
+        lod.export_model_smds(obj, None, depsgraph, out_dir, (0.5, 0.25), 0.2, 1.0)
+
+
+def folder_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / (1024 * 1024)
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--objects', type=int, default=200)
+    parser.add_argument('--subdivisions', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    faces = build_scene(args.objects, args.subdivisions)
+    print(f"[bench] {args.objects} objects, {faces} triangles")
+
+    exporters = [('native', export_native), ('1-pass', export_single_pass)]
+    if addon_utils.enable("io_scene_valvesource", default_set=False):
+        exporters.insert(0, ('bst', export_bst))
+    else:
+        print("[bench] Blender Source Tools not installed, timing the native writer only")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, export in exporters:
+            out_dir = os.path.join(tmp, label)
+            os.makedirs(out_dir)
+            start = time.perf_counter()
+            export(out_dir)
+            elapsed = time.perf_counter() - start
+            print(f"[bench] {label:<7} {elapsed:8.2f}s  {faces / elapsed:10.0f} tris/s  {folder_size(out_dir):8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
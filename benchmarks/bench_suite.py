@@ -0,0 +1,192 @@
+"""Time the add-on's pipelines on a synthetic scene and store the results as JSON.
+
+Runs inside Blender, with the add-on's dependencies installed (Blender Source Tools, srctools...).
+studiomdl and CoACD are replaced by benchmarks/stand_in.py, so no Source SDK is needed:
+
+    blender -b --factory-startup --python benchmarks/bench_suite.py -- \\
+        [--materials 20] [--texture-size 1024] [--meshes 200] [--polygons 2000] [--duplicates 0.3] \\
+        [--repeat 3] [--cases textures obb ...] [--output results.json] [--compare baseline.json]
+
+Every case runs on a freshly built scene with empty output folders, so no cache is warm.
+Compare two result files later with: python benchmarks/results.py baseline.json results.json
+"""
+import argparse
+import datetime
+import io
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import bpy
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import results  # noqa: E402
+import synthetic  # noqa: E402
+from _common import ADDON_DIR, enable_addon, import_addon_module  # noqa: E402
+
+
+def select_meshes(objects):
+    for obj in bpy.context.view_layer.objects:
+        obj.select_set(False)
+    for obj in objects:
+        obj.select_set(True)
+    bpy.context.view_layer.objects.active = objects[0]
+
+
+def case_pil_to_vtf(bench):
+    """Base color sets through PILToVTF and srctools' DXT1 encoder, without the rest of create_texture."""
+    utils = import_addon_module('utils')
+    from srctools.vtf import ImageFormats
+
+    mip_filter = bench.prefs.mip_filter if bench.prefs.mip_filter != 'NONE' else None
+    for name, paths in bench.texture_sets:
+        vtf = utils.PILToVTF(Image.open(paths["BC"]).convert("RGBA"), ImageFormats.DXT1, mip_filter=mip_filter)
+        vtf.save(io.BytesIO())
+    return len(bench.texture_sets)
+
+
+def case_textures(bench):
+    """UE Textures -> Source: texture detection, create_texture jobs, VTF and VMT files."""
+    bpy.ops.uts.ue_texture_export('EXEC_DEFAULT')
+    return len(bench.materials)
+
+
+def case_nocull(bench):
+    material = import_addon_module('core.material')
+    material.detect_nocull_materials()
+    return len(bench.objects)
+
+
+def case_obb(bench):
+    select_meshes(bench.objects)
+    bpy.ops.uts.create_oob('EXEC_DEFAULT', use_selection=True)
+    return len(bench.objects)
+
+
+def case_vmf(bench):
+    vmf = import_addon_module('core.vmf')
+    vmfwriter = import_addon_module('core.vmfwriter')
+    with vmfwriter.VmfWriter(os.path.join(bench.prefs.temp_path, "bench.vmf")) as writer:
+        for obj in bench.objects:
+            writer.write_prop(vmf.prop_record(obj, vmf.model_path(obj.name)))
+    return len(bench.objects)
+
+
+def case_collisions(bench):
+    """Create Collisions on the first --collision-meshes props, with the stand-in CoACD."""
+    objects = bench.objects[:bench.args.collision_meshes]
+    select_meshes(objects)
+    bpy.ops.uts.create_collisions('EXEC_DEFAULT')
+    return len(objects)
+
+
+def case_export_chain(bench):
+    """Whole export chain: preparation, materials, SMDs, QCs, stand-in studiomdl and the VMF."""
+    bpy.ops.uts.export_chain('EXEC_DEFAULT', export_mode='ALL', prepare_forexport=True,
+                             export_materials=True, export_models=True, output_vmf=True, resume=False)
+    return len(bench.objects)
+
+
+CASES = {
+    "pil_to_vtf": case_pil_to_vtf,
+    "textures": case_textures,
+    "nocull": case_nocull,
+    "obb": case_obb,
+    "vmf": case_vmf,
+    "collisions": case_collisions,
+    "export_chain": case_export_chain,
+}
+
+
+class Bench:
+    """Scene and settings handed to a case."""
+
+    def __init__(self, args, prefs, texture_sets, root):
+        synthetic.clear_data()
+        synthetic.configure_prefs(prefs, root, os.path.join(os.path.dirname(root), "tools"))
+        self.args = args
+        self.prefs = prefs
+        self.texture_sets = texture_sets
+        self.materials = synthetic.build_materials(texture_sets)
+        self.objects = synthetic.build_meshes(args.meshes, args.polygons, args.duplicates, self.materials,
+                                              seed=args.seed)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ADDON_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--materials', type=int, default=20)
+    parser.add_argument('--texture-size', type=int, default=1024)
+    parser.add_argument('--meshes', type=int, default=200)
+    parser.add_argument('--polygons', type=int, default=2000, help="quads per unique mesh")
+    parser.add_argument('--duplicates', type=float, default=0.3, help="share of meshes copying another's geometry")
+    parser.add_argument('--collision-meshes', type=int, default=20)
+    parser.add_argument('--studiomdl-delay', type=float, default=0.0, help="seconds per stand-in studiomdl run")
+    parser.add_argument('--coacd-delay', type=float, default=0.0, help="seconds per stand-in CoACD run")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--output', default=None, help="results JSON (default: bench_<date>.json here)")
+    parser.add_argument('--compare', default=None, help="baseline results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    os.environ["UTS_BENCH_STUDIOMDL_DELAY"] = str(args.studiomdl_delay)
+    os.environ["UTS_BENCH_COACD_DELAY"] = str(args.coacd_delay)
+    prefs = enable_addon()
+
+    created = datetime.datetime.now().isoformat(timespec="seconds")
+    output = args.output or f"bench_{created.replace(':', '-')}.json"
+    case_results = {}
+
+    with tempfile.TemporaryDirectory(prefix="uts_bench_") as tmp:
+        texture_sets = synthetic.write_textures(os.path.join(tmp, "textures"), args.materials, args.texture_size,
+                                                seed=args.seed)
+        print(f"[bench] {args.materials} texture sets at {args.texture_size}px, {args.meshes} meshes of "
+              f"{args.polygons} quads ({args.duplicates:.0%} duplicates)")
+
+        for case in args.cases:
+            runs = []
+            for run in range(args.repeat):
+                bench = Bench(args, prefs, texture_sets, os.path.join(tmp, f"{case}_{run}"))
+                start = time.perf_counter()
+                items = CASES[case](bench)
+                runs.append(time.perf_counter() - start)
+
+            case_results[case] = results.case_result(runs, items)
+            median = case_results[case]["median"]
+            print(f"[bench] {case:<14} {median:8.3f}s median of {args.repeat}  "
+                  f"{median * 1000 / max(items, 1):8.2f} ms/item")
+
+    meta = {
+        "created": created,
+        "commit": git_commit(),
+        "blender": bpy.app.version_string,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": vars(args),
+    }
+    results.save_results(output, meta, case_results)
+    print(f"[bench] Results written to {output}")
+
+    if args.compare:
+        baseline = results.load_results(args.compare)
+        lines, regressions = results.compare(baseline, {"meta": meta, "results": case_results})
+        print("\n".join(lines))
+        print(f"[bench] {len(regressions)} cases slower than {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
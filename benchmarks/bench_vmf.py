@@ -0,0 +1,68 @@
+"""Compare VMF generation with vmflib object graphs and with the streaming core.vmfwriter.
+
+    python benchmarks/bench_vmf.py [--counts 10000 100000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from _common import import_addon_module
+
+
+def placements(count, models=500):
+    """Synthetic prop placements spread over a 20 km square."""
+    rng = random.Random(count)
+    for _ in range(count):
+        yield (rng.uniform(-10000, 10000), rng.uniform(-10000, 10000), rng.uniform(0, 200),
+               f"0 {rng.uniform(0, 360):.3f} 0", f"models/bench/prop_{rng.randrange(models)}.mdl")
+
+
+def write_vmflib(path, count):
+    from vmflib import vmf
+    from vmflib.types import Origin
+
+    m = vmf.ValveMap()
+    for x, y, z, angles, model in placements(count):
+        prop = vmf.Entity('prop_static')
+        prop.origin = Origin(x, y, z)
+        prop.properties['angles'] = angles
+        prop.properties['model'] = model
+    m.write_vmf(path)
+
+
+def write_streaming(path, count):
+    vmfwriter = import_addon_module('core.vmfwriter')
+    with vmfwriter.VmfWriter(path) as writer:
+        for placement in placements(count):
+            writer.write_prop(vmfwriter.PropRecord(*placement))
+
+
+def measure(func, path, count):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(path, count)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024), os.path.getsize(path) / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--counts', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'entities':>9} {'writer':<10} {'time (s)':>9} {'peak (MB)':>10} {'file (MB)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.counts:
+            for label, func in (('vmflib', write_vmflib), ('streaming', write_streaming)):
+                path = os.path.join(tmp, f"{label}_{count}.vmf")
+                elapsed, peak, size = measure(func, path, count)
+                print(f"{count:>9} {label:<10} {elapsed:>9.2f} {peak:>10.1f} {size:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
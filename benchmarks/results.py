@@ -0,0 +1,83 @@
+"""Store benchmark suite results as JSON and compare two runs.
+
+    python benchmarks/results.py baseline.json candidate.json [--threshold 0.1]
+
+Exits with status 1 when a case got slower than the threshold, so it can gate a build.
+"""
+import argparse
+import json
+import statistics
+import sys
+
+
+def case_result(runs, items):
+    """Summary of one case: every run's wall time, their median and minimum, and items per run."""
+    return {
+        "runs": [round(t, 4) for t in runs],
+        "median": round(statistics.median(runs), 4),
+        "min": round(min(runs), 4),
+        "items": items,
+    }
+
+
+def save_results(path, meta, results):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(baseline, candidate, threshold=0.1):
+    """Table of median times per case. Returns (lines, names of the cases that regressed)."""
+    lines = []
+    base_params = baseline["meta"].get("params", {})
+    params = candidate["meta"].get("params", {})
+    for key in sorted(set(base_params) | set(params)):
+        if key not in ("output", "compare", "cases") and base_params.get(key) != params.get(key):
+            lines.append(f"warning: {key} differs ({base_params.get(key)} -> {params.get(key)}), "
+                         f"times are not comparable")
+
+    lines.append(f"{'case':<18} {'baseline (s)':>12} {'candidate (s)':>13} {'change':>8}")
+    regressions = []
+    for case in sorted(set(baseline["results"]) | set(candidate["results"])):
+        old = baseline["results"].get(case)
+        new = candidate["results"].get(case)
+        if old is None or new is None:
+            old_time = f"{old['median']:.3f}" if old else "-"
+            new_time = f"{new['median']:.3f}" if new else "-"
+            lines.append(f"{case:<18} {old_time:>12} {new_time:>13}")
+            continue
+
+        change = (new["median"] - old["median"]) / max(old["median"], 1e-9)
+        flag = ""
+        if change > threshold:
+            flag = "  SLOWER"
+            regressions.append(case)
+        elif change < -threshold:
+            flag = "  faster"
+        lines.append(f"{case:<18} {old['median']:>12.3f} {new['median']:>13.3f} {change:>+8.1%}{flag}")
+
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.1, help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    baseline, candidate = load_results(args.baseline), load_results(args.candidate)
+    print(f"baseline:  {baseline['meta'].get('commit')} ({baseline['meta'].get('created')})")
+    print(f"candidate: {candidate['meta'].get('commit')} ({candidate['meta'].get('created')})")
+
+    lines, regressions = compare(baseline, candidate, args.threshold)
+    print("\n".join(lines))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Stand-in studiomdl and CoACD executables for the benchmark suite.
+
+They accept the add-on's command lines and write plausible outputs, after an optional
+delay, so the export chain and Create Collisions run end to end without the real tools:
+
+    python stand_in.py studiomdl -game <garrysmod dir> -nop4 -quiet <model.qc>
+    python stand_in.py coacd -i <mesh.obj> -o <hulls.obj> [other CoACD options]
+
+Delays (seconds) come from UTS_BENCH_STUDIOMDL_DELAY and UTS_BENCH_COACD_DELAY.
+"""
+import os
+import re
+import sys
+import time
+
+
+def delay(variable):
+    time.sleep(float(os.environ.get(variable, "0") or 0))
+
+
+def studiomdl(args):
+    """Read the QC and the SMDs it names, then write the .mdl/.vvd/.dx90.vtx(/.phy) files."""
+    game = args[args.index("-game") + 1]
+    qc_path = args[-1]
+    with open(qc_path) as f:
+        qc = f.read()
+
+    smd_dir = os.path.dirname(qc_path)
+    read = 0
+    for smd in set(re.findall(r'"([^"]+\.smd)"', qc)):
+        # The add-on joins its paths with backslashes, which are plain characters outside Windows
+        for candidate in (os.path.join(smd_dir, smd), qc_path.rsplit("\\", 1)[0] + "\\" + smd):
+            if os.path.isfile(candidate):
+                with open(candidate, "rb") as f:
+                    read += len(f.read())
+                break
+
+    delay("UTS_BENCH_STUDIOMDL_DELAY")
+
+    model = re.search(r'\$modelname\s+"([^"]+)\.mdl"', qc).group(1)
+    base = os.path.join(game, "models", *model.split("/"))
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    extensions = [".mdl", ".vvd", ".dx90.vtx"] + ([".phy"] if "$collisionmodel" in qc else [])
+    for extension in extensions:
+        with open(base + extension, "wb") as f:
+            f.write(b"UTS stand-in\0" + read.to_bytes(8, "little"))
+
+    print(f"Stand-in studiomdl: {model}.mdl ({read} bytes of SMD)")
+    return 0
+
+
+def coacd(args):
+    """Write the bounding box of the input mesh as a single convex hull."""
+    source = args[args.index("-i") + 1]
+    target = args[args.index("-o") + 1]
+
+    low, high = [float("inf")] * 3, [float("-inf")] * 3
+    with open(source) as f:
+        for line in f:
+            if line.startswith("v "):
+                point = [float(value) for value in line.split()[1:4]]
+                low = [min(a, b) for a, b in zip(low, point)]
+                high = [max(a, b) for a, b in zip(high, point)]
+
+    if low[0] == float("inf"):
+        print("Stand-in CoACD: empty mesh")
+        return 1
+
+    delay("UTS_BENCH_COACD_DELAY")
+
+    corners = [(x, y, z) for x in (low[0], high[0]) for y in (low[1], high[1]) for z in (low[2], high[2])]
+    # Corner i is (x, y, z) bits (i - 1) >> 2, >> 1, & 1; faces wound outward
+    faces = [(1, 2, 4, 3), (5, 7, 8, 6), (1, 5, 6, 2), (3, 4, 8, 7), (1, 3, 7, 5), (2, 6, 8, 4)]
+    with open(target, "w") as f:
+        f.write("o convex_0\n")
+        for corner in corners:
+            f.write("v %.6f %.6f %.6f\n" % corner)
+        for face in faces:
+            f.write("f %d %d %d %d\n" % face)
+
+    print(f"Stand-in CoACD: 1 hull for {os.path.basename(source)}")
+    return 0
+
+
+if __name__ == "__main__":
+    tools = {"studiomdl": studiomdl, "coacd": coacd}
+    sys.exit(tools[sys.argv[1]](sys.argv[2:]))
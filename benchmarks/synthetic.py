@@ -0,0 +1,182 @@
+"""Synthetic workloads for the benchmark suite: UE-style materials and textures, prop meshes.
+
+Runs inside Blender. Every generator is seeded, so the same arguments give the same scene.
+"""
+import math
+import os
+import stat
+import sys
+
+import bmesh
+import bpy
+import numpy as np
+from PIL import Image
+
+
+STAND_IN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stand_in.py")
+
+
+def clear_data():
+    """Remove every object, mesh, material, image and collection, keeping add-ons and preferences."""
+    for scene in list(bpy.data.scenes):
+        if scene != bpy.context.scene:
+            bpy.data.scenes.remove(scene)
+
+    ids = (list(bpy.data.objects) + list(bpy.data.meshes) + list(bpy.data.materials)
+           + list(bpy.data.images) + list(bpy.data.collections))
+    if ids:
+        bpy.data.batch_remove(ids)
+
+
+def write_textures(directory, count, size, seed=0):
+    """Write count UE-style texture sets (T_<Name>_BC, T_<Name>_N, T_<Name>_ORM). Returns [(name, paths)].
+
+    Sets already in directory are reused.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size] / size
+    sets = []
+
+    for index in range(count):
+        name = f"Bench_{index:04d}"
+        paths = {suffix: os.path.join(directory, f"T_{name}_{suffix}.png") for suffix in ("BC", "N", "ORM")}
+        tint = rng.uniform(0.2, 1.0, 3)
+        noise = rng.random((size, size))
+
+        if not all(os.path.isfile(path) for path in paths.values()):
+            # Base color: tinted gradient with noise, so block compression has real work to do
+            base = (np.stack([xx, yy, 1 - xx], axis=2) * 0.6 + noise[:, :, None] * 0.4) * tint
+            Image.fromarray((base * 255).astype(np.uint8)).save(paths["BC"])
+
+            # Normal map: bumps from the noise, encoded around (0.5, 0.5, 1)
+            dx, dy = np.gradient(noise)
+            normal = np.stack([-dx, -dy, np.ones_like(dx)], axis=2)
+            normal /= np.linalg.norm(normal, axis=2, keepdims=True)
+            Image.fromarray(((normal * 0.5 + 0.5) * 255).astype(np.uint8)).save(paths["N"])
+
+            # Packed occlusion / roughness / metallic
+            orm = np.stack([1 - noise * 0.3, 0.4 + noise * 0.5, (xx > 0.5) * 1.0], axis=2)
+            Image.fromarray((orm * 255).astype(np.uint8)).save(paths["ORM"])
+
+        sets.append((name, paths))
+
+    return sets
+
+
+def build_material(name, paths):
+    """Principled material wired like an Unreal import: BC to Base Color, N through a Normal Map
+    node, ORM through Separate Color into roughness and metallic."""
+    material = bpy.data.materials.new(f"M_{name}")
+    material.use_nodes = True
+    nodes, links = material.node_tree.nodes, material.node_tree.links
+    bsdf = nodes.get("Principled BSDF")
+
+    def image_node(suffix, non_color):
+        node = nodes.new("ShaderNodeTexImage")
+        node.image = bpy.data.images.load(paths[suffix], check_existing=True)
+        if non_color:
+            node.image.colorspace_settings.name = "Non-Color"
+        return node
+
+    links.new(image_node("BC", False).outputs["Color"], bsdf.inputs["Base Color"])
+
+    normal_map = nodes.new("ShaderNodeNormalMap")
+    links.new(image_node("N", True).outputs["Color"], normal_map.inputs["Color"])
+    links.new(normal_map.outputs["Normal"], bsdf.inputs["Normal"])
+
+    separate = nodes.new("ShaderNodeSeparateColor")
+    links.new(image_node("ORM", True).outputs["Color"], separate.inputs["Color"])
+    links.new(separate.outputs["Green"], bsdf.inputs["Roughness"])
+    links.new(separate.outputs["Blue"], bsdf.inputs["Metallic"])
+
+    return material
+
+
+def build_materials(texture_sets):
+    return [build_material(name, paths) for name, paths in texture_sets]
+
+
+def _grid_mesh(name, polygons, rng):
+    """A bumpy square grid of about polygons quads, unique to rng's state."""
+    segments = max(1, round(math.sqrt(polygons)))
+    bm = bmesh.new()
+    bmesh.ops.create_grid(bm, x_segments=segments + 1, y_segments=segments + 1, size=1.0, calc_uvs=True)
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    coords = coords.reshape(-1, 3)
+    amplitude, frequency = rng.uniform(0, 0.3), rng.uniform(2, 8)
+    coords[:, 2] = amplitude * np.sin(coords[:, 0] * frequency) + rng.normal(0, 0.01, len(coords))
+    mesh.vertices.foreach_set("co", coords.ravel())
+    mesh.update()
+    return mesh
+
+
+def build_meshes(count, polygons, duplicate_ratio, materials, seed=0):
+    """Link count SM_ objects into the scene. A duplicate_ratio share of them are copies of
+    another prop's geometry under their own name (SM_Bench_0003_2), so they become instances.
+
+    Each mesh uses two materials, half of its faces each. Returns the objects.
+    """
+    rng = np.random.default_rng(seed)
+    unique = max(1, round(count * (1 - duplicate_ratio)))
+    scene = bpy.context.scene
+    templates = []
+    objects = []
+
+    for index in range(count):
+        if index < unique:
+            mesh = _grid_mesh(f"SM_Bench_{index:04d}", polygons, rng)
+            if materials:
+                mesh.materials.append(materials[index % len(materials)])
+                mesh.materials.append(materials[(index * 7 + 3) % len(materials)])
+                half = len(mesh.polygons) // 2
+                mesh.polygons.foreach_set("material_index", [0] * half + [1] * (len(mesh.polygons) - half))
+            templates.append(mesh)
+            name = mesh.name
+        else:
+            source = templates[int(rng.integers(len(templates)))]
+            mesh = source.copy()
+            name = f"{source.name}_{index}"
+
+        obj = bpy.data.objects.new(name, mesh)
+        obj.location = (index % 50 * 4.0, index // 50 * 4.0, 0.0)
+        obj.rotation_euler = (0.0, 0.0, float(rng.uniform(0, 2 * math.pi)))
+        scene.collection.objects.link(obj)
+        objects.append(obj)
+
+    return objects
+
+
+def stand_in_executable(tool, directory):
+    """Write a launcher running stand_in.py as tool (studiomdl or coacd) with Blender's Python."""
+    os.makedirs(directory, exist_ok=True)
+    if sys.platform == "win32":
+        path = os.path.join(directory, f"{tool}.cmd")
+        with open(path, "w") as f:
+            f.write(f'@"{sys.executable}" "{STAND_IN}" {tool} %*\n')
+    else:
+        path = os.path.join(directory, tool)
+        with open(path, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{STAND_IN}" {tool} "$@"\n')
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def configure_prefs(prefs, root, tools_dir):
+    """Point every path of the add-on preferences into root, with stand-in tools."""
+    for sub in ("garrysmod", "export", "models"):
+        os.makedirs(os.path.join(root, sub), exist_ok=True)
+
+    prefs.gmod_path = root + os.sep
+    prefs.subgmod_path = os.path.join(root, "garrysmod") + os.sep
+    prefs.temp_path = os.path.join(root, "export") + os.sep
+    prefs.temp_path_models = os.path.join(root, "models") + os.sep
+    prefs.studiomdl_path = stand_in_executable("studiomdl", tools_dir)
+    prefs.coacd_path = stand_in_executable("coacd", tools_dir)
+    prefs.material_prefix = "bench"
+    prefs.model_prefix = "bench"
@@ -0,0 +1,99 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+
+
+# has_alpha: the image carries an alpha channel at all
+# translucent: at least one pixel is below the threshold
+# coverage: fraction of pixels below the threshold
+# partial: fraction of those that are neither fully transparent nor opaque (soft edges, glass)
+AlphaInfo = namedtuple("AlphaInfo", "has_alpha translucent coverage partial")
+
+OPAQUE = AlphaInfo(False, False, 0.0, 0.0)
+
+# Below this coverage the alpha is treated as noise (stray pixels, compression artifacts)
+MIN_COVERAGE = 0.002
+# Above this share of soft pixels, blending ($translucent) is needed instead of a cutout ($alphatest)
+MIN_PARTIAL = 0.25
+
+# Keyed by content digest, so entries never go stale and are kept for the whole session
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def _has_alpha_band(img):
+    return 'A' in img.getbands() or (img.mode == 'P' and 'transparency' in img.info)
+
+
+def _scan(alpha, threshold, tile_rows):
+    """Scan the alpha plane in row bands and stop at the first band holding a translucent pixel.
+
+    Returns the first row of that band, or None if every pixel is at or above the threshold.
+    """
+    for top in range(0, alpha.shape[0], tile_rows):
+        if (alpha[top:top + tile_rows] < threshold).any():
+            return top
+    return None
+
+
+def _count(alpha, threshold, tile_rows, start):
+    """Count the pixels below the threshold, and the partial ones among them, from row start on.
+
+    Every pixel is counted, so thin soft edges and one-pixel cutouts are not missed; working
+    band by band keeps the boolean temporaries to tile_rows rows.
+    """
+    below = partial = 0
+    for top in range(start, alpha.shape[0], tile_rows):
+        band = alpha[top:top + tile_rows]
+        mask = band < threshold
+        below += int(np.count_nonzero(mask))
+        partial += int(np.count_nonzero(mask & (band > 255 - threshold)))
+    return below, partial
+
+
+def analyze_alpha(path, digest=None, img=None, threshold=250, tile_rows=256):
+    """Analyze the alpha channel of an image file, memoized per (path, content digest).
+
+    Images without alpha are answered from the file header alone. Otherwise only the alpha
+    band is extracted and scanned tile by tile, stopping at the first translucent tile;
+    coverage and partial are then counted over every pixel from that tile on. img may be an already
+    decoded PIL image of path, to avoid decoding it again. Thread-safe.
+    """
+    key = (path, digest)
+    if digest is not None:
+        with _memo_lock:
+            if key in _memo:
+                return _memo[key]
+
+    if img is None:
+        img = Image.open(path)
+
+    if not _has_alpha_band(img):
+        info = OPAQUE
+    else:
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        alpha = np.asarray(img.getchannel('A'))
+
+        start = _scan(alpha, threshold, tile_rows)
+        if start is None:
+            info = AlphaInfo(True, False, 0.0, 0.0)
+        else:
+            count, partial = _count(alpha, threshold, tile_rows, start)
+            info = AlphaInfo(True, True, count / alpha.size, partial / count)
+
+    if digest is not None:
+        with _memo_lock:
+            _memo[key] = info
+    return info
+
+
+def alpha_mode(info):
+    """Choose how a texture's alpha is rendered: "opaque", "alphatest" or "translucent"."""
+    if not info.translucent or info.coverage < MIN_COVERAGE:
+        return "opaque"
+    if info.partial < MIN_PARTIAL:
+        return "alphatest"
+    return "translucent"
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Return the SHA-1 hex digest of a file's content."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(*parts):
+    """Hash JSON-serializable parts into a stable hex key."""
+    data = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+class Manifest:
+    """On-disk JSON record of build fingerprints, persisted between export runs.
+
+    Source content digests are memoized by (size, mtime), so unchanged files are not re-read.
+    Safe to share between worker threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.sources = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+            self.sources = data.get("sources", {})
+        except (OSError, ValueError) as e:
+            if os.path.exists(self.path):
+                print(f"[UTS] Ignoring unreadable cache manifest {self.path}: {e}")
+            self.entries = {}
+            self.sources = {}
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"entries": self.entries, "sources": self.sources}, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def digest(self, path):
+        """Content digest of a source file, reusing the stored one if size and mtime match."""
+        path = os.path.normpath(os.path.abspath(path))
+        st = os.stat(path)
+        known = self.sources.get(path)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+
+        digest = file_digest(path)
+        with self._lock:
+            self.sources[path] = [st.st_size, st.st_mtime_ns, digest]
+            self.dirty = True
+        return digest
+
+    def is_fresh(self, name, key):
+        """True if name was last built with this key and all of its outputs still exist."""
+        entry = self.entries.get(name)
+        if not entry or entry.get("key") != key:
+            return False
+        return all(os.path.isfile(p) for p in entry.get("outputs", []))
+
+    def record(self, name, key, outputs, **extra):
+        with self._lock:
+            self.entries[name] = dict(extra, key=key, outputs=list(outputs))
+            self.dirty = True
+
+    def forget(self, name):
+        with self._lock:
+            if self.entries.pop(name, None) is not None:
+                self.dirty = True
+
+
+class FileCache:
+    """Directory of files keyed by fingerprint, trimmed to a size cap by least-recent use."""
+
+    def __init__(self, directory, max_bytes, ext=""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ext = ext
+        self.index_path = os.path.join(directory, "index.json")
+        try:
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.ext)
+
+    def get(self, key):
+        """Return the cached file for key and mark it as recently used, or None."""
+        path = self.path(key)
+        if key in self.index and os.path.isfile(path):
+            self.index[key]["last_used"] = time.time()
+            return path
+        self.index.pop(key, None)
+        return None
+
+    def put(self, key, src):
+        """Copy src into the cache under key and return the cached path."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        shutil.copyfile(src, path)
+        self.index[key] = {"size": os.path.getsize(path), "last_used": time.time()}
+        return path
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        total = sum(entry["size"] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self.index.pop(key)["size"]
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+
+    def save(self):
+        self.evict()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.index_path, "w") as f:
+            json.dump(self.index, f)
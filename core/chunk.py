@@ -0,0 +1,138 @@
+import ctypes
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from .trace import add_span
+
+
+# Working set of one exported triangle: evaluated mesh, NumPy corner arrays, LOD candidates
+# and formatted SMD text, plus Blender's own per-object overhead
+BYTES_PER_TRIANGLE = 1024
+BYTES_PER_OBJECT = 64 * 1024
+
+# names: object and its collision object; group: objects sharing a group stay in one chunk
+ChunkItem = namedtuple("ChunkItem", ["names", "triangles", "group"])
+Chunk = namedtuple("Chunk", ["names", "triangles", "memory"])
+
+
+def estimate_memory(triangles, objects):
+    return triangles * BYTES_PER_TRIANGLE + objects * BYTES_PER_OBJECT
+
+
+def plan_chunks(items, triangle_budget, memory_budget):
+    """Pack items into chunks that fit both budgets, keeping each group together.
+
+    Groups are placed in the order they first appear. A group larger than a budget gets a
+    chunk of its own. A budget of 0 disables that limit.
+    """
+    groups = {}
+    for item in items:
+        groups.setdefault(item.group, []).append(item)
+
+    chunks = []
+    names, triangles, memory = [], 0, 0
+
+    for members in groups.values():
+        group_triangles = sum(item.triangles for item in members)
+        group_memory = estimate_memory(group_triangles, sum(len(item.names) for item in members))
+
+        too_many_triangles = triangle_budget and triangles + group_triangles > triangle_budget
+        too_much_memory = memory_budget and memory + group_memory > memory_budget
+        if names and (too_many_triangles or too_much_memory):
+            chunks.append(Chunk(names, triangles, memory))
+            names, triangles, memory = [], 0, 0
+
+        for item in members:
+            names.extend(item.names)
+        triangles += group_triangles
+        memory += group_memory
+
+    if names:
+        chunks.append(Chunk(names, triangles, memory))
+
+    return chunks
+
+
+def current_rss():
+    """Resident memory of this process in bytes, or 0 if it cannot be read."""
+    if sys.platform == "win32":
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        get_process = ctypes.windll.kernel32.GetCurrentProcess
+        get_process.restype = ctypes.c_void_p
+        get_info = ctypes.windll.psapi.GetProcessMemoryInfo
+        get_info.argtypes = [ctypes.c_void_p, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), ctypes.c_ulong]
+        if get_info(get_process(), ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return 0
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class ChunkMonitor:
+    """Wall time and sampled peak resident memory of each chunk of the export.
+
+    start() opens a chunk and closes the previous one, so it can sit at the top of a loop
+    whose body uses continue. A daemon thread samples memory every interval seconds.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.rows = []
+        self._current = None
+        self._peak = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="uts-chunk-monitor", daemon=True)
+        self._thread.start()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss()
+            with self._lock:
+                self._peak = max(self._peak, rss)
+
+    def start(self, index, chunk):
+        self._finish()
+        with self._lock:
+            self._peak = current_rss()
+        self._current = (index, chunk, time.perf_counter())
+
+    def _finish(self):
+        if self._current is None:
+            return
+        index, chunk, started = self._current
+        with self._lock:
+            peak = max(self._peak, current_rss())
+        ended = time.perf_counter()
+        self.rows.append((index, len(chunk.names), chunk.triangles, chunk.memory, peak, ended - started))
+        add_span("chunk", started, ended, "smd", chunk=index + 1, objects=len(chunk.names),
+                 triangles=chunk.triangles, peak_rss_mb=peak // (1024 * 1024))
+        self._current = None
+
+    def stop(self):
+        self._finish()
+        self._stop.set()
+        self._thread.join()
+
+    def report(self):
+        """Per-chunk lines: objects, triangles, estimated and measured peak memory, wall time."""
+        mb = 1024 * 1024
+        lines = ["Chunk\tObjects\tTriangles\tEstimated (MB)\tPeak RSS (MB)\tTime (s)"]
+        for index, objects, triangles, memory, peak, elapsed in self.rows:
+            lines.append(f"{index + 1}\t{objects}\t{triangles}\t{memory / mb:.0f}\t{peak / mb:.0f}\t{elapsed:.2f}")
+        return lines
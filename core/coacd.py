@@ -0,0 +1,88 @@
+import hashlib
+import os
+import subprocess
+import time
+from collections import namedtuple
+
+from .cache import FileCache, fingerprint
+from .helpers import get_prefs
+from .pool import MemoryBudget, run_ordered
+from .trace import span
+
+
+CoacdJob = namedtuple("CoacdJob", "name obj_filename out params")
+CoacdResult = namedtuple("CoacdResult", "name returncode elapsed output")
+
+# Rough CoACD working set: fixed overhead plus a multiple of the input OBJ size.
+_BASE_MEMORY_MB = 128
+_MEMORY_PER_OBJ_MB = 40
+
+
+def coacd_command(coacd_path, job):
+    """Build the coacd.exe command line for a job."""
+    params = job.params
+    return [coacd_path,
+            "-i", job.obj_filename,
+            "-o", job.out,
+            "-t", str(params.get("threshold", 0.03)),
+            "-pr", str(params["prep_resolution"]),
+            "-mi", str(params["mcts_iteration"]),
+            "-md", str(params["mcts_depth"]),
+            "-c", str(params["convex_hull"]),
+            "-mn", "30",
+            "-d",
+            "--max-ch-vertex", "128"]
+
+
+def geometry_key(coords, triangles, params):
+    """Cache key of a decomposition: hash of the vertex/index buffers plus the CoACD parameters.
+
+    Meshes are hashed in local space, so duplicates under different object names share an entry.
+    """
+    h = hashlib.sha1()
+    h.update(coords.tobytes())
+    h.update(triangles.tobytes())
+    return fingerprint(h.hexdigest(), params)
+
+
+def get_coacd_cache():
+    """Return the LRU cache of decomposition results, stored under temp_path."""
+    prefs = get_prefs()
+    return FileCache(os.path.join(prefs.temp_path, "coacd_cache"), prefs.coacd_cache_size * 1024 * 1024, ".obj")
+
+
+def estimate_memory_mb(obj_filename):
+    """Estimate the peak memory of a decomposition from the size of its input OBJ."""
+    try:
+        size_mb = os.path.getsize(obj_filename) / (1024 * 1024)
+    except OSError:
+        size_mb = 0
+    return _BASE_MEMORY_MB + size_mb * _MEMORY_PER_OBJ_MB
+
+
+def run_coacd_jobs(coacd_path, jobs, max_workers, memory_budget_mb=0):
+    """Run CoACD decompositions in parallel. Results are returned in job order.
+
+    Each process reserves its estimated memory from memory_budget_mb before it starts,
+    so several large meshes never decompose at the same time.
+    """
+    budget = MemoryBudget(memory_budget_mb)
+    done = [0]
+
+    def run(job):
+        cmd = coacd_command(coacd_path, job)
+        with budget.reserve(estimate_memory_mb(job.obj_filename)), span("coacd", "coacd", object=job.name):
+            start = time.perf_counter()
+            try:
+                p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+                output, _ = p.communicate()
+                return CoacdResult(job.name, p.returncode, time.perf_counter() - start, output)
+            except Exception as e:
+                return CoacdResult(job.name, None, time.perf_counter() - start, str(e))
+
+    def on_done(index, result):
+        done[0] += 1
+        print(f"[UTS] CoACD {done[0]}/{len(jobs)}: {result.name} "
+              f"(exit {result.returncode}, {result.elapsed:.1f}s)")
+
+    return run_ordered(run, jobs, max_workers, on_done)
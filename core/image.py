@@ -0,0 +1,122 @@
+import os
+import threading
+
+import imageio
+import numpy as np
+from PIL import Image
+
+from .vtf import vtf_size
+
+
+# Bytes kept alive per pixel of the reduced copy and of the VTF-sized buffers: RGBA reduced
+# source, then the resized and RGBA copies encoded by PILToVTF
+_BYTES_PER_REDUCED_PIXEL = 4
+_BYTES_PER_TARGET_PIXEL = 12
+
+# JPEG draft() decodes at 1/2, 1/4 or 1/8 of the full size at most
+_MAX_DRAFT_FACTOR = 8
+
+# Unreal's packed ORM layout: occlusion, roughness, metallic
+ORM_CHANNELS = ("ao", "roughness", "metallic")
+
+_orm_channels = {}
+_orm_lock = threading.Lock()
+
+
+def reduce_factor(size, target):
+    """Largest power of two the source can be box-reduced by while staying at or above target."""
+    factor = 1
+    while size[0] // (factor * 2) >= target[0] and size[1] // (factor * 2) >= target[1]:
+        factor *= 2
+    return factor
+
+
+def estimate_texture_bytes(path):
+    """Estimate the peak working set of one texture from its header, without decoding it.
+
+    Only JPEGs are decoded at a reduced scale; every other format is decoded at full size
+    before it is reduced, so its full-size buffer and the reduced copy are alive together.
+    """
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            bands = len(img.getbands())
+            is_jpeg = img.format == 'JPEG'
+    except Exception:
+        return 0
+
+    target_width, target_height = vtf_size(width, height)
+    factor = reduce_factor((width, height), (target_width, target_height))
+    target_bytes = target_width * target_height * _BYTES_PER_TARGET_PIXEL
+
+    if is_jpeg:
+        draft = min(factor, _MAX_DRAFT_FACTOR)
+        return (width // draft) * (height // draft) * _BYTES_PER_REDUCED_PIXEL + target_bytes
+
+    reduced = (width // factor) * (height // factor) * _BYTES_PER_REDUCED_PIXEL if factor > 1 else 0
+    return width * height * bands + reduced + target_bytes
+
+
+def load_image(path):
+    """Decode an image file once into a PIL image, reduced close to its final VTF size.
+
+    JPEGs are decoded directly at a reduced scale (draft); other formats are box-reduced by a
+    power of two right after decoding, so only the final Lanczos pass in PILToVTF works on
+    a buffer near 2048x2048 instead of an 8K/16K one.
+    """
+    try:
+        img = Image.open(path)
+    except Exception:
+        # Formats PIL cannot read (imageio plugins), decoded at full size
+        return Image.fromarray(imageio.imread(path))
+
+    target = vtf_size(*img.size)
+    if img.format == 'JPEG':
+        img.draft('RGB', target)
+
+    if img.mode in ('I', 'I;16', 'I;16B'):
+        img = Image.fromarray((np.asarray(img, dtype=np.uint32) >> 8).astype(np.uint8))
+    elif img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+
+    factor = reduce_factor(img.size, target)
+    if factor > 1:
+        print(f"[UTS]   Pre-reducing {os.path.basename(path)} by {factor}x from {img.size[0]}x{img.size[1]}")
+        img = img.reduce(factor)
+    else:
+        img.load()
+
+    return img
+
+
+def reset_orm_cache():
+    """Forget the split ORM images. Call at the start of each export run."""
+    with _orm_lock:
+        _orm_channels.clear()
+
+
+def split_orm_image(path):
+    """Split a packed ORM image into its ao (R), roughness (G) and metallic (B) channels.
+
+    The image is decoded once per run and file version (path + mtime); the channels are
+    views into that single pixel buffer, nothing is written to disk. Thread-safe.
+    """
+    path = os.path.normpath(path)
+    key = (path, os.path.getmtime(path))
+
+    with _orm_lock:
+        channels = _orm_channels.get(key)
+    if channels is not None:
+        return channels
+
+    with Image.open(path) as img:
+        pixels = np.asarray(img.convert('RGB'))
+    channels = {name: pixels[:, :, index] for index, name in enumerate(ORM_CHANNELS)}
+
+    with _orm_lock:
+        return _orm_channels.setdefault(key, channels)
+
+
+def get_orm_channel(path, channel):
+    """Return one channel ("ao", "roughness" or "metallic") of a packed ORM image as a 2D uint8 view."""
+    return split_orm_image(path)[channel]
@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+import time
+
+from .cache import file_digest
+
+
+class Journal:
+    """Append-only checkpoint log of completed export units (one JSON object per line).
+
+    Each line records that a stage of a unit (e.g. "model:Chair", "smd") finished, with the
+    size, mtime and digest of every output. Lines are flushed as they are written, so the
+    journal survives a crash of Blender or of an external tool. Safe to share between threads.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.done_units = {}
+        self._lock = threading.Lock()
+
+        if resume:
+            self.load()
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w") as f:
+                f.write(json.dumps({"run": time.time()}) + "\n")
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Last line of a run killed while writing it
+                continue
+            if "unit" in entry:
+                self.done_units[(entry["unit"], entry["stage"])] = entry
+
+        print(f"[UTS] Resuming from {self.path}: {len(self.done_units)} completed steps")
+
+    @staticmethod
+    def _describe(path):
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns, file_digest(path)]
+
+    def record(self, unit, stage, outputs, key=None, data=None):
+        """Mark stage of unit as complete, with its output files and optional JSON data."""
+        entry = {"unit": unit, "stage": stage, "key": key, "data": data,
+                 "outputs": {path: self._describe(path) for path in outputs}}
+        line = json.dumps(entry) + "\n"
+
+        with self._lock:
+            self.done_units[(unit, stage)] = entry
+            with open(self.path, "a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def get_data(self, unit, stage):
+        """Data recorded with stage of unit, or None."""
+        entry = self.done_units.get((unit, stage))
+        return entry.get("data") if entry else None
+
+    def is_done(self, unit, stage, key=None):
+        """True if stage of unit was recorded (with this key) and its outputs are unchanged."""
+        entry = self.done_units.get((unit, stage))
+        if not entry or (key is not None and entry.get("key") != key):
+            return False
+
+        for path, (size, mtime_ns, digest) in entry["outputs"].items():
+            try:
+                st = os.stat(path)
+            except OSError:
+                return False
+            if st.st_size != size:
+                return False
+            if st.st_mtime_ns != mtime_ns and file_digest(path) != digest:
+                return False
+        return True
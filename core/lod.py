@@ -0,0 +1,110 @@
+import math
+
+import bmesh
+import bpy
+
+from .lodplan import plan_lods
+from .model import SOURCE_SCALE
+from .smd import NO_MATERIAL, cluster_decimate, mesh_from_data, mesh_from_object, write_smd
+
+
+# Temporary modifier used to measure decimated triangle counts
+_PROBE_MODIFIER = "uts_lod_probe"
+
+
+def triangle_count(obj, depsgraph):
+    """Triangles of an object's evaluated mesh, without triangulating it."""
+    mesh = obj.evaluated_get(depsgraph).data
+    return len(mesh.loops) - 2 * len(mesh.polygons)
+
+
+def measure_lod_triangles(objects, ratios, context):
+    """Evaluate every object once per ratio with a COLLAPSE decimation. Returns {name: [base, level...]}."""
+    depsgraph = context.evaluated_depsgraph_get()
+    counts = {obj.name: [triangle_count(obj, depsgraph)] for obj in objects}
+
+    probes = []
+    try:
+        for obj in objects:
+            mod = obj.modifiers.new(_PROBE_MODIFIER, 'DECIMATE')
+            mod.decimate_type = 'COLLAPSE'
+            probes.append((obj, mod))
+
+        for ratio in ratios:
+            for obj, mod in probes:
+                mod.ratio = ratio
+            context.view_layer.update()
+            depsgraph = context.evaluated_depsgraph_get()
+            for obj in objects:
+                counts[obj.name].append(triangle_count(obj, depsgraph))
+    finally:
+        for obj, mod in probes:
+            obj.modifiers.remove(mod)
+
+    return counts
+
+
+def plan_model_lods(objects, context, ratios, min_reduction, screen_error):
+    """LOD plan of each mesh object, keyed by object name. Must be called from the main thread."""
+    objects = [obj for obj in objects if obj.type == 'MESH']
+    counts = measure_lod_triangles(objects, ratios, context)
+
+    plans = {}
+    for obj in objects:
+        radius = 0.5 * obj.dimensions.length * SOURCE_SCALE
+        base, *level_triangles = counts[obj.name]
+        plans[obj.name] = plan_lods(radius, base, level_triangles, ratios, min_reduction, screen_error)
+
+    return plans
+
+
+def collision_smd_mesh(obj, depsgraph, angle_limit=math.radians(4), min_polygons=250):
+    """Evaluate a collision object once, limited-dissolve it if dense, and return it smooth-shaded."""
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    bm = bmesh.new()
+    try:
+        bm.from_mesh(mesh)
+    finally:
+        obj_eval.to_mesh_clear()
+
+    if len(bm.faces) > min_polygons:
+        bmesh.ops.dissolve_limit(bm, angle_limit=angle_limit, verts=bm.verts[:], edges=bm.edges[:],
+                                 delimit={'UV'})
+
+    temp = bpy.data.meshes.new("uts_collision_tmp")
+    try:
+        bm.to_mesh(temp)
+        temp.polygons.foreach_set("use_smooth", [True] * len(temp.polygons))
+        names = [slot.material.name if slot.material else NO_MATERIAL for slot in obj.material_slots]
+        return mesh_from_data(temp, obj.matrix_world, names)
+    finally:
+        bm.free()
+        bpy.data.meshes.remove(temp)
+
+
+def export_model_smds(obj, collision, depsgraph, smd_dir, ratios, min_reduction, screen_error):
+    """Write a model's reference, LOD and collision SMDs from a single evaluation of each object.
+
+    LOD candidates are vertex-clustered from the reference arrays and go through the same
+    plan_lods() selection as the modifier-based path. Returns the LOD plan.
+    """
+    reference = mesh_from_object(obj, depsgraph)
+    base = len(reference.material_index)
+    candidates = {}
+    for ratio in ratios:
+        if ratio not in candidates:
+            candidates[ratio] = cluster_decimate(reference, int(base * ratio))
+
+    radius = 0.5 * obj.dimensions.length * SOURCE_SCALE
+    levels = plan_lods(radius, base, [len(candidates[r].material_index) for r in ratios], ratios,
+                       min_reduction, screen_error)
+
+    write_smd(smd_dir + "\\" + obj.name + ".smd", [reference])
+    for level in levels:
+        write_smd(smd_dir + "\\" + obj.name + f"_lod{level.index}.smd", [candidates[level.ratio]])
+
+    if collision is not None:
+        write_smd(smd_dir + "\\" + collision.name + ".smd", [collision_smd_mesh(collision, depsgraph)])
+
+    return levels
@@ -0,0 +1,55 @@
+import math
+from collections import namedtuple
+
+
+# distance: camera distance (Source units, 1080p at 75 degrees) matching threshold, for reports
+LodLevel = namedtuple("LodLevel", ["index", "ratio", "triangles", "threshold", "distance"])
+
+
+def sphere_error(radius, triangles):
+    """Chordal error of a sphere of this radius tessellated into that many equal triangles.
+
+    Each triangle covers 4*pi*r^2 / T, so its edges are about sqrt(4 * area / sqrt(3)) long and
+    sag l^2 / 8r below the surface: 2*pi*r / (sqrt(3) * T), about 3.63 * r / T.
+    """
+    return 2 * math.pi * radius / (math.sqrt(3) * max(triangles, 1))
+
+
+def lod_threshold(error, screen_error):
+    """Source $lod switch metric at which a geometric error (in Source units) covers screen_error pixels.
+
+    Source's LOD metric is 100 / (pixel height of a unit sphere at the prop's distance). The
+    distance at which error units span screen_error pixels therefore gives a metric of
+    100 * error / screen_error, whatever the resolution and field of view.
+    """
+    return max(1, round(100 * error / screen_error))
+
+
+def switch_distance(error, screen_error, fov=75.0, screen_height=1080):
+    """Camera distance (Source units) at which error spans screen_error pixels."""
+    return error * screen_height / (2 * math.tan(math.radians(fov) / 2) * screen_error)
+
+
+def plan_lods(radius, base_triangles, level_triangles, ratios, min_reduction, screen_error):
+    """Keep the LOD levels worth compiling and compute their switch metrics.
+
+    A level is skipped when it removes less than min_reduction of the triangles of the last
+    kept level. Kept levels are renumbered from 1, so they map to _lod1, _lod2... SMDs.
+    """
+    base_error = sphere_error(radius, base_triangles)
+    levels = []
+    previous = base_triangles
+
+    for ratio, triangles in zip(ratios, level_triangles):
+        if triangles > previous * (1 - min_reduction):
+            continue
+
+        error = sphere_error(radius, triangles) - base_error
+        threshold = lod_threshold(error, screen_error)
+        if levels and threshold <= levels[-1].threshold:
+            threshold = levels[-1].threshold + 1
+
+        levels.append(LodLevel(len(levels) + 1, ratio, triangles, threshold, switch_distance(error, screen_error)))
+        previous = triangles
+
+    return levels
@@ -1,37 +1,60 @@
+import time
+
 import bpy
-import bmesh
-from mathutils import Vector
+import numpy as np
+
+
+def _backface_material_indices(mesh):
+    """Material indices of the polygons facing away from the mesh origin."""
+    count = len(mesh.polygons)
+    if count == 0:
+        return set()
+
+    normals = np.empty(count * 3, dtype=np.float32)
+    centers = np.empty(count * 3, dtype=np.float32)
+    material_indices = np.empty(count, dtype=np.int32)
+    mesh.polygons.foreach_get("normal", normals)
+    mesh.polygons.foreach_get("center", centers)
+    mesh.polygons.foreach_get("material_index", material_indices)
+
+    # The view direction from a face toward the origin is -center, so it is back-facing if normal . center > 0
+    facing = np.einsum("ij,ij->i", normals.reshape(-1, 3), centers.reshape(-1, 3))
+    return set(np.unique(material_indices[facing > 0]).tolist())
 
 
 def detect_nocull_materials():
-    """Detect materials with back-facing faces that need $nocull."""
+    """Detect materials with back-facing faces that need $nocull.
+
+    Each mesh datablock is evaluated once, however many objects use it.
+    """
     nocull_materials = set()
+    mesh_results = {}
+    timings = []
+    start = time.perf_counter()
 
     for obj in bpy.context.scene.objects:
-        if obj.type == 'MESH':
-            mesh = obj.data
-            bm = bmesh.new()
-            bm.from_mesh(mesh)
-            bm.normal_update()
-            bm.faces.ensure_lookup_table()
-
-            material_backfaces = {}
-
-            for face in bm.faces:
-                normal = face.normal
-                face_center = face.calc_center_median()
-                view_direction = (Vector((0, 0, 0)) - face_center).normalized()
-
-                if normal.dot(view_direction) < 0:
-                    mat = obj.material_slots[face.material_index].material if face.material_index < len(obj.material_slots) else None
-                    if mat and mat not in material_backfaces:
-                        material_backfaces[mat] = True
-
-            for mat, b in material_backfaces.items():
-                if b:
-                    nocull_materials.add(mat.name)
-
-            bm.free()
+        if obj.type != 'MESH':
+            continue
+
+        obj_start = time.perf_counter()
+        mesh = obj.data
+        indices = mesh_results.get(mesh.name_full)
+        if indices is None:
+            indices = _backface_material_indices(mesh)
+            mesh_results[mesh.name_full] = indices
+
+        # Slots can be linked to the object, so materials are resolved per object
+        slots = obj.material_slots
+        for index in indices:
+            if index < len(slots) and slots[index].material:
+                nocull_materials.add(slots[index].material.name)
+
+        timings.append((time.perf_counter() - obj_start, obj.name))
+
+    print(f"[UTS] $nocull detection: {len(timings)} objects, {len(mesh_results)} unique meshes, "
+          f"{len(nocull_materials)} materials in {time.perf_counter() - start:.2f}s")
+    for elapsed, name in sorted(timings, reverse=True)[:10]:
+        print(f"[UTS]   {name}: {elapsed * 1000:.1f}ms")
 
     return nocull_materials
 
@@ -0,0 +1,101 @@
+import hashlib
+import json
+
+import numpy as np
+
+
+def evaluated_triangles(obj, depsgraph):
+    """Return (coords, triangles) of an object's evaluated mesh, in local space.
+
+    coords is a float32 (N, 3) array, triangles an int32 (M, 3) array of vertex indices.
+    """
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    try:
+        mesh.calc_loop_triangles()
+        coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", coords)
+        triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("vertices", triangles)
+    finally:
+        obj_eval.to_mesh_clear()
+
+    return coords.reshape(-1, 3), triangles.reshape(-1, 3)
+
+
+def write_obj(path, coords, triangles):
+    """Write a bare triangle mesh as Wavefront OBJ."""
+    with open(path, "w") as f:
+        np.savetxt(f, coords, fmt="v %.6f %.6f %.6f")
+        np.savetxt(f, triangles + 1, fmt="f %d %d %d")
+
+
+# Coordinates and UVs are rounded before hashing, so float noise from import does not split instances
+_FINGERPRINT_DECIMALS = 4
+
+
+def _quantize(values):
+    # Adding 0.0 turns -0.0 into 0.0, so both hash the same
+    return np.round(values, _FINGERPRINT_DECIMALS) + 0.0
+
+
+def _model_space(obj, collision):
+    """4x4 matrix from collision's local space into obj's unrotated, scaled frame."""
+    model = np.array(obj.matrix_world, dtype=np.float64)
+    # obj's scale stays in the frame, as its own coordinates are hashed at that scale
+    frame = np.eye(4)
+    frame[:3, :3] = model[:3, :3] / np.maximum(np.linalg.norm(model[:3, :3], axis=0), 1e-12)
+    frame[:3, 3] = model[:3, 3]
+    return np.linalg.inv(frame) @ np.array(collision.matrix_world, dtype=np.float64)
+
+
+def mesh_fingerprint(obj, depsgraph, collision=None):
+    """Hash what ends up in an object's compiled model, so identical props can share one MDL.
+
+    Covers the evaluated geometry at the object's scale, the active UV layer, the material of
+    every triangle and the collision mesh, placed relative to the object. The object's location
+    and rotation are not included: they are carried by the prop entity.
+    """
+    h = hashlib.sha1()
+
+    for ob in (obj, collision):
+        if ob is None:
+            h.update(b"no collision")
+            continue
+
+        ob_eval = ob.evaluated_get(depsgraph)
+        mesh = ob_eval.to_mesh()
+        try:
+            mesh.calc_loop_triangles()
+            coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+            mesh.vertices.foreach_get("co", coords)
+            loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+            mesh.loops.foreach_get("vertex_index", loop_vertices)
+            tri_loops = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+            mesh.loop_triangles.foreach_get("loops", tri_loops)
+            tri_materials = np.empty(len(mesh.loop_triangles), dtype=np.int32)
+            mesh.loop_triangles.foreach_get("material_index", tri_materials)
+
+            uvs = np.zeros(len(mesh.loops) * 2, dtype=np.float32)
+            if mesh.uv_layers.active:
+                mesh.uv_layers.active.data.foreach_get("uv", uvs)
+        finally:
+            ob_eval.to_mesh_clear()
+
+        materials = [slot.material.name if slot.material else "" for slot in ob.material_slots]
+
+        coords = coords.reshape(-1, 3)
+        if ob is obj:
+            coords = coords * np.array(ob.scale, dtype=np.float32)
+        else:
+            # A collision moved or rotated against its model changes the compiled model
+            matrix = _model_space(obj, ob)
+            coords = (coords @ matrix[:3, :3].T + matrix[:3, 3]).astype(np.float32)
+
+        h.update(_quantize(coords).tobytes())
+        h.update(loop_vertices[tri_loops].tobytes())
+        h.update(_quantize(uvs.reshape(-1, 2)[tri_loops]).tobytes())
+        h.update(tri_materials.tobytes())
+        h.update(json.dumps(materials).encode("utf-8"))
+
+    return h.hexdigest()
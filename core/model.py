@@ -1,38 +1,191 @@
 import os
 import subprocess
+import time
+from collections import namedtuple
 
 import bpy
 
+from .cache import Manifest, fingerprint
 from .helpers import get_bin_dir, get_prefs
+from .trace import span
 
 
-def run_process(obName):
-    """Run studiomdl.exe process and capture output."""
+CompileResult = namedtuple("CompileResult", "name returncode elapsed output")
+
+# 1 Blender meter = 39.3701 Source units (inches)
+SOURCE_SCALE = 39.3701
+
+IDLE_SMD = """version 1
+nodes
+0 "joint0" -1
+end
+skeleton
+time 0
+0 0.000000 0.000000 0.000000 0 0.000000 0.000000
+end"""
+
+_BUILD_MANIFEST_FILENAME = ".uts_build_manifest.json"
+
+
+def model_smd_paths(obName, smd_dir):
+    """Return the reference, LOD and collision SMDs of a model that exist on disk."""
+    candidates = [obName + ".smd", obName + "_lod1.smd", obName + "_lod2.smd", obName + "_collision.smd"]
+    return [smd_dir + "\\" + c for c in candidates if os.path.isfile(smd_dir + "\\" + c)]
+
+
+def build_qc(obName, smd_dir, origin=None, lods=None):
+    """Return the QC text for a static prop, given its world origin in Blender units.
+
+    lods is the model's core.lod plan; without one, existing _lod SMDs get fixed thresholds.
+    """
+    prefs = get_prefs()
+
+    if origin:
+        origin_cmd = f'$origin {origin.x * SOURCE_SCALE:.6f} {origin.y * SOURCE_SCALE:.6f} {origin.z * SOURCE_SCALE:.6f} -90'
+    else:
+        origin_cmd = '$autocenter'
+
+    qcData = f"""$scale {SOURCE_SCALE:.6f}
+$modelname "{prefs.model_prefix}/{obName}.mdl"
+$cdmaterials "{prefs.material_prefix}_override" "{prefs.material_prefix}"
+$staticprop
+$body studio "{obName}.smd"
+$sequence idle "{obName}_idle"
+$surfaceprop "no_decal"
+{origin_cmd}"""
+
+    if lods is not None:
+        for level in lods:
+            qcData += f"""
+// LOD {level.index}: {level.triangles} triangles ({level.ratio:.0%} target), ~{level.distance:.0f} units
+$lod {level.threshold}
+{{
+    replacemodel "{obName}.smd" "{obName}_lod{level.index}.smd"
+}}"""
+    else:
+        for i in range(1, 3):
+            if os.path.isfile(smd_dir + "\\" + obName + f"_lod{i}.smd"):
+                qcData += f"""
+$lod {3500 + (i-1) * 1500}
+{{
+    replacemodel "{obName}.smd" "{obName}_lod{i}.smd"
+}}"""
+
+    if os.path.isfile(smd_dir + "\\" + obName + "_collision.smd"):
+        qcData += f"""
+$collisionmodel "{obName}_collision.smd" {{
+    $concave
+    $maxconvexpieces 512
+    $automass
+}}"""
+
+    return qcData
+
+
+def write_if_changed(path, text):
+    """Write text to path unless the file already holds exactly that text. Returns True if written."""
+    try:
+        with open(path, "r") as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+
+    with open(path, "w") as f:
+        f.write(text)
+    return True
+
+
+def model_output_paths(obName, with_collision):
+    """Return the compiled files studiomdl writes for a model."""
+    prefs = get_prefs()
+    base = os.path.join(prefs.subgmod_path, "models", prefs.model_prefix, obName)
+    exts = [".mdl", ".vvd", ".dx90.vtx"]
+    if with_collision:
+        exts.append(".phy")
+    return [base + ext for ext in exts]
+
+
+def get_build_manifest():
+    """Return the model build manifest stored in temp_path_models."""
+    return Manifest(os.path.join(get_prefs().temp_path_models, _BUILD_MANIFEST_FILENAME))
+
+
+def model_fingerprint(manifest, obName, smd_dir, qcData):
+    """Fingerprint everything that feeds a model compile: its SMDs, QC text and material prefix."""
+    smds = model_smd_paths(obName, smd_dir)
+    return fingerprint(
+        [(os.path.basename(p), manifest.digest(p)) for p in smds],
+        qcData,
+        get_prefs().material_prefix,
+    )
+
+
+def get_studiomdl_command(obName):
+    """Build the studiomdl.exe command line for a model. Must be called from the main thread."""
     prefs = get_prefs()
+    studiomdl = prefs.studiomdl_path or f"{get_bin_dir()}studiomdl.exe"
 
-    cmd = [
-        f"{get_bin_dir()}studiomdl.exe",
+    return [
+        studiomdl,
         "-game", prefs.subgmod_path,
         "-nop4", "-quiet",
         f"{prefs.temp_path_models}\\{obName}.qc"
     ]
 
+
+def run_command(obName, cmd, timeout=300):
+    """Run a compiler command and capture exit code, wall time and output. Thread-safe."""
     print(f"[UTS] Running: {' '.join(cmd)}")
+    with span("studiomdl", "studiomdl", model=obName):
+        start = time.perf_counter()
 
-    try:
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            creationflags=subprocess.CREATE_NO_WINDOW,
-        )
-        stdout, stderr = process.communicate(timeout=300)
-        output = stdout + stderr
-        print(f"[UTS] studiomdl exit code: {process.returncode}")
-        print(f"[UTS] studiomdl output: {output[:500]}")
-
-        return output
-    except Exception as e:
-        print(f"[UTS] Exception for {obName}: {e}")
-        return str(e)
+        try:
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired as e:
+                process.kill()
+                process.communicate()
+                print(f"[UTS] Timeout for {obName}: {e}")
+                return CompileResult(obName, None, time.perf_counter() - start, str(e))
+
+            output = stdout + stderr
+            print(f"[UTS] studiomdl exit code for {obName}: {process.returncode}")
+            print(f"[UTS] studiomdl output: {output[:500]}")
+
+            return CompileResult(obName, process.returncode, time.perf_counter() - start, output)
+        except Exception as e:
+            print(f"[UTS] Exception for {obName}: {e}")
+            return CompileResult(obName, None, time.perf_counter() - start, str(e))
+
+
+def write_compile_report(path, results, skipped=(), stage_report=()):
+    """Write per-model exit codes and timings, followed by the verbose compiler outputs.
+
+    stage_report lines (export pipeline utilization) are inserted before the outputs.
+    """
+    lines = [f"Compiled models: {len(results)}", "Model\tExit code\tTime (s)"]
+    for result in results:
+        code = "error" if result.returncode is None else result.returncode
+        lines.append(f"{result.name}\t{code}\t{result.elapsed:.2f}")
+    lines.append(f"Total compile time: {sum(r.elapsed for r in results):.2f}s")
+    lines.append("")
+    lines.append(f"Skipped models (up to date): {len(skipped)}")
+    lines.extend(skipped)
+    if stage_report:
+        lines.append("")
+        lines.extend(stage_report)
+
+    outputs = [r.output for r in results if r.output.count('\n') >= 3]
+
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+        if outputs:
+            f.write("\n\n" + "\n\n".join(outputs))
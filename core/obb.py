@@ -0,0 +1,91 @@
+import numpy as np
+
+
+def _unique_normals(normals, tol=0.999):
+    """Indices of face normals that are not (anti)parallel to an earlier one."""
+    keep = []
+    for i, n in enumerate(normals):
+        if keep and np.max(np.abs(normals[keep] @ n)) > tol:
+            continue
+        keep.append(i)
+    return np.array(keep, dtype=np.int64)
+
+
+def _plane_bases(normals):
+    """Return two unit vectors (u, v) spanning the plane orthogonal to each normal."""
+    helper = np.zeros_like(normals)
+    helper[np.arange(len(normals)), np.argmin(np.abs(normals), axis=1)] = 1.0
+    u = np.cross(normals, helper)
+    u /= np.linalg.norm(u, axis=1, keepdims=True)
+    v = np.cross(normals, u)
+    return u, v
+
+
+def fit_obb(points, face_normals, edges, edge_faces, eps=1e-6):
+    """Minimum-volume box aligned with one of the convex hull faces.
+
+    points: (N, 3) hull vertices, face_normals: (F, 3) outward unit normals,
+    edges: (E, 2) vertex indices, edge_faces: (E, 2) indices of the two faces sharing each edge.
+
+    For each distinct face normal, the hull outline seen along that normal is made of the edges
+    between front and back facing faces; the best rectangle is flush with one of them
+    (rotating calipers). All outline angles of a normal are evaluated at once.
+
+    Returns (center, axes, half_extents, volume) with axes as rows, or None.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    face_normals = np.asarray(face_normals, dtype=np.float64)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    edge_faces = np.asarray(edge_faces, dtype=np.int64).reshape(-1, 2)
+
+    if len(points) < 2 or len(face_normals) == 0:
+        return None
+
+    normals = face_normals[_unique_normals(face_normals)]
+    u, v = _plane_bases(normals)
+
+    # Projections of every point / edge on every candidate frame, shape (N or E, C)
+    pa, pb, pz = points @ u.T, points @ v.T, points @ normals.T
+    edge_dirs = points[edges[:, 1]] - points[edges[:, 0]]
+    angles = np.mod(np.arctan2(edge_dirs @ v.T, edge_dirs @ u.T), np.pi / 2)
+
+    front = (face_normals @ normals.T) > eps
+    outline = front[edge_faces[:, 0]] != front[edge_faces[:, 1]]
+    depths = pz.max(axis=0) - pz.min(axis=0)
+
+    best = None
+    for c in range(len(normals)):
+        theta = np.unique(np.round(angles[outline[:, c], c], 9))
+        if len(theta) == 0:
+            theta = np.zeros(1)
+
+        cos_t, sin_t = np.cos(theta), np.sin(theta)
+        a, b = pa[:, c, None], pb[:, c, None]
+        x = a * cos_t + b * sin_t
+        y = b * cos_t - a * sin_t
+
+        min_x, max_x = x.min(axis=0), x.max(axis=0)
+        min_y, max_y = y.min(axis=0), y.max(axis=0)
+        volumes = (max_x - min_x) * (max_y - min_y) * max(depths[c], eps)
+
+        k = int(np.argmin(volumes))
+        if best is None or volumes[k] < best[0]:
+            best = (volumes[k], c, theta[k], min_x[k], max_x[k], min_y[k], max_y[k])
+
+    volume, c, theta, min_x, max_x, min_y, max_y = best
+    n = normals[c]
+    axis_x = u[c] * np.cos(theta) + v[c] * np.sin(theta)
+    axis_y = v[c] * np.cos(theta) - u[c] * np.sin(theta)
+    min_z, max_z = pz[:, c].min(), pz[:, c].max()
+
+    axes = np.stack([axis_x, axis_y, n])
+    local_center = np.array([(min_x + max_x) / 2, (min_y + max_y) / 2, (min_z + max_z) / 2])
+    half_extents = np.array([(max_x - min_x) / 2, (max_y - min_y) / 2, (max_z - min_z) / 2])
+
+    return axes.T @ local_center, axes, half_extents, float(volume)
+
+
+def fit_obb_job(job):
+    """Process/thread pool entry point: job is (name, points, face_normals, edges, edge_faces)."""
+    name, points, face_normals, edges, edge_faces = job
+    return name, fit_obb(points, face_normals, edges, edge_faces)
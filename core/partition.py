@@ -0,0 +1,85 @@
+import math
+import os
+
+import numpy as np
+
+from .vmfwriter import VmfWriter
+
+
+def grid_cells(records, cell_size):
+    """Group records by the square (x, y) grid cell holding their origin."""
+    cells = {}
+    for record in records:
+        key = (math.floor(record.x / cell_size), math.floor(record.y / cell_size))
+        cells.setdefault(key, []).append(record)
+
+    return {f"cell_{i}_{j}": cells[(i, j)] for i, j in sorted(cells)}
+
+
+def kdtree_cells(records, budget):
+    """Split records at the median of their widest horizontal axis until each cell holds at most budget."""
+    records = list(records)
+    if not records:
+        return {}
+
+    xy = np.array([(record.x, record.y) for record in records], dtype=np.float64)
+    leaves = []
+    stack = [np.arange(len(records))]
+
+    while stack:
+        indices = stack.pop()
+        if len(indices) <= budget:
+            leaves.append(indices)
+            continue
+
+        points = xy[indices]
+        axis = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+        half = len(indices) // 2
+        order = np.argpartition(points[:, axis], half)
+        # Pushed high half first so cells come out low to high along the first split
+        stack.append(indices[order[half:]])
+        stack.append(indices[order[:half]])
+
+    return {f"cell_{n:04d}": [records[i] for i in leaf] for n, leaf in enumerate(leaves)}
+
+
+def write_partitioned_vmf(path, records, mode, cell_size=256.0, budget=5000):
+    """Write records into one VMF per spatial cell, plus a master VMF of func_instance entities.
+
+    Cell files go to an "instances" folder next to the master VMF. Returns [(cell file, prop count)].
+    """
+    if mode == 'GRID':
+        cells = grid_cells(records, cell_size)
+    elif mode == 'KDTREE':
+        cells = kdtree_cells(records, budget)
+    else:
+        raise ValueError(f"Unknown VMF partition mode {mode!r}")
+
+    base = os.path.splitext(os.path.basename(path))[0]
+    instance_dir = os.path.join(os.path.dirname(path), "instances")
+    os.makedirs(instance_dir, exist_ok=True)
+
+    # Cells of a previous export may not exist any more
+    for filename in os.listdir(instance_dir):
+        if filename.startswith(base + "_cell_") and filename.endswith(".vmf"):
+            os.remove(os.path.join(instance_dir, filename))
+
+    written = []
+    with VmfWriter(path) as master:
+        for name, cell_records in cells.items():
+            cell_path = os.path.join(instance_dir, f"{base}_{name}.vmf")
+            with VmfWriter(cell_path) as writer:
+                for record in cell_records:
+                    writer.write_prop(record)
+
+            # func_instance paths are relative to the map that references them
+            master.write_entity("func_instance", [
+                ("targetname", name),
+                ("file", f"instances/{base}_{name}.vmf"),
+                ("fixup_style", "0"),
+                ("angles", "0 0 0"),
+                ("origin", "0 0 0"),
+            ])
+            written.append((cell_path, len(cell_records)))
+
+    return written
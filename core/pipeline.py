@@ -0,0 +1,214 @@
+import queue
+import threading
+import time
+import traceback
+
+from .trace import add_span
+
+
+_STOP = object()
+
+
+class _StageStats:
+    def __init__(self, name, workers, main_thread=False):
+        self.name = name
+        self.workers = workers
+        self.main_thread = main_thread
+        self.items = 0
+        self.busy = 0.0
+        # Time producers spent waiting for room in this stage's queue (backpressure)
+        self.blocked = 0.0
+        self.peak_queue = 0
+
+
+class _Stage:
+    def __init__(self, name, func, workers, capacity):
+        self.func = func
+        self.queue = queue.Queue(maxsize=capacity)
+        self.stats = _StageStats(name, workers)
+        self.results = []
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.threads = [threading.Thread(target=self._work, name=f"uts-{name}-{i}", daemon=True)
+                        for i in range(workers)]
+
+    def _work(self):
+        while True:
+            entry = self.queue.get()
+            if entry is _STOP:
+                return
+
+            seq, item = entry
+            start = time.perf_counter()
+            try:
+                result = self.func(item)
+            except Exception as e:
+                print(f"[UTS] !!! EXCEPTION in pipeline stage '{self.stats.name}': {e}")
+                traceback.print_exc()
+                result = None
+            elapsed = time.perf_counter() - start
+
+            with self.lock:
+                self.results.append((seq, result))
+                self.stats.items += 1
+                self.stats.busy += elapsed
+
+
+class Pipeline:
+    """Stage graph for the export chain.
+
+    Blender work stays on the main thread and is serialized: main_stage(name) switches the
+    stage the main thread's time is charged to. Stages that do not need bpy (image encoding,
+    external compilers) run on their own worker threads behind bounded queues, so they overlap
+    with the main thread and with each other. put() blocks while a stage's queue is full.
+
+    Use it as a context manager: leaving the block without close() (an exception, an early
+    return) aborts the pipeline, so no worker or feeder thread is left blocked on a queue.
+    """
+
+    def __init__(self):
+        self._stages = {}
+        self._main = {}
+        self._current = None
+        self._mark = None
+        self._stage_start = None
+        self._feeders = []
+        self._start = time.perf_counter()
+        self._elapsed = None
+        self._aborted = False
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._closed:
+            self.abort()
+        return False
+
+    def add_stage(self, name, func, workers=1, capacity=None):
+        """Start a background stage running func(item) on workers threads."""
+        stage = _Stage(name, func, max(1, workers), capacity or 2 * max(1, workers))
+        self._stages[name] = stage
+        for thread in stage.threads:
+            thread.start()
+
+    def main_stage(self, name):
+        """Charge the main thread's time from now on to stage name (None: not tracked)."""
+        now = time.perf_counter()
+        if self._current is not None:
+            self._main[self._current].busy += now - self._mark
+            add_span(self._current, self._stage_start, now, "stage")
+        if name is not None:
+            if name not in self._main:
+                self._main[name] = _StageStats(name, 1, main_thread=True)
+            self._main[name].items += 1
+        self._current = name
+        self._mark = now
+        self._stage_start = now
+
+    def _put(self, name, item):
+        stage = self._stages[name]
+        with stage.lock:
+            seq = stage.seq
+            stage.seq += 1
+
+        start = time.perf_counter()
+        stage.queue.put((seq, item))
+        waited = time.perf_counter() - start
+
+        with stage.lock:
+            stage.stats.blocked += waited
+            stage.stats.peak_queue = max(stage.stats.peak_queue, stage.queue.qsize())
+        return waited
+
+    def put(self, name, item):
+        """Queue item for a background stage, waiting while its queue is full. Main thread."""
+        waited = self._put(name, item)
+        if self._current is not None:
+            # Waiting for a downstream stage is not work of the current main-thread stage
+            self._mark += waited
+
+    def feed(self, name, items):
+        """Queue many items from a helper thread, so backpressure does not stall the main thread."""
+        items = list(items)
+        if not items:
+            return
+        def run():
+            for item in items:
+                if self._aborted:
+                    return
+                self._put(name, item)
+
+        feeder = threading.Thread(target=run, name=f"uts-feed-{name}", daemon=True)
+        self._feeders.append(feeder)
+        feeder.start()
+
+    def close(self):
+        """Wait for every stage to drain. Returns {stage name: results in submission order}."""
+        self.main_stage(None)
+        for feeder in self._feeders:
+            feeder.join()
+
+        results = {}
+        for name, stage in self._stages.items():
+            for _ in stage.threads:
+                stage.queue.put(_STOP)
+            for thread in stage.threads:
+                thread.join()
+            results[name] = [result for seq, result in sorted(stage.results, key=lambda entry: entry[0])]
+
+        self._elapsed = time.perf_counter() - self._start
+        self._closed = True
+        return results
+
+    def _drain(self):
+        for stage in self._stages.values():
+            while True:
+                try:
+                    stage.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+    def abort(self):
+        """Discard queued items and stop every stage once its current item is done. No-op after close()."""
+        if self._closed:
+            return
+        self._aborted = True
+        self.main_stage(None)
+
+        # Feeders blocked on a full queue get room, see the abort flag and return
+        for feeder in self._feeders:
+            while feeder.is_alive():
+                self._drain()
+                feeder.join(0.05)
+        self._drain()
+
+        for stage in self._stages.values():
+            for _ in stage.threads:
+                stage.queue.put(_STOP)
+            for thread in stage.threads:
+                thread.join()
+
+        self._elapsed = time.perf_counter() - self._start
+        self._closed = True
+        if self._stages:
+            print(f"[UTS] Pipeline aborted, stages stopped: {', '.join(self._stages)}")
+
+    def report(self):
+        """Per-stage utilization lines: busy time over wall time and worker count."""
+        wall = (self._elapsed or time.perf_counter() - self._start) or 1e-9
+        lines = [f"Pipeline wall time: {wall:.2f}s",
+                 "Stage\tWorkers\tItems\tBusy (s)\tUtilization\tBackpressure (s)\tPeak queue"]
+
+        stats = list(self._main.values()) + [stage.stats for stage in self._stages.values()]
+        for s in stats:
+            utilization = s.busy / (wall * s.workers)
+            where = "main" if s.main_thread else s.workers
+            lines.append(f"{s.name}\t{where}\t{s.items}\t{s.busy:.2f}\t{utilization:.0%}\t"
+                         f"{s.blocked:.2f}\t{s.peak_queue}")
+
+        busiest = max(stats, key=lambda s: s.busy / s.workers, default=None)
+        if busiest is not None:
+            lines.append(f"Bottleneck: {busiest.name}")
+        return lines
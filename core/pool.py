@@ -0,0 +1,62 @@
+import concurrent.futures
+import contextlib
+import threading
+
+
+def run_ordered(func, items, max_workers, on_done=None, processes=False):
+    """Run func over items on a bounded thread pool and return the results in input order.
+
+    on_done(index, result) is called from the calling thread as each item finishes.
+    With processes=True a process pool is used instead; func and items must then be picklable
+    and func must live in a module that does not need bpy.
+    """
+    items = list(items)
+    results = [None] * len(items)
+
+    if max_workers <= 1 or len(items) <= 1:
+        for index, item in enumerate(items):
+            results[index] = func(item)
+            if on_done:
+                on_done(index, results[index])
+        return results
+
+    executor_class = concurrent.futures.ProcessPoolExecutor if processes else concurrent.futures.ThreadPoolExecutor
+    with executor_class(max_workers=max_workers) as executor:
+        futures = {executor.submit(func, item): index for index, item in enumerate(items)}
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            results[index] = future.result()
+            if on_done:
+                on_done(index, results[index])
+
+    return results
+
+
+class MemoryBudget:
+    """Block workers until their estimated memory use fits in a shared budget.
+
+    A limit of 0 disables the guard. A single reservation larger than the whole
+    budget is clamped, so it still runs, but alone.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._cond = threading.Condition()
+
+    @contextlib.contextmanager
+    def reserve(self, amount):
+        if self.limit <= 0:
+            yield
+            return
+
+        amount = min(amount, self.limit)
+        with self._cond:
+            self._cond.wait_for(lambda: self.used + amount <= self.limit)
+            self.used += amount
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.used -= amount
+                self._cond.notify_all()
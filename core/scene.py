@@ -0,0 +1,204 @@
+import math
+import re
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import bpy
+import numpy as np
+from mathutils import Matrix, Vector
+
+from .trace import add_span
+
+
+# models: {name: kept object}; duplicates: other objects sharing a kept name;
+# origins: {name: location} of the last mesh object with that name, after centering
+PreparedScene = namedtuple("PreparedScene", ["models", "duplicates", "origins"])
+
+# Rotation given to every exported model (and its collision) before SMD export
+MODEL_ROTATION = (0, 0, math.radians(-90))
+
+
+class StepTimer:
+    """Wall time of the named steps of a scene preparation, in call order."""
+
+    def __init__(self):
+        self.steps = []
+
+    @contextmanager
+    def step(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            self.steps.append((name, ended - started))
+            add_span(name, started, ended, "prepare")
+
+    def report(self):
+        lines = ["Preparation step\tTime (s)"]
+        for name, elapsed in self.steps:
+            lines.append(f"{name}\t{elapsed:.2f}")
+        lines.append(f"Total\t{sum(elapsed for name, elapsed in self.steps):.2f}")
+        return lines
+
+
+def export_name(name, strip_replaced=False):
+    """Object name without its .001 suffix, restricted to characters studiomdl accepts."""
+    name = name.split(".")[0]
+    if strip_replaced:
+        name = name.replace("_Replaced", "")
+    return re.sub(r'[^\w\-]', '_', name)
+
+
+def is_collision_name(name):
+    return name.find("_collision") != -1 or name.find("convex_") != -1
+
+
+def view_layer_pointers(view_layer):
+    """Identity of the objects of a view layer; unlike names, it survives renaming."""
+    return {obj.as_pointer() for obj in view_layer.objects}
+
+
+def objects_outside_view_layer(scene, view_layer):
+    visible = view_layer_pointers(view_layer)
+    return [obj for obj in scene.objects if obj.as_pointer() not in visible]
+
+
+def remove_objects(objects):
+    """Delete objects in one call, without selection or context overrides."""
+    objects = list(objects)
+    if objects:
+        bpy.data.batch_remove(objects)
+    return len(objects)
+
+
+def bounds_center(mesh):
+    """Center of a mesh's local bounding box, or None if it has no vertices."""
+    if not len(mesh.vertices):
+        return None
+
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    coords = coords.reshape(-1, 3)
+    return Vector(((coords.min(axis=0) + coords.max(axis=0)) * 0.5).tolist())
+
+
+def center_origins(objects, users):
+    """Move the origin of each object's mesh to the center of its bounds, keeping it in place.
+
+    Same result as origin_set(type='ORIGIN_GEOMETRY', center='BOUNDS'): mesh data shared by
+    several objects is moved once and all its users in users are compensated, and children
+    keep their world transform. Call view_layer.update() before reading matrix_world.
+    """
+    shared = {}
+    for obj in users:
+        if obj.type == 'MESH':
+            shared.setdefault(obj.data.as_pointer(), []).append(obj)
+
+    children = {}
+    for obj in users:
+        if obj.parent is not None and obj.parent_type == 'OBJECT':
+            children.setdefault(obj.parent.as_pointer(), []).append(obj)
+
+    done = set()
+    for obj in objects:
+        mesh = obj.data
+        if obj.type != 'MESH' or mesh.library is not None or mesh.as_pointer() in done:
+            continue
+        done.add(mesh.as_pointer())
+
+        center = bounds_center(mesh)
+        if center is None or center.length_squared == 0:
+            continue
+
+        mesh.transform(Matrix.Translation(-center), shape_keys=True)
+        for user in shared[mesh.as_pointer()]:
+            user.location += user.matrix_basis.to_3x3() @ center
+            for child in children.get(user.as_pointer(), ()):
+                child.matrix_parent_inverse = Matrix.Translation(-center) @ child.matrix_parent_inverse
+
+    return len(done)
+
+
+def prepare_objects(objects, include, timer, rename=False, rename_collisions=True, center=False):
+    """Rename, deduplicate and (optionally) center the origins of objects in a single pass.
+
+    include(obj) selects the objects that are exported. With rename, mesh objects get their
+    export_name() (collision objects only if rename_collisions). Origins are centered on every
+    visible, selectable object, which is what origin_set on select_all(action='SELECT') did.
+    """
+    objects = list(objects)
+    to_center = []
+    models = {}
+    duplicates = []
+    meshes = {}
+
+    with timer.step("rename / dedup"):
+        for obj in objects:
+            if center and obj.type == 'MESH' and obj.visible_get() and not obj.hide_select:
+                to_center.append(obj)
+            if not include(obj):
+                continue
+
+            if rename and obj.type == 'MESH' and (rename_collisions or not obj.name.endswith("_collision")):
+                obj.rename(export_name(obj.name, strip_replaced=True))
+
+            name_common = obj.name.split(".")[0]
+            if obj.type == 'MESH':
+                meshes[name_common] = obj
+
+            if name_common not in models:
+                models[name_common] = obj
+                obj.rename(name_common)
+            else:
+                duplicates.append(obj)
+
+    if to_center:
+        with timer.step("center origins"):
+            count = center_origins(to_center, objects)
+            bpy.context.view_layer.update()
+        print(f"[UTS] Origins centered on {count} meshes")
+
+    origins = {name: obj.location.copy() for name, obj in meshes.items()}
+    return PreparedScene(models, duplicates, origins)
+
+
+def select_all_elements(mesh):
+    """Select every vertex, edge and face of a mesh, as edit mode select_all(action='SELECT')."""
+    for elements in (mesh.vertices, mesh.edges, mesh.polygons):
+        elements.foreach_set("select", np.ones(len(elements), dtype=bool))
+
+
+def prepare_models(objects, view_layer, exclude=()):
+    """Give exported objects their final names and rotation. Returns the names of the models to export.
+
+    Objects outside the view layer are left untouched. Models are the visible, non-collision
+    objects that are not in exclude; they and their collision objects get MODEL_ROTATION.
+    """
+    visible = view_layer_pointers(view_layer)
+    by_name = {}
+    models = []
+
+    for obj in objects:
+        if obj.as_pointer() not in visible:
+            continue
+
+        clean_name = export_name(obj.name)
+        obj.rename(clean_name)
+        if obj.data:
+            obj.data.rename(clean_name)
+        by_name[obj.name] = obj
+
+        if not (obj.hide_render or obj.hide_get()) and not is_collision_name(obj.name):
+            models.append(obj)
+            if obj.type == 'MESH':
+                select_all_elements(obj.data)
+
+    for obj in models:
+        obj.rotation_euler = MODEL_ROTATION
+        collision = by_name.get(obj.name + "_collision") or bpy.data.objects.get(obj.name + "_collision")
+        if collision is not None:
+            collision.rotation_euler = MODEL_ROTATION
+
+    return [obj.name for obj in models if obj.name not in exclude]
@@ -0,0 +1,172 @@
+from collections import namedtuple
+
+import numpy as np
+
+
+# Single static bone; matches the skeleton of model.IDLE_SMD
+SMD_HEADER = """version 1
+nodes
+0 "joint0" -1
+end
+skeleton
+time 0
+0 0.000000 0.000000 0.000000 0.000000 0.000000 0.000000
+end
+triangles
+"""
+
+# parent bone, position, normal, uv, then one weight link to bone 0
+_VERTEX_FORMAT = "0 %.6f %.6f %.6f %.6f %.6f %.6f %.6f %.6f 1 0 1.000000\n"
+
+# Triangles formatted per string operation, to bound the size of temporary strings
+_BATCH_TRIANGLES = 16384
+
+NO_MATERIAL = "no_material"
+
+
+# Per-corner arrays in loop-triangle order: positions/normals (3T, 3), uvs (3T, 2),
+# material_index (T,) into materials (names)
+SmdMesh = namedtuple("SmdMesh", ["positions", "normals", "uvs", "material_index", "materials"])
+
+
+def _corner_normals(mesh):
+    """Split (custom or smooth/flat) normal of every loop, as a (L, 3) array."""
+    normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+    if hasattr(mesh, "corner_normals"):
+        mesh.corner_normals.foreach_get("vector", normals)
+    else:
+        # Blender < 4.1
+        mesh.calc_normals_split()
+        mesh.loops.foreach_get("normal", normals)
+    return normals.reshape(-1, 3)
+
+
+def mesh_from_data(mesh, matrix, material_names):
+    """Build an SmdMesh from a Mesh datablock and a 4x4 world matrix."""
+    mesh.calc_loop_triangles()
+    tri_count = len(mesh.loop_triangles)
+
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+    tri_loops = np.empty(tri_count * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("loops", tri_loops)
+    material_index = np.empty(tri_count, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("material_index", material_index)
+
+    uvs = np.zeros(len(mesh.loops) * 2, dtype=np.float32)
+    if mesh.uv_layers.active:
+        mesh.uv_layers.active.data.foreach_get("uv", uvs)
+
+    matrix = np.array(matrix, dtype=np.float64)
+    rotation = matrix[:3, :3]
+    normal_matrix = np.linalg.inv(rotation).T
+
+    positions = coords.reshape(-1, 3)[loop_vertices[tri_loops]] @ rotation.T + matrix[:3, 3]
+    normals = _corner_normals(mesh)[tri_loops] @ normal_matrix.T
+    normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+
+    if not material_names:
+        material_names = [NO_MATERIAL]
+    material_index = np.clip(material_index, 0, len(material_names) - 1)
+
+    return SmdMesh(positions, normals, uvs.reshape(-1, 2)[tri_loops], material_index, list(material_names))
+
+
+def mesh_from_object(obj, depsgraph):
+    """Evaluate an object (modifiers included) into world-space SmdMesh arrays."""
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    try:
+        names = [slot.material.name if slot.material else NO_MATERIAL for slot in obj.material_slots]
+        return mesh_from_data(mesh, obj.matrix_world, names)
+    finally:
+        obj_eval.to_mesh_clear()
+
+
+def _cluster_cells(positions, origin, extent, resolution):
+    """Index of the grid cell (resolution cells along the longest axis) holding each corner."""
+    cells = np.minimum(((positions - origin) * (resolution / extent)).astype(np.int64), resolution - 1)
+    keys = (cells[:, 0] * resolution + cells[:, 1]) * resolution + cells[:, 2]
+    return np.unique(keys, return_inverse=True)[1].reshape(-1)
+
+
+def _surviving(cluster):
+    """Triangles whose three corners fall in three different cells."""
+    tri = cluster.reshape(-1, 3)
+    return (tri[:, 0] != tri[:, 1]) & (tri[:, 1] != tri[:, 2]) & (tri[:, 0] != tri[:, 2])
+
+
+def cluster_decimate(smd_mesh, target_triangles, iterations=12):
+    """Vertex-clustering decimation down to at most target_triangles.
+
+    Corners are snapped to the mean position of their grid cell and collapsed triangles are
+    dropped. The finest grid meeting the budget is found by bisection on its resolution.
+    Corner normals and UVs are kept, so seams and hard edges survive.
+    """
+    tri_count = len(smd_mesh.material_index)
+    if target_triangles >= tri_count or tri_count == 0:
+        return smd_mesh
+
+    positions = smd_mesh.positions
+    origin = positions.min(axis=0)
+    extent = max(float(np.ptp(positions, axis=0).max()), 1e-9)
+
+    low, high = 1, max(2, int(np.sqrt(tri_count) * 4))
+    best = None
+    for _ in range(iterations):
+        if high - low <= 1:
+            break
+        resolution = int(np.sqrt(low * high))
+        cluster = _cluster_cells(positions, origin, extent, resolution)
+        keep = _surviving(cluster)
+        if keep.sum() > target_triangles:
+            high = resolution
+        else:
+            best = (cluster, keep)
+            low = resolution
+
+    if best is None:
+        cluster = _cluster_cells(positions, origin, extent, low)
+        best = (cluster, _surviving(cluster))
+
+    cluster, keep = best
+    counts = np.bincount(cluster)
+    means = np.stack([np.bincount(cluster, weights=positions[:, axis]) for axis in range(3)], axis=1)
+    means /= counts[:, None]
+
+    corners = np.repeat(keep, 3)
+    return SmdMesh(means[cluster[corners]], smd_mesh.normals[corners], smd_mesh.uvs[corners],
+                   smd_mesh.material_index[keep], smd_mesh.materials)
+
+
+def triangle_blocks(smd_mesh):
+    """Yield the SMD triangle section as text chunks, formatted in bulk per material."""
+    corners = np.hstack([smd_mesh.positions, smd_mesh.normals, smd_mesh.uvs]).reshape(-1, 3 * 8)
+
+    for index in np.unique(smd_mesh.material_index):
+        material = smd_mesh.materials[index].replace('"', "").replace("%", "%%")
+        triangle_format = material + "\n" + _VERTEX_FORMAT * 3
+        rows = corners[smd_mesh.material_index == index]
+
+        for start in range(0, len(rows), _BATCH_TRIANGLES):
+            batch = rows[start:start + _BATCH_TRIANGLES]
+            yield (triangle_format * len(batch)) % tuple(batch.ravel().tolist())
+
+
+def write_smd(path, smd_meshes):
+    """Write one reference SMD holding every mesh in smd_meshes."""
+    with open(path, "w", newline="\n") as f:
+        f.write(SMD_HEADER)
+        for smd_mesh in smd_meshes:
+            for block in triangle_blocks(smd_mesh):
+                f.write(block)
+        f.write("end\n")
+
+
+def write_object_smd(path, obj, depsgraph):
+    """Evaluate obj and write it as a reference SMD. Returns the triangle count."""
+    smd_mesh = mesh_from_object(obj, depsgraph)
+    write_smd(path, [smd_mesh])
+    return len(smd_mesh.material_index)
@@ -1,31 +1,129 @@
 import os
-import shutil
+import threading
+import traceback
+from collections import namedtuple
 
 import bpy
-import imageio
 from PIL import Image
 from srctools.vtf import ImageFormats as VTFFormats
 
 from .. import utils
+from .alpha import alpha_mode, analyze_alpha
+from .cache import Manifest, fingerprint
 from .helpers import get_prefs, get_save_dir
+from .image import estimate_texture_bytes, get_orm_channel, load_image, reset_orm_cache
+from .pool import MemoryBudget, run_ordered
+from .trace import span
 
 
+# Bump when the VTF/VMT encoding changes, so cached outputs are rebuilt
+_CACHE_VERSION = 3
+_CACHE_FILENAME = ".uts_texture_cache.json"
+
 _already_created_textures = {}
+_already_created_lock = threading.Lock()
+_manifest = None
+
+# Plain description of one material's texture work, safe to hand to a worker thread.
+# fallback_image is the bpy image to re-save on the main thread if its file cannot be decoded.
+# orm is the path of the packed occlusion/roughness/metallic image, read through get_orm_channel().
+TextureJob = namedtuple("TextureJob", "name texName texDir bumpDir bumpName color asMapTexture "
+                                      "no_cull is_transparent fallback_image orm")
 
 
 def reset_texture_cache():
     """Clear the texture creation cache. Call at the start of each export run."""
-    global _already_created_textures
+    global _already_created_textures, _manifest
     _already_created_textures = {}
+    _manifest = None
+    reset_orm_cache()
 
 
-def create_texture(texImg, bumpImg, matData, aoImg=None, roughnessImg=None,
-                   metallicImg=None, color=None, asMapTexture=False,
-                   no_cull=False, is_transparent=False):
-    """Create VTF + VMT files for a single material."""
+def _claim(key):
+    """Atomically mark key as created. Returns False if another job already claimed it."""
+    with _already_created_lock:
+        if key in _already_created_textures:
+            return False
+        _already_created_textures[key] = True
+        return True
+
+
+def get_texture_manifest():
+    """Return the persistent texture cache manifest stored in the materials output directory."""
+    global _manifest
+    path = os.path.join(get_save_dir(), _CACHE_FILENAME)
+    if _manifest is None or _manifest.path != path:
+        _manifest = Manifest(path)
+    return _manifest
+
+
+def save_texture_manifest():
+    """Write the texture cache manifest to disk. Call at the end of each export run."""
+    if _manifest is not None:
+        _manifest.save()
+
+
+def texture_settings():
+    """Snapshot of the UTS_Prefs values used by the texture pipeline. Must be called from the main thread."""
+    prefs = get_prefs()
+    return {
+        "save_dir": get_save_dir(),
+        "material_prefix": prefs.material_prefix,
+        "shader_type": prefs.shader_type,
+        "enable_phong": prefs.enable_phong,
+        "phong_exponent": prefs.phong_exponent,
+        "phong_boost": prefs.phong_boost,
+        "enable_envmap": prefs.enable_envmap,
+        "envmap_tint": prefs.envmap_tint,
+        "keep_intermediate_tga": prefs.keep_intermediate_tga,
+        "mip_filter": prefs.mip_filter if prefs.mip_filter != 'NONE' else None,
+    }
+
+
+def _shader_settings(settings, asMapTexture):
+    """Settings values that end up in the VMT or affect the VTF encoding."""
+    return {
+        "shader": settings["shader_type"] if not asMapTexture else 'LightMappedGeneric',
+        "material_prefix": settings["material_prefix"],
+        "phong": [settings["enable_phong"], int(settings["phong_exponent"]), round(settings["phong_boost"], 2)],
+        "envmap": [settings["enable_envmap"], round(settings["envmap_tint"], 2)],
+        "mip_filter": settings["mip_filter"],
+    }
+
+
+def texture_job_key(job, settings):
+    """Fingerprint of the sources and settings a job's VTF/VMT outputs depend on."""
+    return fingerprint(
+        _CACHE_VERSION,
+        [job.texDir, job.bumpDir, job.orm],
+        _shader_settings(settings, job.asMapTexture),
+        job.bumpName,
+        job.color,
+        job.no_cull,
+        job.is_transparent,
+    )
+
+
+def _write_debug_tga(img, tga_path, save_dir):
+    """Save an intermediate TGA, next to the source if possible, else in the materials directory."""
+    try:
+        img.save(tga_path)
+    except Exception as e:
+        print(f"[UTS]   Cannot save TGA to original dir ({tga_path}): {e}")
+        os.makedirs(save_dir, exist_ok=True)
+        tga_path = save_dir + os.path.basename(tga_path)
+        img.save(tga_path)
+    print(f"[UTS]   Debug TGA saved to: {tga_path}")
+
+
+def prepare_texture_job(texImg, bumpImg, matData, color=None, asMapTexture=False,
+                        no_cull=False, is_transparent=False, orm=None):
+    """Resolve a material's images into a TextureJob. Must be called from the main thread.
+
+    Returns None if the material was already handled during this run.
+    """
     print(f"[UTS] === create_texture START for material: {matData.name} ===")
     print(f"[UTS]   texImg type={type(texImg).__name__}, bumpImg={'None' if bumpImg is None else type(bumpImg).__name__}")
-    print(f"[UTS]   get_save_dir() = {get_save_dir()}")
 
     texDir, bumpDir = texImg, bumpImg
 
@@ -36,18 +134,14 @@ def create_texture(texImg, bumpImg, matData, aoImg=None, roughnessImg=None,
         bumpDir = os.path.normpath(bpy.path.abspath(bumpImg.filepath, library=bumpImg.library))
 
     print(f"[UTS]   texDir = {texDir}")
-    print(f"[UTS]   texDir exists = {os.path.isfile(texDir) if isinstance(texDir, str) else 'N/A'}")
     assert isinstance(bumpDir, str) or bumpDir is None
 
-    # Copy textures png to the save dir
     texName = ("mapTex_" if asMapTexture else "") + matData.name
     bumpName = ""
 
-    if texName in _already_created_textures:
+    if not _claim(texName):
         print(f"[UTS]   SKIPPED (already created): {texName}")
-        return
-
-    _already_created_textures[texName] = True
+        return None
 
     if isinstance(bumpImg, str):
         folder_texture = bumpImg.split("/")
@@ -55,101 +149,100 @@ def create_texture(texImg, bumpImg, matData, aoImg=None, roughnessImg=None,
     elif bumpImg:
         bumpName = ("mapTex_" if asMapTexture else "") + bumpImg.name
 
-    filename, file_extension = os.path.splitext(texDir.replace("\\", "/"))
-    texturePath = ""
-    bumpPath = ""
-
-    if texDir.find(".tga") == -1:
-        # Convert to TGA if needed
-        try:
-            img = imageio.imread(texDir)
-            print(f"[UTS]   imageio.imread OK, shape={img.shape}")
-        except Exception as e:
-            print(f"[UTS] Error reading {texDir} with imageio: {e}")
-            fallback_success = False
-            if not isinstance(texImg, str):
-                print(f"[UTS] Attempting to recover by saving {texImg.name} to temp TGA...")
-                try:
-                    safe_name = bpy.path.clean_name(texImg.name)
-                    os.makedirs(get_save_dir(), exist_ok=True)
-                    temp_path = get_save_dir() + "temp_fallback_" + safe_name + ".tga"
-
-                    texImg.save_render(filepath=temp_path)
-
-                    if os.path.exists(temp_path):
-                        print(f"[UTS] Successfully saved fallback to {temp_path}")
-                        img = imageio.imread(temp_path)
-                        texDir = temp_path
-                        filename = os.path.splitext(texDir.replace("\\", "/"))[0]
-                        fallback_success = True
-                except Exception as e2:
-                    print(f"[UTS] Fallback save failed: {e2}")
-
-            if not fallback_success:
-                print(f"[UTS] critical failure reading texture {texDir}")
-                return
-
-        img_pil = Image.fromarray(img)
-
-        tga_path = filename + ".tga"
-        try:
-            img_pil.save(tga_path)
-            print(f"[UTS]   TGA saved to: {tga_path}")
-        except Exception as e:
-            print(f"[UTS]   Cannot save TGA to original dir ({tga_path}): {e}")
-            print(f"[UTS]   Saving TGA to get_save_dir() instead...")
-            os.makedirs(get_save_dir(), exist_ok=True)
-            tga_path = get_save_dir() + os.path.basename(filename) + ".tga"
-            filename = os.path.splitext(tga_path.replace("\\", "/"))[0]
-            img_pil.save(tga_path)
-            print(f"[UTS]   TGA saved to fallback: {tga_path}")
-        texturePath = tga_path
-
-        if bumpImg:
-            img_pil = Image.fromarray(imageio.imread(bumpDir))
-            bumpPath = filename[:filename.rfind('/')] + "/" + bumpName[:(bumpName.find('.'))] + ".tga"
-            img_pil.save(bumpPath)
-            print("[UTS] Convert", bumpDir, "to", bumpPath)
-
-        print("[UTS] Convert", texDir, "to", filename + ".tga", texDir.replace("\\", "/"))
-    else:
-        texturePath = get_save_dir() + texName + os.path.splitext(texImg.name)[1]
-        shutil.copy(texDir, texturePath)
-
-        print("[UTS] Copy", texDir, "to", texturePath)
-        if bumpImg:
-            bumpPath = get_save_dir() + bumpName
-            shutil.copy(bumpDir, bumpPath)
-            print("[UTS] Copy", bumpDir, "to", bumpPath)
-
-    # Check for transparency
-    image = imageio.imread(texturePath)
-
-    if not is_transparent and (image.shape[2] == 4 and (image[:, :, 3] < 250).any()):
-        is_transparent = True
-
-    if bumpImg:
-        print("We have a bumpmap")
+    return TextureJob(
+        name=matData.name,
+        texName=texName,
+        texDir=texDir,
+        bumpDir=bumpDir if bumpImg else None,
+        bumpName=bumpName,
+        color=[float(x) for x in color] if color else None,
+        asMapTexture=asMapTexture,
+        no_cull=no_cull,
+        is_transparent=is_transparent,
+        fallback_image=None if isinstance(texImg, str) else texImg,
+        orm=orm,
+    )
+
+
+def process_texture_job(job, settings, manifest, budget=None):
+    """Decode, check, resize and encode one material's textures and write its VMT.
+
+    Thread-safe: does not touch bpy. Returns "done", "cached", "failed", or "fallback"
+    when the source could not be decoded and the main thread should re-save it.
+    """
+    texDir, bumpDir = job.texDir, job.bumpDir
+
+    # Skip decoding and encoding entirely if sources and settings match the last run
+    cache_key = None
+    sources = [texDir] + ([bumpDir] if bumpDir else []) + ([job.orm] if job.orm else [])
+
+    if all(os.path.isfile(src) for src in sources):
+        cache_key = fingerprint(
+            _CACHE_VERSION,
+            [manifest.digest(src) for src in sources],
+            _shader_settings(settings, job.asMapTexture),
+            job.bumpName,
+            job.color,
+            job.no_cull,
+            job.is_transparent,
+        )
+        if manifest.is_fresh(job.texName, cache_key):
+            print(f"[UTS]   UP TO DATE (cache): {job.texName}")
+            return "cached"
+
+    # Wait until this texture's estimated working set fits in the shared memory budget
+    if budget is None:
+        budget = MemoryBudget(0)
+    estimate = sum(estimate_texture_bytes(src) for src in sources if os.path.isfile(src))
+    with budget.reserve(estimate):
+        return _encode_texture_job(job, settings, manifest, cache_key)
+
+
+def _encode_texture_job(job, settings, manifest, cache_key):
+    """Body of process_texture_job, run while holding the job's memory reservation."""
+    save_dir = settings["save_dir"]
+    texDir, bumpDir, bumpName = job.texDir, job.bumpDir, job.bumpName
+    is_transparent = job.is_transparent
+
+    filename = os.path.splitext(texDir.replace("\\", "/"))[0]
+
+    # Decode each source exactly once, the pixels then stay in memory up to the VTF encoding
+    try:
+        img = load_image(texDir)
+        print(f"[UTS]   Decoded {texDir}: {img.size} {img.mode}")
+    except Exception as e:
+        print(f"[UTS] Error reading {texDir}: {e}")
+        if job.fallback_image is not None:
+            return "fallback"
+        print(f"[UTS] critical failure reading texture {texDir}")
+        return "failed"
+
+    bumpImgData = load_image(bumpDir) if bumpDir else None
+
+    if settings["keep_intermediate_tga"]:
+        _write_debug_tga(img, filename + ".tga", save_dir)
+        if bumpImgData:
+            _write_debug_tga(bumpImgData, filename[:filename.rfind('/')] + "/" + bumpName[:(bumpName.find('.'))] + ".tga",
+                             save_dir)
+
+    # Check for transparency: cutout vs blended vs opaque is decided from the alpha data
+    if is_transparent:
+        alphaMode = "translucent"
     else:
-        print("We don't have a bumpmap")
-
-    final_path = get_prefs().material_prefix + "/"
+        digest = manifest.digest(texDir) if os.path.isfile(texDir) else None
+        alphaInfo = analyze_alpha(texDir, digest, img=img)
+        alphaMode = alpha_mode(alphaInfo)
+        if alphaInfo.translucent:
+            print(f"[UTS]   Alpha coverage {alphaInfo.coverage:.2%}, soft {alphaInfo.partial:.0%} -> {alphaMode}")
+    is_transparent = alphaMode != "opaque"
+
+    final_path = settings["material_prefix"] + "/"
     fileNameOfPath = os.path.basename(filename)
 
-    if is_transparent:
-        if texturePath.lower().find("opaque") != -1:
-            is_transparent = False
-
-        for i in {"T_st01_00_ground01D_D"}:
-            if texturePath.lower().find(i.lower()) != -1:
-                is_transparent = False
-                break
-
-    os.makedirs(os.path.dirname(os.path.join(get_save_dir(), matData.name + ".vmt")), exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.join(save_dir, job.name + ".vmt")), exist_ok=True)
 
+    color = list(job.color) if job.color else None
     if color:
-        color = [float(x) for x in color]
-
         if len(color) == 4:
             del color[3]
 
@@ -172,25 +265,25 @@ def create_texture(texImg, bumpImg, matData, aoImg=None, roughnessImg=None,
     # Write VMT + VTF
     bumpNameWithoutExtension = None
 
-    dir = get_save_dir() + matData.name + ".vmt"
-    prefs = get_prefs()
+    dir = save_dir + job.name + ".vmt"
 
     if os.path.isfile(dir):
         os.remove(dir)
 
-    shader = prefs.shader_type if not asMapTexture else 'LightMappedGeneric'
+    shader = settings["shader_type"] if not job.asMapTexture else 'LightMappedGeneric'
 
     with open(dir, "w") as f:
         f.write(f'"{shader}"\n')
         f.write('{\n')
         f.write(f'\t"$basetexture" "{final_path}{fileNameOfPath}"\n')
 
-        if bumpImg:
+        if bumpDir:
             bumpNameWithoutExtension = os.path.splitext(bumpName)[0]
             f.write(f'\t"$bumpmap" "{final_path}{bumpNameWithoutExtension}"\n')
 
-        if is_transparent:
+        if alphaMode == "translucent":
             f.write('\t"$translucent" 1\n')
+        elif alphaMode == "alphatest":
             f.write('\t"$alphatest" 1\n')
 
         if color:
@@ -200,29 +293,135 @@ def create_texture(texImg, bumpImg, matData, aoImg=None, roughnessImg=None,
         if shader == 'VertexLitGeneric':
             f.write('\t"$model" 1\n')
 
-        if prefs.enable_phong:
+        if settings["enable_phong"]:
             f.write('\n\t// Phong\n')
             f.write('\t"$phong" 1\n')
-            f.write(f'\t"$phongexponent" {int(prefs.phong_exponent)}\n')
-            f.write(f'\t"$phongboost" {round(prefs.phong_boost, 2)}\n')
+            f.write(f'\t"$phongexponent" {int(settings["phong_exponent"])}\n')
+            f.write(f'\t"$phongboost" {round(settings["phong_boost"], 2)}\n')
             f.write('\t"$phongfresnelranges" "[0.05 0.5 1]"\n')
 
-        if prefs.enable_envmap:
+        if settings["enable_envmap"]:
+            tint = round(settings["envmap_tint"], 2)
             f.write('\n\t// Envmap\n')
             f.write('\t"$envmap" "env_cubemap"\n')
-            f.write(f'\t"$envmaptint" "[{round(prefs.envmap_tint, 2)} {round(prefs.envmap_tint, 2)} {round(prefs.envmap_tint, 2)}]"\n')
-            if bumpImg:
+            f.write(f'\t"$envmaptint" "[{tint} {tint} {tint}]"\n')
+            if bumpDir:
                 f.write('\t"$normalmapalphaenvmapmask" 1\n')
 
-        if no_cull:
+        if job.no_cull:
             f.write('\n\t"$nocull" 1\n')
 
         f.write('}')
 
-    # Create VTF
-    with open(get_save_dir() + fileNameOfPath + ".vtf", 'wb') as targetfile:
-        utils.PILToVTF(Image.open(filename + ".tga"), VTFFormats.DXT5 if is_transparent else VTFFormats.DXT1).save(targetfile)
+    # Create VTF. Materials can share a texture file, the first job to claim it encodes it.
+    vtf_path = save_dir + fileNameOfPath + ".vtf"
+    if _claim("vtf:" + vtf_path):
+        with open(vtf_path, 'wb') as targetfile:
+            utils.PILToVTF(img, VTFFormats.DXT5 if is_transparent else VTFFormats.DXT1,
+                           mip_filter=settings["mip_filter"]).save(targetfile)
+
+    outputs = [dir, vtf_path]
+
+    if bumpDir:
+        bump_vtf_path = save_dir + bumpNameWithoutExtension + ".vtf"
+        if _claim("vtf:" + bump_vtf_path):
+            # $normalmapalphaenvmapmask reads the reflection mask from the normal map's alpha
+            envmapMask = bool(settings["enable_envmap"] and job.orm)
+            if envmapMask:
+                bumpImgData = _with_envmap_mask(bumpImgData, job.orm)
+            bumpFormat = VTFFormats.RGBA8888 if is_transparent or envmapMask else VTFFormats.RGB888
+            with open(bump_vtf_path, 'wb') as targetfile:
+                utils.PILToVTF(bumpImgData, bumpFormat,
+                               mip_filter=settings["mip_filter"], srgb=False, normal_map=True).save(targetfile)
+        outputs.append(bump_vtf_path)
+
+    if cache_key:
+        manifest.record(job.texName, cache_key, outputs)
+
+    return "done"
+
+
+def _with_envmap_mask(bump, orm):
+    """Copy of a normal map carrying the ORM metallic channel as alpha, resized to the normal map."""
+    mask = Image.fromarray(get_orm_channel(orm, "metallic")).resize(bump.size, Image.BILINEAR)
+    bump = bump.convert('RGB')
+    bump.putalpha(mask)
+    return bump
+
+
+def _save_fallback(job, save_dir):
+    """Re-save an undecodable image through Blender and point the job at the copy. Main thread only."""
+    texImg = job.fallback_image
+    print(f"[UTS] Attempting to recover by saving {texImg.name} to temp TGA...")
+    try:
+        safe_name = bpy.path.clean_name(texImg.name)
+        os.makedirs(save_dir, exist_ok=True)
+        temp_path = save_dir + "temp_fallback_" + safe_name + ".tga"
+
+        texImg.save_render(filepath=temp_path)
+
+        if os.path.exists(temp_path):
+            print(f"[UTS] Successfully saved fallback to {temp_path}")
+            return job._replace(texDir=temp_path, fallback_image=None)
+    except Exception as e:
+        print(f"[UTS] Fallback save failed: {e}")
+
+    print(f"[UTS] critical failure reading texture {job.texDir}")
+    return None
+
+
+def texture_job_runner():
+    """Return run(job) -> status bound to the current settings, cache and memory budget.
+
+    Must be called from the main thread; the returned function is safe to call from workers.
+    """
+    settings = texture_settings()
+    manifest = get_texture_manifest()
+    budget = MemoryBudget(get_prefs().texture_memory_budget * 1024 * 1024)
+
+    def run(job):
+        try:
+            with span("create_texture", "texture", material=job.name):
+                return process_texture_job(job, settings, manifest, budget)
+        except Exception as e:
+            print(f"[UTS] !!! EXCEPTION in create_texture for material '{job.name}': {e}")
+            traceback.print_exc()
+            return "failed"
+
+    return run
 
-    if bumpImg:
-        with open(get_save_dir() + bumpNameWithoutExtension + ".vtf", 'wb') as targetfile:
-            utils.PILToVTF(Image.open(bumpPath), VTFFormats.RGBA8888 if is_transparent else VTFFormats.RGB888).save(targetfile)
+
+def retry_texture_fallbacks(jobs, statuses, run):
+    """Re-save through Blender the sources that could not be decoded, then retry them. Main thread."""
+    save_dir = get_save_dir()
+    for index, job in enumerate(jobs):
+        if statuses[index] == "fallback":
+            job = _save_fallback(job, save_dir)
+            statuses[index] = run(job) if job else "failed"
+
+    return statuses
+
+
+def run_texture_jobs(jobs, max_workers=None):
+    """Process texture jobs on a thread pool; decode/resize/DXT encoding release the GIL.
+
+    Jobs whose source cannot be decoded are re-saved through Blender and retried on the main thread.
+    """
+    if max_workers is None:
+        max_workers = get_prefs().worker_threads
+
+    run = texture_job_runner()
+    return retry_texture_fallbacks(jobs, run_ordered(run, jobs, max_workers), run)
+
+
+def create_texture(texImg, bumpImg, matData, aoImg=None, roughnessImg=None,
+                   metallicImg=None, color=None, asMapTexture=False,
+                   no_cull=False, is_transparent=False):
+    """Create VTF + VMT files for a single material.
+
+    aoImg/roughnessImg/metallicImg are kept for compatibility; packed channels are passed as one ORM path.
+    """
+    job = prepare_texture_job(texImg, bumpImg, matData, color, asMapTexture, no_cull, is_transparent,
+                              orm=roughnessImg or metallicImg or aoImg)
+    if job:
+        run_texture_jobs([job], max_workers=1)
@@ -0,0 +1,161 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+# Tracer of the operator running now; spans opened while it is None cost nothing
+_active = None
+
+
+class Tracer:
+    """Named, timed spans of one operator run, from any thread.
+
+    write() saves them as a Chrome trace (chrome://tracing or ui.perfetto.dev) and as a
+    summary table of the time spent per span name.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, name, category="uts", **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter(), category, **args)
+
+    def add(self, name, start, end, category="uts", **args):
+        """Record a span timed elsewhere, with perf_counter() start and end."""
+        thread = threading.current_thread()
+        with self._lock:
+            # Small thread ids keep the trace viewer's rows in creation order
+            tid = self._threads.setdefault(thread.ident, (len(self._threads) + 1, thread.name))[0]
+            self.spans.append((name, category, tid, start, end, args))
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": f"UTS {self.name}"}}]
+        for tid, thread_name in self._threads.values():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+
+        for name, category, tid, start, end, args in self.spans:
+            events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((start - self._start) * 1e6, 1),
+                "dur": round((end - start) * 1e6, 1),
+                "pid": pid,
+                "tid": tid,
+                "args": {key: str(value) for key, value in args.items()},
+            })
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def summary(self, slowest=15):
+        """Time per span name, then the slowest individual spans (with their arguments)."""
+        totals = {}
+        for name, category, tid, start, end, args in self.spans:
+            entry = totals.setdefault(name, [category, 0, 0.0, 0.0])
+            entry[1] += 1
+            entry[2] += end - start
+            entry[3] = max(entry[3], end - start)
+
+        wall = max((span[4] for span in self.spans), default=self._start) - self._start
+        lines = [f"Trace {self.name}: {len(self.spans)} spans, {wall:.2f}s",
+                 "Span\tCategory\tCount\tTotal (s)\tMean (s)\tMax (s)"]
+        for name, (category, count, total, longest) in sorted(totals.items(), key=lambda item: -item[1][2]):
+            lines.append(f"{name}\t{category}\t{count}\t{total:.3f}\t{total / count:.3f}\t{longest:.3f}")
+
+        lines += ["", "Slowest spans", "Span\tTime (s)\tStart (s)\tArguments"]
+        longest_first = sorted(self.spans, key=lambda s: s[4] - s[3], reverse=True)
+        for name, category, tid, start, end, args in longest_first[:slowest]:
+            details = ", ".join(f"{key}={value}" for key, value in args.items())
+            lines.append(f"{name}\t{end - start:.3f}\t{start - self._start:.3f}\t{details}")
+
+        return lines
+
+    def write(self, directory):
+        """Write trace_<name>.json and trace_<name>.txt to directory. Returns both paths."""
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"trace_{self.name}.json")
+        summary_path = os.path.join(directory, f"trace_{self.name}.txt")
+
+        with self._lock:
+            trace = self.chrome_trace()
+            summary = self.summary()
+
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(summary) + "\n")
+
+        return json_path, summary_path
+
+
+def start_trace(name):
+    global _active
+    _active = Tracer(name)
+    return _active
+
+
+def finish_trace(directory):
+    """Write the active trace to directory and stop tracing. Returns the written paths.
+
+    A directory that cannot be written to is reported and skipped; it never fails the caller.
+    """
+    global _active
+    tracer, _active = _active, None
+    if tracer is None:
+        return ()
+
+    try:
+        paths = tracer.write(directory)
+    except OSError as e:
+        print(f"[UTS] Cannot write trace to {directory}: {e}")
+        return ()
+    print(f"[UTS] Trace written: {paths[0]} (summary: {paths[1]})")
+    return paths
+
+
+def span(name, category="uts", **args):
+    """Time a block as a span of the active trace; no-op when no operator is traced."""
+    tracer = _active
+    if tracer is None:
+        return nullcontext()
+    return tracer.span(name, category, **args)
+
+
+def add_span(name, start, end, category="uts", **args):
+    tracer = _active
+    if tracer is not None:
+        tracer.add(name, start, end, category, **args)
+
+
+def traced(name):
+    """Decorator for Operator.execute: trace the whole run and write it to temp_path."""
+    def decorate(execute):
+        @functools.wraps(execute)
+        def wrapper(self, context):
+            tracer = start_trace(name)
+            try:
+                with tracer.span(name, "operator"):
+                    return execute(self, context)
+            finally:
+                # Tracing must not replace the operator's result or its exception
+                try:
+                    # Deferred import: the rest of this module does not need bpy
+                    from .helpers import get_prefs
+                    finish_trace(get_prefs().temp_path)
+                except Exception as e:
+                    print(f"[UTS] Trace not written: {e}")
+        return wrapper
+    return decorate
@@ -1,24 +1,21 @@
 import math
 
-from vmflib import vmf
-from vmflib.types import Origin
-from mathutils import Euler
-
 from .helpers import get_prefs
+from .vmfwriter import PropRecord
 
 
-def create_prop_entity(obj, name_common):
-    """Create a prop_static VMF entity from a Blender object."""
-    cp_prop = vmf.Entity('prop_static')
-    cp_prop.origin = Origin(obj.location.x, obj.location.y, obj.location.z)
+def model_path(name_common):
+    """Path of a compiled model, relative to the game directory, as written in prop entities."""
+    return "models/" + get_prefs().model_prefix + "/" + name_common + ".mdl"
 
-    angCopy = obj.rotation_euler.copy()
-    mat_blender = angCopy.to_matrix().to_4x4()
 
-    ang = mat_blender.to_euler('YZX')
-    ang.rotate(Euler((0, 0, math.radians(-90)), 'YZX'))
+def prop_angles(obj):
+    """'pitch yaw roll' of an object, as written in its prop entity."""
+    rot = obj.rotation_euler
+    return f'{round(math.degrees(rot[1]), 3)} {round(math.degrees(rot[2]), 3)} {round(math.degrees(rot[0]), 3)}'
 
-    cp_prop.properties['angles'] = f'{round(math.degrees(angCopy[1]), 3)} {round(math.degrees(angCopy[2]), 3)} {round(math.degrees(angCopy[0]), 3)}'
-    cp_prop.properties['model'] = "models/" + get_prefs().model_prefix + "/" + name_common + ".mdl"
 
-    return cp_prop
+def prop_record(obj, model):
+    """Compact prop_static record of a Blender object, for core.vmfwriter.VmfWriter."""
+    loc = obj.location
+    return PropRecord(loc.x, loc.y, loc.z, prop_angles(obj), model)
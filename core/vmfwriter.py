@@ -0,0 +1,73 @@
+from collections import namedtuple
+
+
+# Compact per-entity record: origin, "pitch yaw roll" string and model path
+PropRecord = namedtuple("PropRecord", ["x", "y", "z", "angles", "model"])
+
+
+def format_number(value):
+    """Shortest fixed-point form of a coordinate, to 4 decimals ("12.5", not "12.500000")."""
+    text = f"{value:.4f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+class VmfWriter:
+    """Write a VMF file entity by entity, without building the map in memory.
+
+    Entity IDs are handed out incrementally. Use as a context manager, or call close():
+    the trailing cameras/cordon blocks are written on close.
+    """
+
+    def __init__(self, path, skyname='sky_day01_01', buffer_size=1 << 20):
+        self.path = path
+        self.count = 0
+        self._next_id = 1
+        self._file = open(path, "w", buffering=buffer_size)
+        self._write_header(skyname)
+
+    def next_id(self):
+        value = self._next_id
+        self._next_id += 1
+        return value
+
+    def _write_header(self, skyname):
+        self._file.write(
+            'versioninfo\n{\n'
+            '\t"editorversion" "400"\n\t"editorbuild" "8864"\n\t"mapversion" "1"\n'
+            '\t"formatversion" "100"\n\t"prefab" "0"\n}\n'
+            'world\n{\n'
+            f'\t"id" "{self.next_id()}"\n\t"mapversion" "1"\n'
+            f'\t"classname" "worldspawn"\n\t"skyname" "{skyname}"\n}}\n'
+        )
+
+    def write_entity(self, classname, properties):
+        """Write one entity; properties is a mapping or (key, value) pairs of strings."""
+        items = properties.items() if hasattr(properties, "items") else properties
+        body = "".join(f'\t"{key}" "{value}"\n' for key, value in items)
+        self._file.write(f'entity\n{{\n\t"id" "{self.next_id()}"\n\t"classname" "{classname}"\n{body}}}\n')
+        self.count += 1
+
+    def write_prop(self, record):
+        """Write a prop_static from a PropRecord."""
+        self._file.write(
+            f'entity\n{{\n\t"id" "{self.next_id()}"\n\t"classname" "prop_static"\n'
+            f'\t"angles" "{record.angles}"\n\t"model" "{record.model}"\n'
+            f'\t"origin" "{format_number(record.x)} {format_number(record.y)} {format_number(record.z)}"\n}}\n'
+        )
+        self.count += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.write(
+            'cameras\n{\n\t"activecamera" "-1"\n}\n'
+            'cordon\n{\n\t"mins" "(-1024 -1024 -1024)"\n\t"maxs" "(1024 1024 1024)"\n\t"active" "0"\n}\n'
+        )
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,166 @@
+import math
+
+import numpy as np
+from PIL import Image
+from srctools import VTF
+from srctools.vtf import FilterMode, Frame, VTFFlags
+from srctools.vtf import ImageFormats as VTFFormats
+
+
+VTF_MAX_SIZE = 2048
+
+# Largest low-res (thumbnail) image stored in a VTF header
+LOW_RES_MAX_SIZE = 16
+
+MIP_FILTERS = ('BOX', 'KAISER', 'LANCZOS')
+
+_SRGB_TO_LINEAR = np.array(
+    [c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4 for c in np.arange(256) / 255.0],
+    dtype=np.float32,
+)
+
+
+def vtf_size(width, height):
+    """Return the VTF dimensions for an image: closest power of two, capped at VTF_MAX_SIZE."""
+    def closest_power_of_two(n):
+        return 2 ** round(math.log2(n))
+
+    return min(closest_power_of_two(width), VTF_MAX_SIZE), min(closest_power_of_two(height), VTF_MAX_SIZE)
+
+
+def _kernel(mip_filter):
+    """1D weights of a 2:1 reduction, for input taps 2j+k, returned as (first k, weights)."""
+    if mip_filter == 'BOX':
+        return 0, np.array([0.5, 0.5], dtype=np.float32)
+
+    # Taps 2j-5 .. 2j+6, at distance (k - 0.5) / 2 from the output pixel center, in output pixels
+    k = np.arange(-5, 7)
+    d = (k - 0.5) / 2
+    if mip_filter == 'LANCZOS':
+        weights = np.sinc(d) * np.sinc(d / 3)
+    elif mip_filter == 'KAISER':
+        weights = np.sinc(d) * np.i0(4.0 * np.sqrt(np.clip(1 - (d / 3) ** 2, 0, 1))) / np.i0(4.0)
+    else:
+        raise ValueError(f"Unknown mip filter {mip_filter!r}")
+
+    return int(k[0]), (weights / weights.sum()).astype(np.float32)
+
+
+def _reduce_axis(pixels, axis, first, weights):
+    """Halve one axis of a float image with a separable kernel, mirroring at the borders."""
+    size = pixels.shape[axis]
+    pad = [(0, 0)] * pixels.ndim
+    pad[axis] = (-first, len(weights) + first - 1)
+    padded = np.pad(pixels, pad, mode='symmetric') if first or len(weights) > 2 else pixels
+
+    out = None
+    for tap, weight in enumerate(weights):
+        index = [slice(None)] * pixels.ndim
+        index[axis] = slice(tap, tap + size, 2)
+        term = padded[tuple(index)] * weight
+        out = term if out is None else out + term
+    return out
+
+
+def _srgb_encode(linear):
+    linear = np.clip(linear, 0.0, 1.0)
+    srgb = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+    return srgb * 255.0
+
+
+def build_mip_chain(rgba, mip_filter='KAISER', srgb=True, normal_map=False):
+    """Return every mip level of an RGBA uint8 image, largest first, down to a 1-pixel side.
+
+    Color maps are filtered in linear light (srgb=True); normal maps are filtered as vectors
+    and renormalized at each level. Alpha is always filtered linearly.
+    """
+    first, weights = _kernel(mip_filter)
+
+    color = rgba[:, :, :3]
+    if normal_map:
+        work_rgb = color.astype(np.float32) * (2.0 / 255.0) - 1.0
+    elif srgb:
+        work_rgb = _SRGB_TO_LINEAR[color]
+    else:
+        work_rgb = color.astype(np.float32) / 255.0
+    work = np.concatenate([work_rgb, rgba[:, :, 3:].astype(np.float32) / 255.0], axis=2)
+
+    levels = [np.ascontiguousarray(rgba)]
+    while work.shape[0] > 1 and work.shape[1] > 1:
+        work = _reduce_axis(_reduce_axis(work, 0, first, weights), 1, first, weights)
+
+        rgb, alpha = work[:, :, :3], np.clip(work[:, :, 3:], 0.0, 1.0) * 255.0
+        if normal_map:
+            rgb = rgb / np.maximum(np.linalg.norm(rgb, axis=2, keepdims=True), 1e-6)
+            work = np.concatenate([rgb, work[:, :, 3:]], axis=2)
+            rgb = (rgb + 1.0) * 127.5
+        elif srgb:
+            rgb = _srgb_encode(rgb)
+        else:
+            rgb = np.clip(rgb, 0.0, 1.0) * 255.0
+
+        level = np.concatenate([rgb, alpha], axis=2)
+        levels.append(np.clip(np.rint(level), 0, 255).astype(np.uint8))
+
+    return levels
+
+
+def low_res_level(levels):
+    """The largest mip level that fits in the VTF low-res thumbnail."""
+    for level in levels:
+        if level.shape[0] <= LOW_RES_MAX_SIZE and level.shape[1] <= LOW_RES_MAX_SIZE:
+            return level
+    return levels[-1]
+
+
+class FilteredVTF(VTF):
+    """VTF that keeps a low-res thumbnail computed by build_mip_chain.
+
+    VTF.save() calls compute_mipmaps(), which rescales the thumbnail from a mip level with
+    srctools' bilinear filter; the supplied thumbnail is copied back after that pass.
+    """
+    low_res_pixels = None
+
+    def set_low_res(self, level):
+        """Use an RGBA uint8 array (at most LOW_RES_MAX_SIZE per side) as the thumbnail."""
+        # srctools has no public setter for the thumbnail frame, and save() writes its size
+        # in the header before computing the mipmaps
+        self._low_res = Frame(level.shape[1], level.shape[0])
+        self.low_res_pixels = np.ascontiguousarray(level).tobytes()
+        self._low_res.copy_from(self.low_res_pixels)
+
+    def compute_mipmaps(self, filter=FilterMode.BILINEAR):
+        super().compute_mipmaps(filter)
+        if self.low_res_pixels is not None:
+            self._low_res.copy_from(self.low_res_pixels)
+
+
+def image_to_vtf(img, fmt, mip_filter=None, srgb=True, normal_map=False):
+    """Convert a PIL Image to a VTF texture, resizing to the closest power of two.
+
+    With a mip_filter ('BOX', 'KAISER' or 'LANCZOS') every mip level and the low-res
+    thumbnail are computed here before encoding; otherwise srctools derives them on save.
+    """
+    new_width, new_height = vtf_size(img.width, img.height)
+
+    if new_width != img.width or new_height != img.height:
+        print(f"[UTS] Resizing texture from {img.width}x{img.height} to {new_width}x{new_height}")
+        img = img.resize((new_width, new_height), Image.LANCZOS)
+
+    v = FilteredVTF(img.width, img.height, frames=1, fmt=fmt, version=(7, 4), flags=VTFFlags.EIGHTBITALPHA)
+
+    if fmt == VTFFormats.DXT5:
+        v.flags = VTFFlags.EIGHTBITALPHA
+
+    rgba = img.convert('RGBA')
+    if not mip_filter:
+        v.get(frame=0).copy_from(rgba.tobytes())
+        return v
+
+    levels = build_mip_chain(np.asarray(rgba), mip_filter, srgb, normal_map)
+    for mipmap, level in enumerate(levels[:v.mipmap_count]):
+        v.get(frame=0, mipmap=mipmap).copy_from(level.tobytes())
+
+    v.set_low_res(low_res_level(levels))
+
+    return v
@@ -1,15 +1,20 @@
 import os
-import math
-import subprocess
+import time
 
 import bpy
 import bmesh
 import mathutils
-from bpy.props import IntProperty
+import numpy as np
+from bpy.props import BoolProperty, IntProperty
 from os import path as os_path
 
 from .. import utils
+from ..core.coacd import CoacdJob, geometry_key, get_coacd_cache, run_coacd_jobs
 from ..core.helpers import get_prefs
+from ..core.mesh import evaluated_triangles, write_obj
+from ..core.obb import fit_obb_job
+from ..core.pool import run_ordered
+from ..core.trace import span, traced
 
 
 class UTS_OT_CreateCollisions(bpy.types.Operator):
@@ -55,6 +60,7 @@ class UTS_OT_CreateCollisions(bpy.types.Operator):
         max=2048,
     )
 
+    @traced("create_collisions")
     def execute(self, context):
         print('[UTS] Call collisions with ', len(bpy.data.objects), ' objects')
         selected = bpy.context.selected_objects
@@ -90,6 +96,17 @@ class UTS_OT_CreateCollisions(bpy.types.Operator):
                 if "data" in obj:
                     obj.data.rename(obj.name)
 
+        params = {
+            "threshold": 0.03,
+            "prep_resolution": self.prep_resolution,
+            "mcts_iteration": self.mcts_iteration,
+            "mcts_depth": self.mcts_depth,
+            "convex_hull": self.convex_hull,
+        }
+        cache = get_coacd_cache()
+        depsgraph = context.evaluated_depsgraph_get()
+        jobs = {}
+
         # Create collision
         markForCreation = []
         for ob in selected:
@@ -134,59 +151,74 @@ class UTS_OT_CreateCollisions(bpy.types.Operator):
                         bpy.data.objects.remove(obj)
             else:
                 filename = ''.join(c for c in ob.name if c.isalnum() or c in (' ', '.', '_')).rstrip()
-                obj_filename = os_path.join(directory, f'{filename}.obj')
-                out = os_path.join(directory, f'{filename}_out.obj')
 
-                bpy.ops.object.select_all(action='DESELECT')
-                ob.select_set(True)
-                bpy.context.view_layer.objects.active = ob
-                bpy.ops.wm.obj_export(filepath=obj_filename, export_selected_objects=True)
-                markForCreation.append([ob, obj_filename, out, filename])
+                # Local-space geometry, so identical meshes hit the same cache entry wherever they are placed
+                with span("obj export", "obj", object=ob.name):
+                    coords, triangles = evaluated_triangles(ob, depsgraph)
+                    key = geometry_key(coords, triangles, params)
+
+                    if cache.get(key):
+                        print(f"[UTS] CoACD cache hit for {ob.name}")
+                    elif key not in jobs:
+                        obj_filename = os_path.join(directory, f'{filename}.obj')
+                        out = os_path.join(directory, f'{filename}_out.obj')
+                        write_obj(obj_filename, coords, triangles)
+                        jobs[key] = CoacdJob(filename, obj_filename, out, params)
+
+                markForCreation.append([ob, filename, key])
 
-        print("[UTS] Mark for creation:", len(markForCreation))
+        print("[UTS] Mark for creation:", len(markForCreation), "-", len(jobs), "decompositions to run")
 
         if len(markForCreation) > 0:
-            for i in markForCreation:
-                (ob, obj_filename, out, fileName) = i
-                p = subprocess.Popen([prefs.coacd_path,
-                                      "-i", obj_filename,
-                                      "-o", out,
-                                      "-t", "0.03",
-                                      "-pr", str(self.prep_resolution),
-                                      "-mi", str(self.mcts_iteration),
-                                      "-md", str(self.mcts_depth),
-                                      "-c", str(self.convex_hull),
-                                      "-mn", "30",
-                                      "-d",
-                                      "--max-ch-vertex", "128"])
-
-                p.communicate()
-                p.wait()
-
-            for (ob, obj_filename, out, filename) in markForCreation:
-                if len(bpy.context.selected_objects) == 0:
+            # Decompositions run in parallel; the Blender import below stays on the main thread
+            keys = list(jobs)
+            with span("coacd jobs", "stage", decompositions=len(keys)):
+                results = run_coacd_jobs(prefs.coacd_path, [jobs[k] for k in keys], prefs.coacd_workers,
+                                         prefs.coacd_memory_budget)
+
+            for key, result in zip(keys, results):
+                job = jobs[key]
+                if result.returncode == 0 and os_path.exists(job.out):
+                    cache.put(key, job.out)
+                else:
+                    print(f"[UTS] CoACD failed for {job.name} (exit {result.returncode}):\n{result.output[-2000:]}")
+
+                # Delete the obj files, the result now lives in the cache
+                for i in [f'{job.name}.obj', f'{job.name}_out.obj', f'{job.name}.mtl', f'{job.name}_out.mtl']:
+                    path = os_path.join(directory, i)
+                    if os_path.exists(path):
+                        os.remove(path)
+
+            for (ob, filename, key) in markForCreation:
+                out = cache.get(key)
+                if not out:
                     continue
 
-                bpy.ops.wm.obj_import(filepath=out)
+                with span("import", "import", object=ob.name):
+                    bpy.ops.object.select_all(action='DESELECT')
 
-                bpy.context.scene.cursor.location = ob.location
-                bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
+                    # The hull set is stored in the mesh's local space, move it back into place
+                    bpy.ops.wm.obj_import(filepath=out, forward_axis='Y', up_axis='Z')
+                    if len(bpy.context.selected_objects) == 0:
+                        continue
 
-                bpy.ops.object.join()
+                    for hull in bpy.context.selected_objects:
+                        hull.data.transform(ob.matrix_world)
 
-                bpy.ops.object.shade_smooth()
-                bpy.context.selected_objects[0].rename(filename + '_collision')
+                    bpy.context.scene.cursor.location = ob.location
+                    bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
 
-                if "data" in bpy.context.selected_objects[0]:
-                    bpy.context.selected_objects[0].data.rename(bpy.context.selected_objects[0].name)
+                    bpy.ops.object.join()
 
-                # Delete the obj file and the mdl file
-                for i in [f'{filename}.obj', f'{filename}_out.obj', f'{filename}.mtl', f'{filename}_out.mtl']:
-                    path = os_path.join(directory, i)
-                    if os_path.exists(path):
-                        os.remove(path)
+                    bpy.ops.object.shade_smooth()
+                    bpy.context.selected_objects[0].rename(filename + '_collision')
+
+                    if "data" in bpy.context.selected_objects[0]:
+                        bpy.context.selected_objects[0].data.rename(bpy.context.selected_objects[0].name)
 
-                print('[UTS] Created collision CoACD: ', bpy.context.selected_objects[0].name)
+                    print('[UTS] Created collision CoACD: ', bpy.context.selected_objects[0].name)
+
+        cache.save()
 
         return {'FINISHED'}
 
@@ -207,10 +239,49 @@ class UTS_OT_CreateCollisions(bpy.types.Operator):
         col = layout.column()
         col.label(text='WARNING:', icon='ERROR')
         col.label(text='  Processing can take several minutes per object!')
-        col.label(text='  ALL selected objects will be processed sequentially!')
+        col.label(text='  ALL selected objects will be processed in parallel')
+        col.label(text='  (max. processes and memory set in the add-on preferences)!')
         col.label(text='  See Console Window for progress...')
 
 
+# Above this many objects the OBB fits are spread over worker processes instead of threads
+_OBB_PROCESS_POOL_MIN_OBJECTS = 256
+
+
+def _hull_job(obj):
+    """Convex hull of an object as plain arrays in world space, centered on the object origin."""
+    bm = bmesh.new()
+    bm.from_mesh(obj.data)
+    ret = bmesh.ops.convex_hull(bm, input=bm.verts)
+    bm.normal_update()
+
+    hull_faces = [elem for elem in ret['geom'] if isinstance(elem, bmesh.types.BMFace)]
+    face_index = {face: i for i, face in enumerate(hull_faces)}
+    hull_verts = list({v for face in hull_faces for v in face.verts})
+    vert_index = {v: i for i, v in enumerate(hull_verts)}
+
+    edges, edge_faces = [], []
+    for edge in {e for face in hull_faces for e in face.edges}:
+        linked = [face_index[f] for f in edge.link_faces if f in face_index]
+        if len(linked) == 2:
+            edges.append((vert_index[edge.verts[0]], vert_index[edge.verts[1]]))
+            edge_faces.append(linked)
+
+    coords = np.array([v.co for v in hull_verts], dtype=np.float64).reshape(-1, 3)
+    normals = np.array([face.normal for face in hull_faces], dtype=np.float64).reshape(-1, 3)
+    bm.free()
+
+    matrix = np.array(obj.matrix_world)
+    rot_scale = matrix[:3, :3]
+    points = coords @ rot_scale.T
+
+    # Normals transform with the inverse transpose, so they stay outward under non-uniform scale
+    normals = normals @ np.linalg.inv(rot_scale)
+    normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+
+    return obj.name, points, normals, np.array(edges, dtype=np.int64), np.array(edge_faces, dtype=np.int64)
+
+
 class UTS_OT_CreateOOB(bpy.types.Operator):
     bl_idname = "uts.create_oob"
     bl_label = "UTS: OOB"
@@ -218,191 +289,34 @@ class UTS_OT_CreateOOB(bpy.types.Operator):
 
     addLayout = 'VIEW3D_MT_object'
 
+    use_selection: BoolProperty(
+        name="use_selection",
+        description="Generer une boite pour chaque mesh selectionne (sinon uniquement l'objet actif)",
+        default=True,
+    )
+
     @classmethod
     def poll(cls, context):
         return context.mode == 'OBJECT'
 
-    def execute(self, context):
-        def convex_hull_world(obj):
-            bm = bmesh.new()
-            bm.from_mesh(obj.data)
-            ret = bmesh.ops.convex_hull(bm, input=bm.verts)
-            hull_faces = [elem for elem in ret['geom'] if isinstance(elem, bmesh.types.BMFace)]
-            hull_verts = list({v for v in bm.verts if v.select})
-            hull_points = [obj.matrix_world @ v.co for v in hull_verts]
-
-            hull_faces_data = []
-            for face in hull_faces:
-                local_normal = face.normal.copy()
-                world_normal = obj.matrix_world.to_3x3() @ local_normal
-                world_normal.normalize()
-                face_verts_world = [obj.matrix_world @ v.co for v in face.verts]
-                hull_faces_data.append({'normal': world_normal, 'verts': face_verts_world})
-
-            bm.free()
-            return hull_points, hull_faces_data
-
-        def convex_hull_2d(points):
-            points = sorted(set(points))
-            if len(points) <= 1:
-                return points
-            lower = []
-            for p in points:
-                while len(lower) >= 2 and (
-                        (lower[-1][0] - lower[-2][0]) * (p[1] - lower[-2][1]) - (lower[-1][1] - lower[-2][1]) * (
-                        p[0] - lower[-2][0])) <= 0:
-                    lower.pop()
-                lower.append(p)
-            upper = []
-            for p in reversed(points):
-                while len(upper) >= 2 and (
-                        (upper[-1][0] - upper[-2][0]) * (p[1] - upper[-2][1]) - (upper[-1][1] - upper[-2][1]) * (
-                        p[0] - upper[-2][0])) <= 0:
-                    upper.pop()
-                upper.append(p)
-            return lower[:-1] + upper[:-1]
-
-        obj = bpy.context.active_object
-        if obj is None or obj.type != 'MESH':
-            print("Veuillez selectionner un objet de type Mesh.")
-            return {'CANCELLED'}
+    def _create_box(self, obj, center, axes, half_extents):
+        """Box object sharing obj's transform, its corners exactly on the fitted world-space OBB.
 
-        hull_points, hull_faces_data = convex_hull_world(obj)
-        origin = obj.matrix_world.translation.copy()
-        hull_points_centered = [p - origin for p in hull_points]
-        hull_faces_data_centered = []
-        for face_data in hull_faces_data:
-            shifted = [v - origin for v in face_data['verts']]
-            hull_faces_data_centered.append({'normal': face_data['normal'], 'verts': shifted})
-
-        best_volume = float('inf')
-        best_params = None
-        candidate_normals = []
-
-        for face_data in hull_faces_data_centered:
-            n = face_data['normal'].copy()
-            skip = False
-            for cn in candidate_normals:
-                if abs(n.dot(cn)) > 0.999:
-                    skip = True
-                    break
-            if skip:
-                continue
-            candidate_normals.append(n.copy())
+        The corners are no longer rotated by the former box-to-object rotation delta, which
+        turned them about the world origin and moved the box off the mesh whenever the fitted
+        axes differed from the object's (even by an axis swap).
+        """
+        origin = mathutils.Vector(obj.matrix_world.translation)
 
-            verts = face_data['verts']
-            if len(verts) < 2:
-                continue
-            v0 = verts[0]
-            v1 = verts[1]
-            u = (v1 - v0)
-            u = u - n * u.dot(n)
-            if u.length < 1e-6:
-                continue
-            u.normalize()
-            v = n.cross(u)
-            v.normalize()
-
-            pts_candidate = []
-            for p in hull_points_centered:
-                a = p.dot(u)
-                b = p.dot(v)
-                c = p.dot(n)
-                pts_candidate.append((a, b, c))
-            pts_2d = [(a, b) for (a, b, c) in pts_candidate]
-            zs = [c for (a, b, c) in pts_candidate]
-            min_z = min(zs)
-            max_z = max(zs)
-
-            hull_2d = convex_hull_2d(pts_2d)
-            if len(hull_2d) < 2:
-                continue
-
-            for i in range(len(hull_2d)):
-                j = (i + 1) % len(hull_2d)
-                p_i = hull_2d[i]
-                p_j = hull_2d[j]
-                edge_dx = p_j[0] - p_i[0]
-                edge_dy = p_j[1] - p_i[1]
-                angle = math.atan2(edge_dy, edge_dx)
-                cos_angle = math.cos(angle)
-                sin_angle = math.sin(angle)
-                rotated = []
-                for (a, b) in pts_2d:
-                    x_rot = cos_angle * a + sin_angle * b
-                    y_rot = -sin_angle * a + cos_angle * b
-                    rotated.append((x_rot, y_rot))
-                xs = [p[0] for p in rotated]
-                ys = [p[1] for p in rotated]
-                min_x = min(xs)
-                max_x = max(xs)
-                min_y = min(ys)
-                max_y = max(ys)
-                width = max_x - min_x
-                height = max_y - min_y
-                depth = max_z - min_z
-                volume = width * height * depth
-                if volume < best_volume:
-                    best_volume = volume
-                    best_params = {
-                        'u': u.copy(),
-                        'v': v.copy(),
-                        'n': n.copy(),
-                        'angle': angle,
-                        'min_x': min_x,
-                        'max_x': max_x,
-                        'min_y': min_y,
-                        'max_y': max_y,
-                        'min_z': min_z,
-                        'max_z': max_z
-                    }
-
-        if best_params is None:
-            print("Aucune boite trouvee.")
-            return {'CANCELLED'}
-
-        u = best_params['u']
-        v = best_params['v']
-        n = best_params['n']
-        angle = best_params['angle']
-        cos_angle = math.cos(angle)
-        sin_angle = math.sin(angle)
-        u_rot = u * cos_angle - v * sin_angle
-        v_rot = u * sin_angle + v * cos_angle
-
-        min_x = best_params['min_x']
-        max_x = best_params['max_x']
-        min_y = best_params['min_y']
-        max_y = best_params['max_y']
-        min_z = best_params['min_z']
-        max_z = best_params['max_z']
-
-        center_candidate = mathutils.Vector(((min_x + max_x) / 2,
-                                             (min_y + max_y) / 2,
-                                             (min_z + max_z) / 2))
-        half_extents = mathutils.Vector(((max_x - min_x) / 2,
-                                         (max_y - min_y) / 2,
-                                         (max_z - min_z) / 2))
-
-        corners_candidate = []
-        for dx in (-half_extents.x, half_extents.x):
-            for dy in (-half_extents.y, half_extents.y):
-                for dz in (-half_extents.z, half_extents.z):
-                    corner = mathutils.Vector((center_candidate.x + dx,
-                                               center_candidate.y + dy,
-                                               center_candidate.z + dz))
-                    corners_candidate.append(corner)
-
-        corners_world = [u_rot * corner.x + v_rot * corner.y + n * corner.z for corner in corners_candidate]
-        corners_world = [pt + origin for pt in corners_world]
-
-        R_candidate = mathutils.Matrix((u_rot, v_rot, n)).to_quaternion()
-        R_obj = obj.matrix_world.to_quaternion()
-        delta = R_candidate @ R_obj.inverted()
-        corners_corrected = [delta.inverted() @ pt for pt in corners_world]
+        corners_world = []
+        for dx in (-half_extents[0], half_extents[0]):
+            for dy in (-half_extents[1], half_extents[1]):
+                for dz in (-half_extents[2], half_extents[2]):
+                    corner = center + axes[0] * dx + axes[1] * dy + axes[2] * dz
+                    corners_world.append(origin + mathutils.Vector(corner))
 
         mat_inv = obj.matrix_world.inverted()
-        corners_local = [mat_inv @ pt for pt in corners_corrected]
+        corners_local = [mat_inv @ pt for pt in corners_world]
 
         faces = [
             (0, 1, 3, 2),
@@ -419,14 +333,50 @@ class UTS_OT_CreateOOB(bpy.types.Operator):
         obj_box = bpy.data.objects.new(obj.name + "_collision", mesh_box)
         obj_box.matrix_world = obj.matrix_world.copy()
         bpy.context.collection.objects.link(obj_box)
+        obj_box.rename(obj.name + '_collision')
+
+        return obj_box
+
+    def execute(self, context):
+        objects = []
+        if self.use_selection:
+            objects = [o for o in context.selected_objects if o.type == 'MESH' and not o.name.endswith("_collision")]
+
+        if not objects:
+            obj = bpy.context.active_object
+            if obj is None or obj.type != 'MESH':
+                print("Veuillez selectionner un objet de type Mesh.")
+                return {'CANCELLED'}
+            objects = [obj]
+
+        start = time.perf_counter()
+
+        # Hulls are read on the main thread (bmesh), the box search runs in the pool
+        jobs = [_hull_job(obj) for obj in objects]
+        results = run_ordered(fit_obb_job, jobs, get_prefs().worker_threads,
+                              processes=len(jobs) >= _OBB_PROCESS_POOL_MIN_OBJECTS)
+
+        boxes = []
+        for obj, (name, result) in zip(objects, results):
+            if result is None:
+                print("Aucune boite trouvee pour", obj.name)
+                continue
+
+            center, axes, half_extents, volume = result
+            boxes.append(self._create_box(obj, center, axes, half_extents))
+            print("[UTS] OBB generated for", obj.name, ", volume =", volume)
+
+        if not boxes:
+            print("Aucune boite trouvee.")
+            return {'CANCELLED'}
 
         bpy.ops.object.select_all(action='DESELECT')
-        obj_box.select_set(True)
-        bpy.context.view_layer.objects.active = obj_box
+        for obj_box in boxes:
+            obj_box.select_set(True)
+        bpy.context.view_layer.objects.active = boxes[0]
 
         bpy.ops.object.shade_smooth()
-        bpy.context.selected_objects[0].rename(obj.name + '_collision')
         bpy.ops.object.origin_set(type='GEOMETRY_ORIGIN', center='MEDIAN')
-        print("[UTS] OBB generated, volume =", best_volume)
+        print(f"[UTS] {len(boxes)} OBB generated in {time.perf_counter() - start:.2f}s")
 
         return {'FINISHED'}
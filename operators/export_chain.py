@@ -1,17 +1,30 @@
-import concurrent.futures
 import math
 import os
-import re
 import subprocess
 
 import bpy
 from bpy.props import BoolProperty, EnumProperty
-from vmflib import vmf
 
 from .. import utils
+from ..core.chunk import ChunkItem, ChunkMonitor, plan_chunks
 from ..core.helpers import get_prefs
-from ..core.model import run_process
-from ..core.vmf import create_prop_entity
+from ..core.journal import Journal
+from ..core.lod import export_model_smds, plan_model_lods, triangle_count
+from ..core.lodplan import LodLevel
+from ..core.mesh import mesh_fingerprint
+from ..core.model import (IDLE_SMD, build_qc, get_build_manifest, get_studiomdl_command, model_fingerprint,
+                          model_output_paths, model_smd_paths, run_command, write_compile_report, write_if_changed)
+from ..core.partition import write_partitioned_vmf
+from ..core.pipeline import Pipeline
+from ..core.scene import (StepTimer, export_name, objects_outside_view_layer, prepare_models, prepare_objects,
+                          remove_objects)
+from ..core.smd import write_object_smd
+from ..core.texture import (get_texture_manifest, retry_texture_fallbacks, save_texture_manifest,
+                            texture_job_key, texture_job_runner, texture_settings)
+from ..core.trace import span, traced
+from ..core.vmf import model_path, prop_record
+from ..core.vmfwriter import VmfWriter
+from .texture_export import resolve_texture_jobs
 import io_scene_valvesource.utils
 
 
@@ -51,6 +64,11 @@ class UTS_OT_ExportChain(bpy.types.Operator):
         description="Exportation des materiaux",
     )
 
+    resume: BoolProperty(
+        name="resume",
+        description="Reprendre l'export precedent : ignorer les SMD, QC, VTF et MDL deja termines et inchanges",
+    )
+
     def invoke(self, context, event):
         wm = context.window_manager
         return wm.invoke_props_dialog(self, width=400)
@@ -68,6 +86,8 @@ class UTS_OT_ExportChain(bpy.types.Operator):
         col.prop(self, "output_vmf")
         col.prop(self, "export_materials")
         col.prop(self, "export_models")
+        col.separator()
+        col.prop(self, "resume")
         layout.separator()
         col = layout.column()
 
@@ -76,13 +96,26 @@ class UTS_OT_ExportChain(bpy.types.Operator):
             return True
         return obj.name.split(".")[0] in user_selected_names
 
+    @traced("export_chain")
     def execute(self, context):
+        # Blender stages run on this thread, one at a time; texture encoding and studiomdl
+        # run as background stages and overlap with them. Leaving the block on an error
+        # stops those threads.
+        with Pipeline() as pipeline:
+            return self._export(context, pipeline)
+
+    def _export(self, context, pipeline):
         prefs = get_prefs()
         original_scene_name = bpy.context.scene.name
 
         os.makedirs(prefs.temp_path, exist_ok=True)
         os.makedirs(prefs.temp_path_models, exist_ok=True)
 
+        pipeline.main_stage("prepare")
+
+        # Checkpoints of completed SMDs, QCs, VTFs and MDLs, written as they complete
+        journal = Journal(os.path.join(prefs.temp_path, "export_journal.jsonl"), resume=self.resume)
+
         utils.clearCollections()
 
         if self.export_mode == 'SELECTED':
@@ -97,194 +130,245 @@ class UTS_OT_ExportChain(bpy.types.Operator):
         else:
             user_selected_names = None
 
+        # Scene preparation works on the data API: no selection, no operator call per object
+        prepareTimer = StepTimer()
+
         if bpy.context.mode != 'OBJECT':
             bpy.ops.object.mode_set(mode='OBJECT')
 
         # Clear objects not in viewlayer (only in ALL mode to avoid destroying selected objects)
         if user_selected_names is None:
-            objects_to_delete = [obj for obj in bpy.context.scene.objects if obj.name not in bpy.context.view_layer.objects]
-            bpy.ops.object.select_all(action='DESELECT')
-            for obj in objects_to_delete:
-                obj.select_set(True)
-
-            bpy.ops.object.delete()
+            with prepareTimer.step("view layer filter"):
+                removed = remove_objects(objects_outside_view_layer(bpy.context.scene, bpy.context.view_layer))
+            print(f"[UTS] {removed} objects outside the view layer removed")
 
         if self.prepare_forexport:
-            utils.clearMaterialsNames()
-            bpy.context.view_layer.update()
-
-            bpy.ops.object.select_all(action='DESELECT')
-            listObjects = []
-
-            for obj in bpy.data.objects:
-                if not self._should_include(obj, user_selected_names):
-                    continue
-                if obj.type == 'MESH' and obj.name.find("Replaced") == -1 or (obj.name.find("col") != -1 and obj.name.find("collision") == -1)\
-                        or not obj.name in bpy.context.view_layer.objects or obj.hide_render or obj.hide_get():
-                    listObjects.append(obj)
-
-            count = 0
-            for obj in listObjects:
-                count += 1
-                print("Deleting object: " + str(count) + "/" + str(len(listObjects)))
+            with prepareTimer.step("materials"):
+                utils.clearMaterialsNames()
+                bpy.context.view_layer.update()
 
-            bpy.ops.outliner.orphans_purge()
-            for material in bpy.data.materials:
-                if not material.users:
-                    bpy.data.materials.remove(material)
+                bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True)
+                for material in bpy.data.materials:
+                    if not material.users:
+                        bpy.data.materials.remove(material)
 
             print("Materials cleared")
 
-            bpy.ops.object.make_local(type='ALL')
-            bpy.ops.object.select_all(action='SELECT')
-            bpy.ops.object.origin_set(type='ORIGIN_GEOMETRY', center='BOUNDS')
-            print("Origin geometry centered")
-
-            copyObjects = [obj for obj in bpy.data.objects if self._should_include(obj, user_selected_names)]
-            for obj in copyObjects:
-                if obj.type != 'MESH':
-                    continue
-                if obj.name.endswith("_collision") and not self.output_vmf:
-                    continue
-
-                name_common = obj.name.split(".")[0].replace("_Replaced", "")
-                name_common = re.sub(r'[^\w\-]', '_', name_common)
+            with prepareTimer.step("make local"):
+                bpy.ops.object.make_local(type='ALL')
 
-                obj.rename(name_common)
+        prepared = prepare_objects(bpy.data.objects, lambda obj: self._should_include(obj, user_selected_names),
+                                   prepareTimer, rename=self.prepare_forexport, rename_collisions=self.output_vmf,
+                                   center=self.prepare_forexport)
 
-        # Store world positions before any deduplication/transform
-        world_origins = {}
-        for obj in bpy.data.objects:
-            if obj.type == 'MESH':
-                world_origins[obj.name.split(".")[0]] = obj.location.copy()
-
-        modelsData = {}
-        m = vmf.ValveMap()
+        # Stored before any transform of the export stage
+        world_origins = {export_name(name): origin for name, origin in prepared.origins.items()}
+        modelsData = prepared.models
+        # Removed once their prop entities are written
+        nameDuplicates = prepared.duplicates if user_selected_names is None else []
         copyObjects = [obj for obj in bpy.data.objects if self._should_include(obj, user_selected_names)]
 
-        for obj in copyObjects:
-            name_common = obj.name.split(".")[0]
+        # Models with identical geometry, UVs, materials and collision are compiled once;
+        # the other names become instances of it
+        instances = {}
+        if self.export_models or self.output_vmf:
+            depsgraph = bpy.context.evaluated_depsgraph_get()
+            canonical = {}
 
-            if self.output_vmf:
-                create_prop_entity(obj, name_common)
+            for name_common in sorted(modelsData):
+                obj = modelsData[name_common]
+                if obj.type != 'MESH' or name_common.endswith("_collision"):
+                    continue
 
-            if name_common not in modelsData:
-                modelsData[name_common] = obj
-                obj.rename(name_common)
-            elif user_selected_names is None:
-                bpy.data.objects.remove(obj, do_unlink=True)
+                key = mesh_fingerprint(obj, depsgraph, bpy.data.objects.get(name_common + "_collision"))
+                # Keyed by the names prepare_models() gives the models, also when the scene was
+                # not prepared for export (names with spaces or other characters studiomdl rejects)
+                model = export_name(name_common)
+                if key in canonical:
+                    instances[model] = canonical[key]
+                else:
+                    canonical[key] = model
+
+            print(f"[UTS] Instancing: {len(instances)} models share the MDL of an identical model "
+                  f"({len(canonical)} unique)")
 
-        print("Pre-process done")
         if self.output_vmf:
+            pipeline.main_stage("vmf")
             vmf_output = os.path.join(prefs.temp_path, "output_uts.vmf")
-            m.write_vmf(vmf_output)
+            models = {}
+
+            def prop_records():
+                for obj in copyObjects:
+                    name_common = export_name(obj.name)
+                    if obj.type != 'MESH' or name_common.endswith("_collision"):
+                        continue
+                    if name_common not in models:
+                        models[name_common] = model_path(instances.get(name_common, name_common))
+                    yield prop_record(obj, models[name_common])
+
+            if prefs.vmf_partition == 'NONE':
+                # Entities are streamed to the file as objects are visited
+                with VmfWriter(vmf_output) as writer:
+                    for record in prop_records():
+                        writer.write_prop(record)
+
+                print(f"[UTS] VMF written: {vmf_output} ({writer.count} props)")
+            else:
+                cells = write_partitioned_vmf(vmf_output, list(prop_records()), prefs.vmf_partition,
+                                              prefs.vmf_cell_size, prefs.vmf_cell_budget)
+                print(f"[UTS] VMF written: {vmf_output} ({sum(count for path, count in cells)} props "
+                      f"in {len(cells)} func_instance cells)")
+
+        for obj in nameDuplicates:
+            bpy.data.objects.remove(obj, do_unlink=True)
+
+        print("Pre-process done")
 
         if self.export_materials:
+            pipeline.main_stage("materials")
             for material in bpy.data.materials:
                 if not material.users:
                     bpy.data.materials.remove(material)
 
-            bpy.ops.object.select_all(action='SELECT')
-            bpy.ops.uts.ue_texture_export()
-
-        if self.export_models:
-            print("Start: Export Models")
-            copyObjects = [obj for obj in bpy.data.objects if self._should_include(obj, user_selected_names)]
-            selected = []
-            bpy.ops.object.select_all(action='DESELECT')
-
-            for ob in copyObjects:
-                if ob.name + "_collision" in copyObjects:
-                    ob2 = copyObjects[ob.name + "_collision"]
-
-                    if ob.rotation_euler != ob2.rotation_euler:
-                        print("not same")
-
-            clearedAngles = {}
-
-            for ob in copyObjects:
-                if ob.name.find("_collision") == -1 and ob.name.find("convex_") == -1:
-                    clearedAngles[ob.name] = ob.rotation_euler.copy()
-                else:
-                    ob.select_set(True)
-
-            bpy.ops.object.select_all(action='DESELECT')
-
-            print("Start Renaming")
-            c = 0
-
-            for ob in copyObjects:
-                if ob.name not in bpy.context.view_layer.objects:
-                    continue
-                if not (ob.hide_render or ob.hide_get()) and ob.name.find("_collision") == -1 and ob.name.find(
-                        "convex_") == -1:
-                    ob.select_set(True)
-                    bpy.context.view_layer.objects.active = ob
-
-            if bpy.context.view_layer.objects.active and bpy.context.view_layer.objects.active.type == 'MESH':
-                bpy.ops.object.mode_set(mode='EDIT')
-                bpy.ops.mesh.select_all(action='SELECT')
-                bpy.ops.object.mode_set(mode='OBJECT')
-            bpy.ops.object.select_all(action='DESELECT')
-
-            for ob in copyObjects:
-                c = c + 1
-                if ob.name not in bpy.context.view_layer.objects:
-                    continue
-                clean_name = ob.name.split(".")[0]
-                clean_name = re.sub(r'[^\w\-]', '_', clean_name)
-                ob.rename(clean_name)
-                if ob.data:
-                    ob.data.rename(clean_name)
-
-                print("Fix Angles Progress: ", c, len(copyObjects))
-
-                if not (ob.hide_render or ob.hide_get()) and ob.name.find("_collision") == -1 and ob.name.find(
-                        "convex_") == -1:
-                    ob.rotation_euler = (0, 0, math.radians(-90))
+            textureJobs, newImgs = resolve_texture_jobs()
+            runTexture = texture_job_runner()
+            textureManifest = get_texture_manifest()
+            textureSettings = texture_settings()
 
-                    if (ob.name + "_collision") in bpy.data.objects:
-                        bpy.data.objects[ob.name + "_collision"].rotation_euler = (0, 0, math.radians(-90))
+            def texture_job(job):
+                unit = "material:" + job.texName
+                # Keyed like the mdl stage, so changed shader or mip settings re-encode the texture
+                key = texture_job_key(job, textureSettings)
+                if journal.is_done(unit, "vtf", key):
+                    return "resumed"
 
-                    selected.append(ob.name)
-                    bpy.context.view_layer.objects.active = ob
-                    ob.select_set(True)
+                status = runTexture(job)
+                outputs = textureManifest.entries.get(job.texName, {}).get("outputs")
+                if status in ("done", "cached") and outputs:
+                    journal.record(unit, "vtf", outputs, key)
+                return status
 
-            bpy.ops.object.select_all(action='DESELECT')
-            selected = []
-            copyObjects = [obj for obj in bpy.data.objects if self._should_include(obj, user_selected_names)]
+            pipeline.add_stage("textures", texture_job, prefs.worker_threads)
+            pipeline.feed("textures", textureJobs)
 
-            for ob in copyObjects:
-                if ob.name not in bpy.context.view_layer.objects:
-                    continue
-                if not (ob.hide_render or ob.hide_get()) and ob.name.find("_collision") == -1 and ob.name.find("convex_") == -1:
-                    selected.append(ob.name)
+        if self.export_models:
+            pipeline.main_stage("smd")
+            print("Start: Export Models")
+            with prepareTimer.step("model names / rotation"):
+                copyObjects = [obj for obj in bpy.data.objects if self._should_include(obj, user_selected_names)]
+                selected = prepare_models(copyObjects, bpy.context.view_layer, exclude=instances)
 
             print('[UTS] Exporting ', len(selected), ' models...')
 
-            chunks = []
-            buffer = []
+            # Chunks are packed by evaluated triangle count and estimated memory; objects
+            # sharing a mesh datablock stay in the same chunk
+            depsgraph = bpy.context.evaluated_depsgraph_get()
+            chunkItems = []
 
             for obj in bpy.data.objects:
                 if not self._should_include(obj, user_selected_names):
                     continue
-                if obj.name.endswith("_collision"):
+                if obj.name.endswith("_collision") or obj.name in instances:
                     continue
 
-                if len(buffer) > 200:
-                    chunks.append(buffer)
-                    buffer = []
-
-                buffer.append(obj.name)
-
+                members = [obj]
                 if obj.name + "_collision" in bpy.data.objects:
-                    buffer.append(obj.name + "_collision")
+                    members.append(bpy.data.objects[obj.name + "_collision"])
 
-            chunks.append(buffer)
+                triangles = sum(triangle_count(o, depsgraph) for o in members if o.type == 'MESH')
+                group = "mesh:" + obj.data.name if obj.type == 'MESH' else obj.name
+                chunkItems.append(ChunkItem([o.name for o in members], triangles, group))
+
+            chunks = plan_chunks(chunkItems, prefs.chunk_triangle_budget, prefs.chunk_memory_budget * 1024 * 1024)
+            print(f"[UTS] {len(chunkItems)} objects planned into {len(chunks)} chunks")
+            chunkMonitor = ChunkMonitor()
 
             textureOutputAlt = prefs.temp_path_models
 
-            for index, chunk in enumerate(chunks):
+            # Each chunk's models are compiled as soon as their SMDs are written, while the
+            # next chunk is exported
+            manifest = get_build_manifest()
+            lodRatios = (prefs.lod1_ratio, prefs.lod2_ratio)
+            lodPlans = {}
+            to_compile = []
+            skipped = []
+            queued = set()
+
+            def compile_job(job):
+                obName, cmd, key, outputs = job
+                result = run_command(obName, cmd)
+                print(f"[UTS] Compiled {result.name} (exit {result.returncode}, {result.elapsed:.1f}s)")
+                if result.returncode == 0 and all(os.path.isfile(p) for p in outputs):
+                    journal.record("model:" + obName, "mdl", outputs, key)
+                return result
+
+            def queue_model(obName):
+                with span("qc", "qc", model=obName):
+                    write_if_changed(textureOutputAlt + "\\" + obName + "_idle.smd", IDLE_SMD)
+
+                    qcData = build_qc(obName, textureOutputAlt, world_origins.get(obName), lodPlans.get(obName))
+                    if write_if_changed(textureOutputAlt + "\\" + obName + ".qc", qcData):
+                        print(f"[UTS] QC written: {textureOutputAlt}\\{obName}.qc")
+
+                key = model_fingerprint(manifest, obName, textureOutputAlt, qcData)
+                outputs = model_output_paths(obName, os.path.isfile(textureOutputAlt + "\\" + obName + "_collision.smd"))
+                journal.record("model:" + obName, "qc", [textureOutputAlt + "\\" + obName + ".qc"], key)
+
+                queued.add(obName)
+                if manifest.is_fresh(obName, key):
+                    skipped.append(obName)
+                elif journal.is_done("model:" + obName, "mdl", key):
+                    # Compiled by the interrupted run, whose build manifest was never saved
+                    manifest.record(obName, key, outputs)
+                    skipped.append(obName)
+                else:
+                    to_compile.append((obName, key, outputs))
+                    pipeline.put("studiomdl", (obName, get_studiomdl_command(obName), key, outputs))
+
+            def finish_chunk(chunkModels):
+                # QC files need every LOD/collision SMD of the model, all written by now
+                pipeline.main_stage("qc")
+                for obName in chunkModels:
+                    # The LOD plan is kept with the SMDs, so a resumed run writes the same QC
+                    journal.record("model:" + obName, "smd", model_smd_paths(obName, textureOutputAlt),
+                                   data=lodPlans.get(obName))
+                    queue_model(obName)
+                pipeline.main_stage("smd")
+
+            pipeline.add_stage("studiomdl", compile_job, prefs.compile_workers)
+
+            for index, chunkInfo in enumerate(chunks):
+                chunkMonitor.start(index, chunkInfo)
+                chunk = chunkInfo.names
+                chunkNames = set(chunk)
+                chunkModels = [obName for obName in selected if obName in chunkNames]
+
+                if chunkModels and all(journal.is_done("model:" + obName, "smd") for obName in chunkModels):
+                    print(f"[UTS] Chunk {index + 1}/{len(chunks)} already exported, resuming after it")
+                    pipeline.main_stage("qc")
+                    for obName in chunkModels:
+                        levels = journal.get_data("model:" + obName, "smd")
+                        if levels is not None:
+                            lodPlans[obName] = [LodLevel(*level) for level in levels]
+                        queue_model(obName)
+                    pipeline.main_stage("smd")
+                    continue
+
+                if prefs.smd_exporter == 'SINGLE_PASS':
+                    # Each object is evaluated once; LODs and collision are derived from that evaluation
+                    depsgraph = bpy.context.evaluated_depsgraph_get()
+                    for obName in chunkModels:
+                        ob = bpy.data.objects[obName]
+                        if ob.type != 'MESH':
+                            continue
+                        with span("export_model_smds", "smd", model=obName):
+                            lodPlans[obName] = export_model_smds(ob, bpy.data.objects.get(obName + "_collision"),
+                                                                 depsgraph, textureOutputAlt, lodRatios,
+                                                                 prefs.lod_min_reduction, prefs.lod_screen_error)
+                    print(f"[UTS] Chunk {index + 1}/{len(chunks)}: {len(chunkModels)} models exported in one pass")
+                    finish_chunk(chunkModels)
+                    continue
+
                 new_scene = bpy.data.scenes.new(name=f"SubprojectScene_{index + 1}")
                 bpy.context.window.scene = new_scene
 
@@ -306,6 +390,16 @@ class UTS_OT_ExportChain(bpy.types.Operator):
                 if bpy.context.active_object and bpy.context.active_object.mode and bpy.context.active_object.mode != "OBJECT":
                     bpy.ops.object.mode_set(mode='OBJECT')
 
+                # Triangle budgets per level, measured on the evaluated meshes before export
+                with span("plan_model_lods", "smd", chunk=index + 1):
+                    chunkPlans = plan_model_lods([new_scene.collection.objects[n] for n in chunkModels
+                                                  if n in new_scene.collection.objects],
+                                                 bpy.context, lodRatios, prefs.lod_min_reduction,
+                                                 prefs.lod_screen_error)
+                lodPlans.update(chunkPlans)
+                print(f"[UTS] LOD plan: {sum(len(levels) for levels in chunkPlans.values())} levels "
+                      f"for {len(chunkPlans)} models")
+
                 for i in range(4):
                     print("[UTS] Exporting models. Stage ", i + 1, "/3")
 
@@ -330,16 +424,15 @@ class UTS_OT_ExportChain(bpy.types.Operator):
                         elif i == 2:
                             ob.rename(obName + "_lod2")
 
-                        if i == 2 or i == 1 and ob.type == 'MESH':
-                            mod = ob.modifiers.new('dec', 'DECIMATE')
-
-                            if mod:
-                                mod.decimate_type = 'DISSOLVE'
-                                mod.delimit = {'UV'}
-                                mod.angle_limit = math.radians(i == 1 and 10 or 30)
-                                mod.decimate_type = 'DISSOLVE'
+                        if (i == 1 or i == 2) and ob.type == 'MESH':
+                            levels = lodPlans.get(obName, [])
 
-                            if ob.data and hasattr(ob.data, "polygons") and len(ob.data.polygons) > 30:
+                            # Models whose plan has no level i are hidden and get no _lod{i} SMD
+                            if len(levels) >= i:
+                                mod = ob.modifiers.new('dec', 'DECIMATE')
+                                mod.decimate_type = 'COLLAPSE'
+                                mod.ratio = levels[i - 1].ratio
+                            else:
                                 ob.hide_set(True)
 
                     if i == 3:
@@ -369,16 +462,24 @@ class UTS_OT_ExportChain(bpy.types.Operator):
                             obj.select_set(True)
                             bpy.context.view_layer.objects.active = obj
 
-                    if bpy.context.view_layer.objects.active:
-                        bpy.context.view_layer.objects.active.location.x += 0.001
-                        bpy.context.view_layer.objects.active.location.x -= 0.001
-
-                    try:
-                        io_scene_valvesource.utils.State.update_scene(bpy.context.scene)
-                    except Exception as e:
-                        print(f"[UTS] Failed to update Valve Source scene state: {e}")
-
-                    bpy.ops.export_scene.smd(export_scene=True)
+                    with span("smd stage", "smd", stage=i + 1, chunk=index + 1, exporter=prefs.smd_exporter):
+                        if prefs.smd_exporter == 'NATIVE':
+                            # Evaluated meshes are written straight from foreach_get buffers
+                            depsgraph = bpy.context.evaluated_depsgraph_get()
+                            for obj in new_scene.collection.objects:
+                                if obj.type == 'MESH' and not obj.hide_get():
+                                    write_object_smd(textureOutputAlt + "\\" + obj.name + ".smd", obj, depsgraph)
+                        else:
+                            if bpy.context.view_layer.objects.active:
+                                bpy.context.view_layer.objects.active.location.x += 0.001
+                                bpy.context.view_layer.objects.active.location.x -= 0.001
+
+                            try:
+                                io_scene_valvesource.utils.State.update_scene(bpy.context.scene)
+                            except Exception as e:
+                                print(f"[UTS] Failed to update Valve Source scene state: {e}")
+
+                            bpy.ops.export_scene.smd(export_scene=True)
 
                     for obj in bpy.data.scenes[f"SubprojectScene_{index + 1}"].collection.objects:
                         modif = obj.modifiers.get("dec")
@@ -389,74 +490,22 @@ class UTS_OT_ExportChain(bpy.types.Operator):
                         if modif2:
                             obj.modifiers.remove(obj.modifiers.get("weld"))
 
-                for obName in selected:
-                    with open(textureOutputAlt + "\\" + obName + "_idle.smd", "w") as f:
-                        f.write("""version 1
-nodes
-0 "joint0" -1
-end
-skeleton
-time 0
-0 0.000000 0.000000 0.000000 0 0.000000 0.000000
-end""")
-
-                    # 1 Blender meter = 39.3701 Source units (inches)
-                    SOURCE_SCALE = 39.3701
-
-                    loc = world_origins.get(obName)
-                    if loc:
-                        origin_cmd = f'$origin {loc.x * SOURCE_SCALE:.6f} {loc.y * SOURCE_SCALE:.6f} {loc.z * SOURCE_SCALE:.6f} -90'
-                    else:
-                        origin_cmd = '$autocenter'
-
-                    qcData = f"""$scale {SOURCE_SCALE:.6f}
-$modelname "{prefs.model_prefix}/{obName}.mdl"
-$cdmaterials "{prefs.material_prefix}_override" "{prefs.material_prefix}"
-$staticprop
-$body studio "{obName}.smd"
-$sequence idle "{obName}_idle"
-$surfaceprop "no_decal"
-{origin_cmd}"""
-
-                    for i in range(1, 3):
-                        if os.path.isfile(textureOutputAlt + "\\" + obName + f"_lod{i}.smd"):
-                            qcData += f"""
-$lod {3500 + (i-1) * 1500}
-{{
-    replacemodel "{obName}.smd" "{obName}_lod{i}.smd"
-}}"""
-
-                    if os.path.isfile(textureOutputAlt + "\\" + obName + "_collision.smd"):
-                        qcData += f"""
-$collisionmodel "{obName}_collision.smd" {{
-    $concave
-    $maxconvexpieces 512
-    $automass
-}}"""
-
-                    with open(textureOutputAlt + "\\" + obName + ".qc", "w") as f:
-                        f.write(qcData)
-
-                    print(f"[UTS] QC written: {textureOutputAlt}\\{obName}.qc")
-
-            print(f"[UTS] Starting studiomdl compilation for {len(selected)} models...")
-            print(f"[UTS] Models to compile: {selected}")
-
-            results = []
-            for obName in selected:
-                print(f"[UTS] Compiling {obName}...")
-                output = run_process(obName)
-                print(f"[UTS] Output for {obName}:\n{output}\n")
-                if output.count('\n') >= 3:
-                    results.append(output)
+                finish_chunk(chunkModels)
 
-            output_log = os.path.join(prefs.temp_path, "output.txt")
-            with open(output_log, "w") as f:
-                f.write("\n\n".join(results))
+            chunkMonitor.stop()
+            chunkReport = chunkMonitor.report()
+            for line in chunkReport:
+                print("[UTS] " + line.replace("\t", "  "))
 
-            subprocess.Popen(["notepad", output_log])
+            pipeline.main_stage("qc")
+            for obName in selected:
+                if obName not in queued:
+                    queue_model(obName)
+
+            print(f"[UTS] studiomdl: {len(to_compile)} models queued ({len(skipped)} up to date)")
 
         # Cleanup: restore objects to a clean scene and reset visibility
+        pipeline.main_stage("cleanup")
         try:
             restore_scene = bpy.data.scenes.new(name=original_scene_name + "_restore")
             bpy.context.window.scene = restore_scene
@@ -482,4 +531,37 @@ $collisionmodel "{obName}_collision.smd" {{
         except Exception as e:
             print(f"[UTS] Cleanup error (non-fatal): {e}")
 
+        stageResults = pipeline.close()
+
+        if self.export_materials:
+            statuses = retry_texture_fallbacks(textureJobs, stageResults["textures"], runTexture)
+            print(f"[UTS] {len(textureJobs)} materials processed: "
+                  f"{statuses.count('done')} written, {statuses.count('cached')} up to date, "
+                  f"{statuses.count('failed')} failed, {statuses.count('resumed')} done in a previous run")
+            save_texture_manifest()
+
+            if newImgs:
+                print(f"{len(newImgs)} textures to bake (baking disabled)")
+
+        stageReport = pipeline.report() + [""] + prepareTimer.report()
+        for line in stageReport:
+            print("[UTS] " + line.replace("\t", "  "))
+
+        if self.export_models:
+            results = stageResults["studiomdl"]
+
+            for (obName, key, outputs), result in zip(to_compile, results):
+                if result and result.returncode == 0 and all(os.path.isfile(p) for p in outputs):
+                    manifest.record(obName, key, outputs)
+                else:
+                    manifest.forget(obName)
+            manifest.save()
+
+            output_log = os.path.join(prefs.temp_path, "output.txt")
+            write_compile_report(output_log, [r for r in results if r], skipped, stageReport + [""] + chunkReport)
+
+            # No editor for headless runs (blender -b, benchmarks)
+            if not bpy.app.background:
+                subprocess.Popen(["notepad", output_log])
+
         return {'FINISHED'}
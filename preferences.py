@@ -1,6 +1,6 @@
 import bpy
 from bpy.types import AddonPreferences
-from bpy.props import StringProperty, BoolProperty, FloatProperty, EnumProperty
+from bpy.props import StringProperty, BoolProperty, FloatProperty, EnumProperty, IntProperty
 
 
 class UTS_Prefs(AddonPreferences):
@@ -29,6 +29,13 @@ class UTS_Prefs(AddonPreferences):
         subtype='FILE_PATH'
     )
 
+    studiomdl_path: StringProperty(
+        name='Chemin studiomdl',
+        description='Chemin vers studiomdl.exe (vide = bin/studiomdl.exe de GarrysMod)',
+        default='',
+        subtype='FILE_PATH'
+    )
+
     coacd_path: StringProperty(
         name='Chemin CoACD',
         description='Chemin vers coacd.exe pour la generation de collisions',
@@ -112,6 +119,167 @@ class UTS_Prefs(AddonPreferences):
         max=1.0
     )
 
+    mip_filter: EnumProperty(
+        name='Filtre mipmaps',
+        description='Filtre utilise pour generer les mipmaps des VTF (couleurs en espace lineaire, normal maps renormalisees)',
+        items=[
+            ('NONE', 'Aucun (srctools)', 'Laisser srctools generer les mipmaps (bilineaire, sans correction gamma)'),
+            ('BOX', 'Box', 'Moyenne 2x2, le plus rapide'),
+            ('KAISER', 'Kaiser', 'Sinc fenetre de Kaiser, net sans trop d\'artefacts'),
+            ('LANCZOS', 'Lanczos', 'Lanczos 3, le plus net'),
+        ],
+        default='KAISER'
+    )
+
+    # --- Export SMD ---
+
+    smd_exporter: EnumProperty(
+        name='Export SMD',
+        description='Methode d\'ecriture des SMD de reference, LOD et collision',
+        items=[
+            ('BST', 'Blender Source Tools', 'Passer par l\'operateur export_scene.smd de Blender Source Tools'),
+            ('NATIVE', 'Natif (NumPy)', 'Ecrire les SMD directement depuis les meshes evalues, une passe par LOD (experimental)'),
+            ('SINGLE_PASS', 'Natif, une passe', 'Evaluer chaque objet une seule fois et en deriver reference, LOD (clustering de sommets) et collision (experimental)'),
+        ],
+        default='BST'
+    )
+
+    # --- LOD ---
+
+    lod1_ratio: FloatProperty(
+        name='Budget LOD 1',
+        description='Part des triangles conservee par le LOD 1',
+        default=0.5,
+        min=0.01,
+        max=1.0,
+        subtype='FACTOR'
+    )
+
+    lod2_ratio: FloatProperty(
+        name='Budget LOD 2',
+        description='Part des triangles conservee par le LOD 2',
+        default=0.25,
+        min=0.01,
+        max=1.0,
+        subtype='FACTOR'
+    )
+
+    lod_min_reduction: FloatProperty(
+        name='Gain minimum',
+        description='Un LOD qui retire moins que cette part des triangles du niveau precedent n\'est pas genere',
+        default=0.2,
+        min=0.0,
+        max=0.95,
+        subtype='FACTOR'
+    )
+
+    lod_screen_error: FloatProperty(
+        name='Erreur ecran (px)',
+        description='Erreur geometrique tolere a l\'ecran avant de passer au LOD suivant, en pixels',
+        default=1.0,
+        min=0.1,
+        max=20.0
+    )
+
+    # --- VMF ---
+
+    vmf_partition: EnumProperty(
+        name='Decoupage VMF',
+        description='Repartir les props du VMF en cellules, chacune dans son propre VMF reference par un func_instance',
+        items=[
+            ('NONE', 'Aucun', 'Un seul VMF contenant tous les props'),
+            ('GRID', 'Grille', 'Cellules carrees de taille fixe'),
+            ('KDTREE', 'Arbre k-d', 'Decoupage a la mediane jusqu\'au budget de props par cellule'),
+        ],
+        default='NONE'
+    )
+
+    vmf_cell_size: FloatProperty(
+        name='Taille des cellules',
+        description='Cote d\'une cellule de la grille, en unites Blender',
+        default=256.0,
+        min=1.0
+    )
+
+    vmf_cell_budget: IntProperty(
+        name='Props par cellule',
+        description='Nombre maximum de props dans une cellule de l\'arbre k-d',
+        default=5000,
+        min=1
+    )
+
+    # --- Performance ---
+
+    chunk_triangle_budget: IntProperty(
+        name='Triangles par lot',
+        description='Nombre maximum de triangles exportes par lot de modeles (0 = illimite)',
+        default=2000000,
+        min=0
+    )
+
+    chunk_memory_budget: IntProperty(
+        name='Memoire par lot (Mo)',
+        description='Memoire estimee maximum par lot de modeles exportes (0 = illimite)',
+        default=2048,
+        min=0
+    )
+
+    worker_threads: IntProperty(
+        name='Threads de calcul',
+        description='Nombre de threads pour les calculs internes (OBB, textures...)',
+        default=8,
+        min=1,
+        max=64
+    )
+
+    texture_memory_budget: IntProperty(
+        name='Memoire max textures (Mo)',
+        description='Memoire de travail estimee maximale pour les textures traitees en parallele (0 = sans limite)',
+        default=4096,
+        min=0,
+        subtype='UNSIGNED'
+    )
+
+    compile_workers: IntProperty(
+        name='Compilations paralleles',
+        description='Nombre de processus studiomdl lances en meme temps',
+        default=4,
+        min=1,
+        max=64
+    )
+
+    coacd_workers: IntProperty(
+        name='Decompositions CoACD paralleles',
+        description='Nombre de processus coacd.exe lances en meme temps',
+        default=4,
+        min=1,
+        max=64
+    )
+
+    coacd_memory_budget: IntProperty(
+        name='Memoire max CoACD (Mo)',
+        description='Memoire estimee maximale pour les decompositions simultanees (0 = sans limite)',
+        default=8192,
+        min=0,
+        subtype='UNSIGNED'
+    )
+
+    coacd_cache_size: IntProperty(
+        name='Cache CoACD (Mo)',
+        description='Taille max du cache des decompositions CoACD (les moins recemment utilisees sont supprimees)',
+        default=2048,
+        min=0,
+        subtype='UNSIGNED'
+    )
+
+    # --- Debug ---
+
+    keep_intermediate_tga: BoolProperty(
+        name='Conserver les TGA intermediaires',
+        description='Ecrire un TGA a cote de chaque texture source (debug uniquement, double les E/S disque)',
+        default=False
+    )
+
     def draw(self, context):
         layout = self.layout
 
@@ -124,6 +292,7 @@ class UTS_Prefs(AddonPreferences):
         col.prop(self, "subgmod_path")
         col.separator()
         col.prop(self, "vtex_path")
+        col.prop(self, "studiomdl_path")
         col.prop(self, "coacd_path")
         col.separator()
         col.prop(self, "temp_path")
@@ -164,3 +333,55 @@ class UTS_Prefs(AddonPreferences):
         sub = row.row()
         sub.enabled = self.enable_envmap
         sub.prop(self, "envmap_tint")
+
+        col.separator()
+        col.prop(self, "mip_filter")
+
+        layout.separator()
+
+        # -- Section : LOD --
+        box = layout.box()
+        row = box.row()
+        row.label(text="Modeles et LOD", icon='MOD_DECIM')
+        col = box.column(align=True)
+        col.prop(self, "smd_exporter")
+        col.separator()
+        row = col.row(align=True)
+        row.prop(self, "lod1_ratio")
+        row.prop(self, "lod2_ratio")
+        col.prop(self, "lod_min_reduction")
+        col.prop(self, "lod_screen_error")
+
+        layout.separator()
+
+        # -- Section : VMF --
+        box = layout.box()
+        row = box.row()
+        row.label(text="VMF", icon='MOD_ARRAY')
+        col = box.column(align=True)
+        col.prop(self, "vmf_partition")
+        sub = col.column(align=True)
+        sub.enabled = self.vmf_partition == 'GRID'
+        sub.prop(self, "vmf_cell_size")
+        sub = col.column(align=True)
+        sub.enabled = self.vmf_partition == 'KDTREE'
+        sub.prop(self, "vmf_cell_budget")
+
+        layout.separator()
+
+        # -- Section : Performance --
+        box = layout.box()
+        row = box.row()
+        row.label(text="Performance", icon='SORTTIME')
+        col = box.column(align=True)
+        col.prop(self, "worker_threads")
+        col.prop(self, "chunk_triangle_budget")
+        col.prop(self, "chunk_memory_budget")
+        col.prop(self, "texture_memory_budget")
+        col.prop(self, "compile_workers")
+        col.separator()
+        col.prop(self, "coacd_workers")
+        col.prop(self, "coacd_memory_budget")
+        col.prop(self, "coacd_cache_size")
+        col.separator()
+        col.prop(self, "keep_intermediate_tga")
@@ -0,0 +1,15 @@
+"""Tests of the bpy-free modules, run with plain Python: python -m pytest tests"""
+import importlib
+import os
+import sys
+
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_addon_module(name):
+    """Import a module of the add-on (e.g. 'core.vtf') as part of its package, without Blender."""
+    parent, package = os.path.split(ADDON_DIR)
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+    return importlib.import_module(f"{package}.{name}")
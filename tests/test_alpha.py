@@ -0,0 +1,41 @@
+import numpy as np
+from PIL import Image
+
+from conftest import import_addon_module
+
+alpha = import_addon_module('core.alpha')
+
+
+def rgba(alpha_plane):
+    rgb = np.full(alpha_plane.shape + (3,), 128, dtype=np.uint8)
+    return Image.fromarray(np.dstack([rgb, alpha_plane.astype(np.uint8)]), 'RGBA')
+
+
+def test_thin_soft_line_is_counted():
+    # A one-pixel column off the sampling grid of a strided scan
+    plane = np.full((64, 64), 255)
+    plane[:, 1] = 128
+    info = alpha.analyze_alpha("line.png", img=rgba(plane), tile_rows=16)
+
+    assert info.translucent
+    assert info.coverage == 64 / plane.size
+    assert info.partial == 1.0
+    assert alpha.alpha_mode(info) == "translucent"
+
+
+def test_cutout_in_a_later_band():
+    plane = np.full((64, 64), 255)
+    plane[40:48, 8:40] = 0
+    plane[47, 8:40] = 100
+    info = alpha.analyze_alpha("cutout.png", img=rgba(plane), tile_rows=16)
+
+    assert info.coverage == 8 * 32 / plane.size
+    assert info.partial == 32 / (8 * 32)
+    assert alpha.alpha_mode(info) == "alphatest"
+
+
+def test_opaque_alpha():
+    info = alpha.analyze_alpha("opaque.png", img=rgba(np.full((32, 32), 255)))
+
+    assert info.has_alpha and not info.translucent
+    assert alpha.alpha_mode(info) == "opaque"
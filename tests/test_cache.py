@@ -0,0 +1,42 @@
+import os
+
+from conftest import import_addon_module
+
+cache = import_addon_module('core.cache')
+
+
+def make_file(path, size):
+    path.write_bytes(b"\0" * size)
+    return str(path)
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    src = make_file(tmp_path / "hull.obj", 100)
+    files = cache.FileCache(str(tmp_path / "coacd_cache"), 250, ".obj")
+
+    for key in ("a", "b", "c"):
+        files.put(key, src)
+    files.index["a"]["last_used"] = 3
+    files.index["b"]["last_used"] = 1
+    files.index["c"]["last_used"] = 2
+    files.evict()
+
+    assert sorted(files.index) == ["a", "c"]
+    assert not os.path.exists(files.path("b"))
+    assert files.get("a") == files.path("a")
+
+
+def test_index_survives_save(tmp_path):
+    src = make_file(tmp_path / "hull.obj", 100)
+    directory = str(tmp_path / "coacd_cache")
+    files = cache.FileCache(directory, 1000, ".obj")
+    files.put("a", src)
+    files.save()
+
+    reloaded = cache.FileCache(directory, 1000, ".obj")
+    assert reloaded.get("a") == reloaded.path("a")
+
+    # A cached file deleted behind the index's back is a miss and drops out of the index
+    os.remove(reloaded.path("a"))
+    assert reloaded.get("a") is None
+    assert "a" not in reloaded.index
@@ -0,0 +1,44 @@
+from conftest import import_addon_module
+
+chunk = import_addon_module('core.chunk')
+ChunkItem = chunk.ChunkItem
+
+
+def test_plan_chunks_packs_to_triangle_budget():
+    items = [ChunkItem([name], 400, name) for name in ("A", "B", "C", "D")]
+
+    chunks = chunk.plan_chunks(items, 1000, 0)
+
+    assert [(c.names, c.triangles) for c in chunks] == [(["A", "B"], 800), (["C", "D"], 800)]
+    assert chunks[0].memory == chunk.estimate_memory(800, 2)
+
+
+def test_plan_chunks_keeps_same_mesh_together():
+    # Rock and Rock.001 share a mesh: they stay in one chunk even past the budget
+    items = [ChunkItem(["Chair", "Chair_collision"], 600, "chair_mesh"),
+             ChunkItem(["Rock"], 300, "rock_mesh"),
+             ChunkItem(["Table"], 200, "table_mesh"),
+             ChunkItem(["Rock.001"], 300, "rock_mesh")]
+
+    chunks = chunk.plan_chunks(items, 1000, 0)
+
+    assert [c.names for c in chunks] == [["Chair", "Chair_collision"], ["Rock", "Rock.001", "Table"]]
+    assert [c.triangles for c in chunks] == [600, 800]
+
+
+def test_plan_chunks_memory_budget_and_oversized_group():
+    memory_budget = chunk.estimate_memory(1000, 2)
+    items = [ChunkItem(["Huge"], 5000, "huge"), ChunkItem(["A"], 500, "a"), ChunkItem(["B"], 500, "b")]
+
+    chunks = chunk.plan_chunks(items, 0, memory_budget)
+
+    # A group over the budget gets a chunk of its own instead of being dropped
+    assert [c.names for c in chunks] == [["Huge"], ["A", "B"]]
+    assert all(c.memory <= memory_budget for c in chunks[1:])
+
+
+def test_plan_chunks_without_budgets_is_one_chunk():
+    items = [ChunkItem([name], 10 ** 6, name) for name in ("A", "B")]
+
+    assert [c.names for c in chunk.plan_chunks(items, 0, 0)] == [["A", "B"]]
+    assert chunk.plan_chunks([], 1000, 0) == []
@@ -0,0 +1,74 @@
+import os
+
+from PIL import Image
+
+from conftest import import_addon_module
+
+image = import_addon_module('core.image')
+
+SIZE = 4096
+TARGET = 2048
+
+
+def write(tmp_path, name):
+    path = str(tmp_path / name)
+    Image.new('RGB', (SIZE, SIZE), (90, 120, 30)).save(path)
+    return path
+
+
+def test_png_estimate_counts_the_full_size_decode(tmp_path):
+    estimate = image.estimate_texture_bytes(write(tmp_path, "large.png"))
+
+    # PNG cannot be decoded at a reduced scale: the full RGB buffer comes first
+    assert estimate >= SIZE * SIZE * 3
+    assert estimate == SIZE * SIZE * 3 + TARGET * TARGET * 4 + TARGET * TARGET * 12
+
+
+def test_jpeg_estimate_uses_the_draft_size(tmp_path):
+    png = image.estimate_texture_bytes(write(tmp_path, "large.png"))
+    jpeg = image.estimate_texture_bytes(write(tmp_path, "large.jpg"))
+
+    assert jpeg == TARGET * TARGET * 4 + TARGET * TARGET * 12
+    assert jpeg < png
+
+
+def test_load_image_reduces_to_the_vtf_size(tmp_path):
+    for name in ("large.png", "large.jpg"):
+        assert image.load_image(write(tmp_path, name)).size == (TARGET, TARGET)
+
+
+def test_unreadable_file_estimates_nothing(tmp_path):
+    path = tmp_path / "broken.png"
+    path.write_bytes(b"not an image")
+
+    assert image.estimate_texture_bytes(str(path)) == 0
+
+
+def write_orm(path, ao, roughness, metallic):
+    Image.new('RGB', (8, 8), (ao, roughness, metallic)).save(path)
+
+
+def test_orm_channels_are_views_of_one_decode(tmp_path):
+    path = str(tmp_path / "T_Chair_ORM.png")
+    write_orm(path, 200, 120, 40)
+    image.reset_orm_cache()
+
+    metallic = image.get_orm_channel(path, "metallic")
+    roughness = image.get_orm_channel(path, "roughness")
+
+    assert metallic.shape == (8, 8) and (metallic == 40).all()
+    assert (roughness == 120).all() and (image.get_orm_channel(path, "ao") == 200).all()
+    # Strided views of the same decoded RGB buffer, no per-channel copy
+    assert metallic.base is not None and metallic.base is roughness.base
+    assert image.get_orm_channel(path, "metallic") is metallic
+
+
+def test_orm_cache_follows_the_file_version(tmp_path):
+    path = str(tmp_path / "T_Chair_ORM.png")
+    write_orm(path, 200, 120, 40)
+    image.reset_orm_cache()
+    assert (image.get_orm_channel(path, "metallic") == 40).all()
+
+    write_orm(path, 200, 120, 90)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+    assert (image.get_orm_channel(path, "metallic") == 90).all()
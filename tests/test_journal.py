@@ -0,0 +1,30 @@
+from conftest import import_addon_module
+
+journal = import_addon_module('core.journal')
+LodLevel = import_addon_module('core.lodplan').LodLevel
+
+
+def test_record_data_survives_resume(tmp_path):
+    smd = tmp_path / "Chair.smd"
+    smd.write_text("version 1\n")
+    path = str(tmp_path / "export_journal.jsonl")
+    plan = [LodLevel(1, 0.5, 600, 12.5, 1500.0), LodLevel(2, 0.25, 300, 25.0, 3000.0)]
+
+    journal.Journal(path).record("model:Chair", "smd", [str(smd)], data=plan)
+    resumed = journal.Journal(path, resume=True)
+
+    assert resumed.is_done("model:Chair", "smd")
+    assert [LodLevel(*level) for level in resumed.get_data("model:Chair", "smd")] == plan
+    assert resumed.get_data("model:Table", "smd") is None
+
+
+def test_key_mismatch_is_not_done(tmp_path):
+    vtf = tmp_path / "chair.vtf"
+    vtf.write_bytes(b"VTF\0")
+    path = str(tmp_path / "export_journal.jsonl")
+
+    journal.Journal(path).record("material:chair", "vtf", [str(vtf)], key="a")
+    resumed = journal.Journal(path, resume=True)
+
+    assert resumed.is_done("material:chair", "vtf", "a")
+    assert not resumed.is_done("material:chair", "vtf", "b")
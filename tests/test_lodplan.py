@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+from conftest import import_addon_module
+
+lodplan = import_addon_module('core.lodplan')
+
+
+def test_sphere_error_and_threshold():
+    error = lodplan.sphere_error(100.0, 1000)
+    assert error == pytest.approx(2 * math.pi * 100.0 / (math.sqrt(3) * 1000))
+    assert error == pytest.approx(3.63 * 100.0 / 1000, rel=1e-3)
+
+    # 100 * error / screen_error, rounded and never below 1
+    assert lodplan.lod_threshold(0.3, 1.0) == 30
+    assert lodplan.lod_threshold(0.001, 1.0) == 1
+    # The error spans screen_error pixels at the reported distance: 1080 px over a 75 degree view
+    assert lodplan.switch_distance(1.0, 1.0) == pytest.approx(1080 / (2 * math.tan(math.radians(37.5))))
+
+
+def test_plan_lods_skips_small_reductions_and_renumbers():
+    ratios = [0.5, 0.45, 0.1]
+
+    levels = lodplan.plan_lods(100.0, 10000, [5000, 4500, 1000], ratios, min_reduction=0.25, screen_error=1.0)
+
+    # 4500 removes only 10% of the 5000 of the kept 0.5 level
+    assert [(level.index, level.ratio, level.triangles) for level in levels] == [(1, 0.5, 5000), (2, 0.1, 1000)]
+    base_error = lodplan.sphere_error(100.0, 10000)
+    for level in levels:
+        error = lodplan.sphere_error(100.0, level.triangles) - base_error
+        assert level.threshold == round(100 * error)
+        assert level.distance == pytest.approx(lodplan.switch_distance(error, 1.0))
+
+
+def test_plan_lods_thresholds_strictly_increase():
+    # Both errors round to the minimum metric of 1 with a large screen error
+    levels = lodplan.plan_lods(1.0, 10000, [5000, 2000], [0.5, 0.2], min_reduction=0.25, screen_error=50.0)
+
+    assert [level.threshold for level in levels] == [1, 2]
+
+
+def test_plan_lods_without_reduction_is_empty():
+    assert lodplan.plan_lods(100.0, 1000, [990, 980], [0.5, 0.25], min_reduction=0.25, screen_error=1.0) == []
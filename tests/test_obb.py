@@ -0,0 +1,65 @@
+import itertools
+
+import numpy as np
+
+from conftest import import_addon_module
+
+obb = import_addon_module('core.obb')
+
+# Corner i of a box has (x, y, z) signs from bits 2, 1, 0 of i; faces as corner indices, wound outward
+BOX_FACES = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 2, 6, 4), (1, 5, 7, 3), (0, 4, 5, 1), (2, 3, 7, 6)]
+
+
+def rotation(axis, angle):
+    axis = np.asarray(axis, dtype=np.float64) / np.linalg.norm(axis)
+    k = np.array([[0, -axis[2], axis[1]], [axis[2], 0, -axis[0]], [-axis[1], axis[0], 0]])
+    return np.eye(3) + np.sin(angle) * k + (1 - np.cos(angle)) * k @ k
+
+
+def box_hull(center, rot, half_extents):
+    """Hull arrays of a box, as operators.collision builds them from a bmesh convex hull."""
+    signs = np.array(list(itertools.product((-1, 1), repeat=3)), dtype=np.float64)
+    points = center + (signs * half_extents) @ rot.T
+
+    normals = []
+    for face in BOX_FACES:
+        a, b, c = points[list(face[:3])]
+        normal = np.cross(b - a, c - a)
+        normals.append(normal / np.linalg.norm(normal))
+
+    edge_faces = {}
+    for index, face in enumerate(BOX_FACES):
+        for start, end in zip(face, face[1:] + face[:1]):
+            edge_faces.setdefault(tuple(sorted((start, end))), []).append(index)
+    edges = list(edge_faces)
+
+    return points, np.array(normals), np.array(edges), np.array([edge_faces[e] for e in edges])
+
+
+def test_fits_a_rotated_box_exactly():
+    center = np.array([4.0, -2.0, 1.5])
+    rot = rotation((1, 2, 0.5), 0.7)
+    half_extents = np.array([3.0, 2.0, 0.5])
+
+    result_center, axes, result_half, volume = obb.fit_obb(*box_hull(center, rot, half_extents))
+
+    assert np.allclose(result_center, center)
+    assert np.isclose(volume, np.prod(half_extents * 2))
+    # Axes are unit rows, orthogonal, each parallel to one edge of the box, with that edge's half extent
+    assert np.allclose(axes @ axes.T, np.eye(3))
+    for axis, half in zip(axes, result_half):
+        alignment = np.abs(rot.T @ axis)
+        match = int(np.argmax(alignment))
+        assert np.isclose(alignment[match], 1.0)
+        assert np.isclose(half, half_extents[match])
+
+
+def test_fit_obb_job_keeps_the_name():
+    name, result = obb.fit_obb_job(("Crate",) + box_hull(np.zeros(3), np.eye(3), np.ones(3)))
+
+    assert name == "Crate"
+    assert np.allclose(sorted(result[2]), [1.0, 1.0, 1.0])
+
+
+def test_degenerate_hull():
+    assert obb.fit_obb(np.zeros((1, 3)), np.zeros((0, 3)), [], []) is None
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+from srctools.keyvalues import Keyvalues
+
+from conftest import import_addon_module
+
+partition = import_addon_module('core.partition')
+PropRecord = import_addon_module('core.vmfwriter').PropRecord
+
+
+def prop(x, y):
+    return PropRecord(x, y, 0.0, "0 0 0", "models/uts/rock.mdl")
+
+
+def test_grid_cells_follow_floor_of_origin():
+    records = [prop(10, 10), prop(255, 0), prop(256, 0), prop(-1, 300)]
+
+    cells = partition.grid_cells(records, 256.0)
+
+    assert list(cells) == ["cell_-1_1", "cell_0_0", "cell_1_0"]
+    assert cells["cell_0_0"] == records[:2]
+    assert cells["cell_1_0"] == [records[2]]
+
+
+def test_kdtree_cells_respect_budget_and_keep_every_record():
+    # A 10x3 strip: the first split is along x, the widest axis
+    records = [prop(x * 100.0, y * 10.0) for x in range(10) for y in range(3)]
+
+    cells = partition.kdtree_cells(records, 8)
+
+    assert all(len(cell) <= 8 for cell in cells.values())
+    assert sorted(r for cell in cells.values() for r in cell) == sorted(records)
+    first, last = cells["cell_0000"], cells[f"cell_{len(cells) - 1:04d}"]
+    assert max(r.x for r in first) < min(r.x for r in last)
+
+
+def test_write_partitioned_vmf_replaces_old_cells(tmp_path):
+    path = str(tmp_path / "map.vmf")
+    instance_dir = tmp_path / "instances"
+    instance_dir.mkdir()
+    (instance_dir / "map_cell_9_9.vmf").write_text("stale")
+
+    written = partition.write_partitioned_vmf(path, [prop(10, 10), prop(300, 10)], 'GRID', cell_size=256.0)
+
+    assert [(os.path.basename(p), n) for p, n in written] == [("map_cell_0_0.vmf", 1), ("map_cell_1_0.vmf", 1)]
+    assert sorted(os.listdir(instance_dir)) == ["map_cell_0_0.vmf", "map_cell_1_0.vmf"]
+    with open(path, "r") as f:
+        master = Keyvalues.parse(f, path)
+    assert [e["file"] for e in master.find_all("entity")] == ["instances/map_cell_0_0.vmf",
+                                                               "instances/map_cell_1_0.vmf"]
+
+
+def test_unknown_mode_raises(tmp_path):
+    with pytest.raises(ValueError):
+        partition.write_partitioned_vmf(str(tmp_path / "map.vmf"), [], 'OCTREE')
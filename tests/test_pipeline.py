@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from conftest import import_addon_module
+
+pipeline = import_addon_module('core.pipeline')
+
+
+def slow_square(item):
+    # Later items finish first, so results must be reordered
+    time.sleep(0.002 * (10 - item))
+    return item * item
+
+
+def test_results_in_submission_order():
+    with pipeline.Pipeline() as pipe:
+        pipe.add_stage("square", slow_square, workers=4)
+        pipe.feed("square", range(5))
+        for item in range(5, 10):
+            pipe.put("square", item)
+        results = pipe.close()
+
+    assert results == {"square": [item * item for item in range(10)]}
+
+
+def test_stage_error_gives_none():
+    def fail_on_odd(item):
+        if item % 2:
+            raise ValueError(item)
+        return item
+
+    with pipeline.Pipeline() as pipe:
+        pipe.add_stage("even", fail_on_odd, workers=2)
+        pipe.feed("even", range(4))
+        results = pipe.close()
+
+    assert results["even"] == [0, None, 2, None]
+
+
+def test_report_lists_every_stage():
+    with pipeline.Pipeline() as pipe:
+        pipe.main_stage("prepare")
+        pipe.add_stage("square", slow_square)
+        pipe.put("square", 9)
+        pipe.close()
+
+    lines = pipe.report()
+    assert any(line.startswith("prepare\tmain") for line in lines)
+    assert any(line.startswith("square\t1\t1") for line in lines)
+
+
+def test_error_in_block_stops_every_thread():
+    done = []
+
+    def record(item):
+        time.sleep(0.01)
+        done.append(item)
+
+    with pytest.raises(RuntimeError):
+        with pipeline.Pipeline() as pipe:
+            # One slot: the feeder stays blocked on put until the pipeline is aborted
+            pipe.add_stage("record", record, workers=1, capacity=1)
+            pipe.feed("record", range(1000))
+            raise RuntimeError("export failed")
+
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("uts-")]
+    assert len(done) < 1000
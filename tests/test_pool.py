@@ -0,0 +1,44 @@
+import threading
+import time
+
+from conftest import import_addon_module
+
+pool = import_addon_module('core.pool')
+
+
+def test_run_ordered_keeps_input_order():
+    done = []
+
+    def slow_square(n):
+        time.sleep(0.01 * (5 - n))
+        return n * n
+
+    results = pool.run_ordered(slow_square, range(5), 4, on_done=lambda i, r: done.append(i))
+
+    assert results == [0, 1, 4, 9, 16]
+    assert sorted(done) == [0, 1, 2, 3, 4]
+
+
+def test_memory_budget_limits_concurrent_reservations():
+    budget = pool.MemoryBudget(100)
+    lock = threading.Lock()
+    peak = [0]
+
+    def job(amount):
+        with budget.reserve(amount):
+            with lock:
+                peak[0] = max(peak[0], budget.used)
+            time.sleep(0.02)
+        return amount
+
+    # 250 is clamped to the whole budget: it runs, but alone
+    pool.run_ordered(job, [60, 60, 40, 250], 4)
+
+    assert peak[0] <= 100
+    assert budget.used == 0
+
+
+def test_memory_budget_zero_is_disabled():
+    budget = pool.MemoryBudget(0)
+    with budget.reserve(10 ** 9):
+        assert budget.used == 0
@@ -0,0 +1,68 @@
+import os
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from conftest import import_addon_module
+
+smd = import_addon_module('core.smd')
+
+# Blender Source Tools export of a 2x2 plane made of two triangles, material "Mat"
+BST_QUAD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "quad_bst.smd")
+QUAD_COORDS = [(-1, -1, 0), (1, -1, 0), (1, 1, 0), (-1, 1, 0)]
+QUAD_UVS = [(0, 0), (1, 0), (1, 1), (0, 1)]
+QUAD_FACES = [(0, 1, 2), (0, 2, 3)]
+
+
+def read_triangles(path):
+    """Triangles of an SMD as a Counter of (material, corners), independent of bone names,
+    number formatting and triangle order. Corners keep their winding, starting at the smallest."""
+    with open(path) as f:
+        lines = [line.strip() for line in f]
+    body = lines[lines.index("triangles") + 1:]
+    body = body[:body.index("end")]
+
+    triangles = Counter()
+    for start in range(0, len(body), 4):
+        corners = [tuple(round(float(value), 4) + 0.0 for value in line.split()[1:9])
+                   for line in body[start + 1:start + 4]]
+        first = corners.index(min(corners))
+        triangles[body[start], tuple(corners[first:] + corners[:first])] += 1
+    return triangles
+
+
+def test_write_smd_matches_blender_source_tools(tmp_path):
+    corners = [index for face in QUAD_FACES for index in face]
+    quad = smd.SmdMesh(
+        positions=np.array(QUAD_COORDS, dtype=np.float64)[corners],
+        normals=np.tile([0.0, 0.0, 1.0], (len(corners), 1)),
+        uvs=np.array(QUAD_UVS, dtype=np.float32)[corners],
+        material_index=np.zeros(len(QUAD_FACES), dtype=np.int32),
+        materials=["Mat"],
+    )
+    path = str(tmp_path / "quad.smd")
+    smd.write_smd(path, [quad])
+
+    assert read_triangles(path) == read_triangles(BST_QUAD)
+
+
+def test_write_object_smd_matches_blender_source_tools(tmp_path):
+    bpy = pytest.importorskip("bpy")
+
+    mesh = bpy.data.meshes.new("quad")
+    mesh.from_pydata(QUAD_COORDS, [], QUAD_FACES)
+    uv_layer = mesh.uv_layers.new()
+    uv_layer.data.foreach_set("uv", [value for face in QUAD_FACES for index in face for value in QUAD_UVS[index]])
+    mesh.materials.append(bpy.data.materials.new("Mat"))
+    obj = bpy.data.objects.new("quad", mesh)
+    bpy.context.scene.collection.objects.link(obj)
+
+    try:
+        path = str(tmp_path / "quad.smd")
+        triangles = smd.write_object_smd(path, obj, bpy.context.evaluated_depsgraph_get())
+
+        assert triangles == len(QUAD_FACES)
+        assert read_triangles(path) == read_triangles(BST_QUAD)
+    finally:
+        bpy.data.batch_remove([obj, mesh, mesh.materials[0]])
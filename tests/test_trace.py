@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from conftest import import_addon_module
+
+trace = import_addon_module('core.trace')
+
+
+def test_finish_trace_writes_chrome_trace_and_summary(tmp_path):
+    trace.start_trace("unit")
+    with trace.span("step", "test", item=1):
+        pass
+    json_path, summary_path = trace.finish_trace(str(tmp_path))
+
+    with open(json_path) as f:
+        events = json.load(f)["traceEvents"]
+    assert any(event["name"] == "step" and event["ph"] == "X" for event in events)
+    assert "step" in open(summary_path).read()
+
+
+def test_unwritable_directory_is_skipped(tmp_path):
+    blocker = tmp_path / "export"
+    blocker.write_text("a file where the directory should be")
+
+    trace.start_trace("unit")
+    assert trace.finish_trace(str(blocker / "sub")) == ()
+    # Tracing is stopped either way
+    assert trace.finish_trace(str(tmp_path)) == ()
+
+
+def test_traced_keeps_the_operator_result_and_exception():
+    class Operator:
+        @trace.traced("unit")
+        def execute(self, context):
+            return {'FINISHED'} if context is None else context.missing
+
+    # Without Blender the preferences cannot be read, so the trace write itself fails
+    assert Operator().execute(None) == {'FINISHED'}
+    with pytest.raises(AttributeError):
+        Operator().execute(object())
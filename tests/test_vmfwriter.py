@@ -0,0 +1,51 @@
+from srctools.keyvalues import Keyvalues
+
+from conftest import import_addon_module
+
+vmfwriter = import_addon_module('core.vmfwriter')
+
+
+def parse(path):
+    with open(path, "r") as f:
+        return Keyvalues.parse(f, path)
+
+
+def test_format_number():
+    assert vmfwriter.format_number(12.5) == "12.5"
+    assert vmfwriter.format_number(3.0) == "3"
+    assert vmfwriter.format_number(-0.00001) == "0"
+    assert vmfwriter.format_number(1.23456) == "1.2346"
+
+
+def test_entities_parse_with_incremental_ids(tmp_path):
+    path = str(tmp_path / "props.vmf")
+    with vmfwriter.VmfWriter(path) as writer:
+        writer.write_prop(vmfwriter.PropRecord(12.5, -3.0, 0.0, "0 90 0", "models/uts/chair.mdl"))
+        writer.write_prop(vmfwriter.PropRecord(1.0, 2.0, 3.0, "0 180 0", "models/uts/table.mdl"))
+        writer.write_entity("light", [("origin", "0 0 64"), ("_light", "255 255 255 200")])
+    assert writer.count == 3
+
+    root = parse(path)
+    assert [kv.name for kv in root] == ["versioninfo", "world", "entity", "entity", "entity",
+                                         "cameras", "cordon"]
+    assert root.find_key("world")["classname"] == "worldspawn"
+
+    ids = [int(block["id"]) for block in root if block.name in ("world", "entity")]
+    assert ids == [1, 2, 3, 4]
+
+    chair = next(root.find_all("entity"))
+    assert chair["classname"] == "prop_static"
+    assert chair["origin"] == "12.5 -3 0"
+    assert chair["angles"] == "0 90 0"
+    assert chair["model"] == "models/uts/chair.mdl"
+
+
+def test_close_is_idempotent(tmp_path):
+    path = str(tmp_path / "empty.vmf")
+    writer = vmfwriter.VmfWriter(path, skyname="sky_night01")
+    writer.close()
+    writer.close()
+
+    root = parse(path)
+    assert root.find_key("world")["skyname"] == "sky_night01"
+    assert len(list(root.find_all("cordon"))) == 1
@@ -0,0 +1,61 @@
+import io
+
+import numpy as np
+from PIL import Image
+from srctools import VTF
+from srctools.vtf import ImageFormats as VTFFormats
+
+from conftest import import_addon_module
+
+vtf = import_addon_module('core.vtf')
+
+
+def checkerboard(size, square=1):
+    """Black and white squares: 50% gray in linear light is about 188 in sRGB, while
+    srctools' bilinear filter, which averages sRGB values, gives 127."""
+    y, x = np.mgrid[0:size, 0:size] // square
+    rgb = np.where((x + y) % 2, 255, 0).astype(np.uint8)
+    rgba = np.stack([rgb, rgb, rgb, np.full_like(rgb, 255)], axis=2)
+    return Image.fromarray(rgba, 'RGBA')
+
+
+def read_back(texture):
+    buffer = io.BytesIO()
+    texture.save(buffer)
+    buffer.seek(0)
+    return VTF.read(buffer)
+
+
+def frame_pixels(frame):
+    return np.asarray(frame.to_PIL().convert('RGBA'), dtype=np.int16)
+
+
+def test_low_res_thumbnail_survives_save():
+    # 2-pixel squares still contrast at 32x32, where srctools would rescale the 16x16 thumbnail from
+    img = checkerboard(64, square=2)
+    expected = vtf.low_res_level(vtf.build_mip_chain(np.asarray(img), 'KAISER'))
+
+    texture = vtf.image_to_vtf(img, VTFFormats.RGBA8888, mip_filter='KAISER')
+    # Uncompressed thumbnail, so the read-back is exact (the default DXT1 is lossy)
+    texture.low_format = VTFFormats.RGB888
+    loaded = read_back(texture)
+    loaded._low_res.load()
+
+    assert np.array_equal(frame_pixels(loaded._low_res)[:, :, :3], expected[:, :, :3])
+
+
+def test_mip_levels_survive_save():
+    img = checkerboard(64)
+    levels = vtf.build_mip_chain(np.asarray(img), 'BOX')
+    loaded = read_back(vtf.image_to_vtf(img, VTFFormats.RGBA8888, mip_filter='BOX'))
+
+    for mipmap, level in enumerate(levels[:loaded.mipmap_count]):
+        assert np.array_equal(frame_pixels(loaded.get(mipmap=mipmap)), level)
+
+
+def test_no_mip_filter_leaves_thumbnail_to_srctools():
+    texture = vtf.image_to_vtf(checkerboard(64), VTFFormats.RGBA8888)
+    loaded = read_back(texture)
+    loaded._low_res.load()
+
+    assert abs(frame_pixels(loaded._low_res)[:, :, :3].mean() - 127) < 8
@@ -1,37 +1,18 @@
 import os
-import math
 
 import bpy
 from PIL import Image
 from srctools import VTF
-from srctools.vtf import ImageFormats as VTFFormats
-from srctools.vtf import VTFFlags
 
+from .core.vtf import VTF_MAX_SIZE, image_to_vtf, vtf_size
 
-def PILToVTF(img: Image, fmt) -> VTF:
-    """Convert a PIL Image to a VTF texture, resizing to the closest power of two."""
-    def closest_power_of_two(n):
-        return 2 ** round(math.log2(n))
 
-    new_width = closest_power_of_two(img.width)
-    new_height = closest_power_of_two(img.height)
+def PILToVTF(img: Image, fmt, mip_filter=None, srgb=True, normal_map=False) -> VTF:
+    """Convert a PIL Image to a VTF texture, resizing to the closest power of two.
 
-    if new_width > 2048:
-        new_width = 2048
-    if new_height > 2048:
-        new_height = 2048
-
-    if new_width != img.width or new_height != img.height:
-        print(f"[UTS] Resizing texture from {img.width}x{img.height} to {new_width}x{new_height}")
-        img = img.resize((new_width, new_height), Image.LANCZOS)
-
-    v = VTF(img.width, img.height, frames=1, fmt=fmt, version=(7, 4), flags=VTFFlags.EIGHTBITALPHA)
-
-    if fmt == VTFFormats.DXT5:
-        v.flags = VTFFlags.EIGHTBITALPHA
-
-    v.get(frame=0).copy_from(img.convert('RGBA').tobytes())
-    return v
+    See core.vtf.image_to_vtf() for the mipmap options.
+    """
+    return image_to_vtf(img, fmt, mip_filter=mip_filter, srgb=srgb, normal_map=normal_map)
 
 
 def clearCollections():